@@ -0,0 +1,241 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, List, Tuple
+
+from config import (
+    SCRAPING_INTERVAL_HOURS,
+    SCHEDULER_STATE_FILE,
+    SCHEDULER_SEEN_FILE,
+    SCHEDULER_MIN_INTERVAL_HOURS,
+    SCHEDULER_MAX_INTERVAL_HOURS,
+    SCHEDULER_TARGET_NEW_LEADS,
+    CYCLE_BROWSER_MINUTES,
+    CYCLE_API_QUOTA
+)
+from storage.lead_export import lead_fingerprint
+from scrapers.rate_limiter import rate_limiters
+
+# Platforms whose targets are paid for with YouTube API quota units; every
+# other platform drives a browser and is paid for in browser minutes.
+API_PLATFORMS = {'youtube'}
+
+# Weight of the newest observation in the moving averages
+EWMA_ALPHA = 0.3
+
+
+class CrawlScheduler:
+    """Keeps per-target crawl history and picks what to scrape each cycle"""
+
+    def __init__(self, state_path: str = SCHEDULER_STATE_FILE,
+                 seen_path: str = SCHEDULER_SEEN_FILE,
+                 browser_minutes: float = CYCLE_BROWSER_MINUTES,
+                 api_quota: float = CYCLE_API_QUOTA):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.state_path = state_path
+        self.seen_path = seen_path
+        self.browser_minutes = browser_minutes
+        self.api_quota = api_quota
+        self._seen_db = None
+        self.targets = self.load_state()
+
+    @property
+    def seen_db(self) -> sqlite3.Connection:
+        """Fingerprints of the leads each target has produced, to tell new leads from re-scraped ones"""
+        if self._seen_db is None:
+            directory = os.path.dirname(self.seen_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.seen_path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS seen ('
+                'target TEXT NOT NULL, fingerprint TEXT NOT NULL, PRIMARY KEY (target, fingerprint)'
+                ') WITHOUT ROWID'
+            )
+            self._seen_db = db
+        return self._seen_db
+
+    def load_state(self) -> Dict[str, Dict]:
+        """Load per-target state from disk"""
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                targets = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not read scheduler state {self.state_path}: {str(e)}")
+            return {}
+        # Older state files kept the seen fingerprints inline
+        for key, state in targets.items():
+            if 'seen' in state:
+                self.mark_seen(key, state.pop('seen'))
+        return targets
+
+    def mark_seen(self, key: str, fingerprints: List[str]) -> List[str]:
+        """Record fingerprints for a target; returns the ones it hadn't produced before"""
+        db = self.seen_db
+        new_prints = []
+        with db:
+            db.execute('BEGIN')
+            for fingerprint in fingerprints:
+                if db.execute('INSERT OR IGNORE INTO seen (target, fingerprint) VALUES (?, ?)',
+                              (key, fingerprint)).rowcount:
+                    new_prints.append(fingerprint)
+        return new_prints
+
+    def save_state(self):
+        """Persist per-target state atomically"""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.targets, f, separators=(',', ':'))
+        os.replace(tmp_path, self.state_path)
+
+    def register_targets(self, targets: Dict[str, List[str]]):
+        """Set the active targets (platform -> list of targets), keeping existing history.
+
+        Targets no longer in the config are marked inactive rather than deleted,
+        so their history comes back if they are re-added.
+        """
+        active = set()
+        for platform, items in targets.items():
+            for target in items:
+                key = f"{platform}|{target}"
+                active.add(key)
+                if key not in self.targets:
+                    self.targets[key] = {
+                        'platform': platform,
+                        'target': target,
+                        'last_crawl': None,
+                        'runs': 0,
+                        'errors': 0,
+                        'error_streak': 0,
+                        'yield': None,
+                        'cost': None
+                    }
+        for key, state in self.targets.items():
+            state['active'] = key in active
+
+    def error_rate(self, state: Dict) -> float:
+        return state['errors'] / state['runs'] if state['runs'] else 0.0
+
+    def compute_interval(self, state: Dict) -> float:
+        """Recrawl interval in hours: shorter for productive targets, backed off on errors"""
+        if state['yield'] is None:
+            return 0.0
+        interval = SCRAPING_INTERVAL_HOURS * (SCHEDULER_TARGET_NEW_LEADS + 1) / (state['yield'] + 1)
+        interval *= 2 ** min(state['error_streak'], 5)
+        return max(SCHEDULER_MIN_INTERVAL_HOURS, min(SCHEDULER_MAX_INTERVAL_HOURS, interval))
+
+    def estimated_cost(self, state: Dict) -> float:
+        """Expected browser minutes or API units for one crawl of the target"""
+        if state['cost'] is not None:
+            return state['cost']
+        return 2.0 if state['platform'] in API_PLATFORMS else 1.0
+
+    def priority(self, state: Dict, now: float) -> float:
+        """Expected new leads per unit of budget, boosted the longer a target is overdue"""
+        if state['last_crawl'] is None:
+            return math.inf
+        interval_s = self.compute_interval(state) * 3600
+        overdue = (now - state['last_crawl']) / interval_s
+        expected = (state['yield'] or 0) + 0.1
+        return expected * overdue * (1 - self.error_rate(state) / 2) / max(self.estimated_cost(state), 0.01)
+
+    def due_targets(self, now: float = None) -> List[Dict]:
+        """Targets whose recrawl interval has elapsed, highest priority first"""
+        now = now or time.time()
+        due = [
+            state for state in self.targets.values()
+            if state.get('active', True) and (
+                state['last_crawl'] is None
+                or now - state['last_crawl'] >= self.compute_interval(state) * 3600
+            )
+        ]
+        return sorted(due, key=lambda state: self.priority(state, now), reverse=True)
+
+    def record_result(self, state: Dict, leads: List[Dict], cost: float, error: bool = False) -> List[Dict]:
+        """Update a target's history after a crawl; returns the leads the target hadn't produced before"""
+        state['runs'] += 1
+        state['last_crawl'] = time.time()
+
+        if error:
+            state['errors'] += 1
+            state['error_streak'] += 1
+            if state['yield'] is None:
+                state['yield'] = 0.0
+                state['cost'] = cost
+            return []
+        state['error_streak'] = 0
+
+        fingerprints = {lead_fingerprint(lead): lead for lead in leads}
+        new_prints = self.mark_seen(f"{state['platform']}|{state['target']}", list(fingerprints))
+        new_leads = [fingerprints[fingerprint] for fingerprint in new_prints]
+
+        if state['yield'] is None:
+            state['yield'] = float(len(new_leads))
+            state['cost'] = cost
+        else:
+            state['yield'] += EWMA_ALPHA * (len(new_leads) - state['yield'])
+            state['cost'] += EWMA_ALPHA * (cost - state['cost'])
+        return new_leads
+
+    def run_cycle(self, runners: Dict[str, Callable[[str], List[Dict]]],
+                  now: float = None) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+        """Dispatch due targets in priority order until the cycle budget is spent.
+
+        Returns platform -> every lead scraped, and platform -> the leads their
+        targets hadn't produced in an earlier crawl.
+        """
+        budget = {'browser': self.browser_minutes, 'api': self.api_quota}
+        results = {}
+        new_results = {}
+
+        for state in self.due_targets(now):
+            platform = state['platform']
+            runner = runners.get(platform)
+            if not runner:
+                continue
+
+            kind = 'api' if platform in API_PLATFORMS else 'browser'
+            if budget[kind] <= 0 or self.estimated_cost(state) > budget[kind]:
+                continue
+
+            self.logger.info(f"Crawling {platform} target: {state['target']}")
+            start = time.time()
+            units = rate_limiters.get('youtube_quota').requests
+            error = False
+            try:
+                leads = runner(state['target']) or []
+            except Exception as e:
+                self.logger.error(f"Error crawling {state['target']}: {str(e)}")
+                leads = []
+                error = True
+
+            if kind == 'api':
+                # API units drawn from the quota limiter (videos, thread and reply pages)
+                cost = max(rate_limiters.get('youtube_quota').requests - units, 1)
+            else:
+                cost = (time.time() - start) / 60
+            budget[kind] -= cost
+
+            new_leads = self.record_result(state, leads, cost, error)
+            results.setdefault(platform, []).extend(leads)
+            new_results.setdefault(platform, []).extend(new_leads)
+            self.logger.info(
+                f"{state['target']}: {len(leads)} leads ({len(new_leads)} new), "
+                f"next crawl in {self.compute_interval(state):.1f}h"
+            )
+
+            if budget['browser'] <= 0 and budget['api'] <= 0:
+                break
+
+        self.save_state()
+        return results, new_results
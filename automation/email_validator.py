@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import (
+    EMAIL_VALIDATION_WORKERS, EMAIL_VALIDATION_TIMEOUT, EMAIL_VALIDATION_TTL_HOURS,
+    EMAIL_VALIDATION_RETRY_MINUTES, EMAIL_VALIDATION_CACHE_FILE, DISPOSABLE_DOMAINS_FILE
+)
+
+DELIVERABLE = 'deliverable'
+INVALID_SYNTAX = 'invalid_syntax'
+DISPOSABLE = 'disposable'
+NO_MX = 'no_mx'
+UNKNOWN = 'unknown'  # DNS timed out or failed; retried after EMAIL_VALIDATION_RETRY_MINUTES
+
+LOCAL_PART_PATTERN = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+DOMAIN_PATTERN = re.compile(r'^(?=.{1,253}$)([a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$')
+
+# Common throwaway-inbox providers; extend with DISPOSABLE_DOMAINS_FILE
+DISPOSABLE_DOMAINS = {
+    '10minutemail.com', '20minutemail.com', 'dispostable.com', 'emailondeck.com', 'fakeinbox.com',
+    'getairmail.com', 'getnada.com', 'guerrillamail.com', 'guerrillamail.net', 'guerrillamailblock.com',
+    'maildrop.cc', 'mailinator.com', 'mailinator.net', 'mailnesia.com', 'mintemail.com', 'mohmal.com',
+    'mytemp.email', 'sharklasers.com', 'spam4.me', 'spamgourmet.com', 'temp-mail.org', 'tempail.com',
+    'tempmail.com', 'tempmailo.com', 'tempr.email', 'throwawaymail.com', 'trashmail.com', 'yopmail.com',
+    'yopmail.net'
+}
+
+
+def normalize_email(email: str) -> Optional[str]:
+    """Canonical form of a scraped address (lowercase, IDNA domain), or None if it isn't one"""
+    if not email:
+        return None
+    email = email.strip().strip('<>.,;:()"\'')
+    if email.lower().startswith('mailto:'):
+        email = email[len('mailto:'):]
+    local, sep, domain = email.rpartition('@')
+    if not sep or not local or len(local) > 64 or not LOCAL_PART_PATTERN.match(local):
+        return None
+    try:
+        domain = domain.rstrip('.').encode('idna').decode('ascii').lower()
+    except UnicodeError:
+        return None
+    if not DOMAIN_PATTERN.match(domain):
+        return None
+    email = f"{local.lower()}@{domain}"
+    return email if len(email) <= 254 else None
+
+
+def load_disposable_domains(path: Optional[str] = DISPOSABLE_DOMAINS_FILE) -> set:
+    """Built-in disposable domains plus one domain per line from path"""
+    domains = set(DISPOSABLE_DOMAINS)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            domains.update(line.strip().lower() for line in f if line.strip() and not line.startswith('#'))
+    return domains
+
+
+class DnsLookupError(Exception):
+    """Temporary DNS failure; the domain's deliverability is unknown"""
+
+
+class DnsResolver:
+    """MX lookups through dnspython"""
+
+    def __init__(self, timeout: float = EMAIL_VALIDATION_TIMEOUT):
+        import dns.resolver
+
+        self._dns = dns
+        self.resolver = dns.resolver.Resolver()
+        self.resolver.lifetime = timeout
+
+    def mx(self, domain: str) -> List[str]:
+        """Mail hosts by preference; the domain itself if it only has an A record (RFC 5321 5.1)"""
+        dns = self._dns
+        try:
+            answer = self.resolver.resolve(domain, 'MX')
+            records = sorted(answer, key=lambda record: record.preference)
+            # A single "." exchange is a null MX: the domain accepts no mail (RFC 7505)
+            return [str(record.exchange).rstrip('.') for record in records if str(record.exchange) != '.']
+        except dns.resolver.NXDOMAIN:
+            return []
+        except dns.resolver.NoAnswer:
+            pass
+        except (dns.exception.Timeout, dns.resolver.NoNameservers, dns.resolver.YXDOMAIN) as e:
+            raise DnsLookupError(str(e))
+
+        try:
+            self.resolver.resolve(domain, 'A')
+            return [domain]
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return []
+        except (dns.exception.Timeout, dns.resolver.NoNameservers) as e:
+            raise DnsLookupError(str(e))
+
+
+class StaticResolver:
+    """Resolver answering from a dict (domain -> mail hosts), for tests and offline runs"""
+
+    def __init__(self, records: Dict[str, List[str]], failing: tuple = ()):
+        self.records = records
+        self.failing = set(failing)
+        self.lookups = 0
+
+    def mx(self, domain: str) -> List[str]:
+        self.lookups += 1
+        if domain in self.failing:
+            raise DnsLookupError(f"lookup of {domain} timed out")
+        return list(self.records.get(domain, []))
+
+
+class EmailValidator:
+    """Syntax, disposable-domain and MX checks with a per-domain TTL cache"""
+
+    def __init__(self, resolver=None, workers: int = EMAIL_VALIDATION_WORKERS,
+                 ttl_hours: float = EMAIL_VALIDATION_TTL_HOURS,
+                 retry_minutes: float = EMAIL_VALIDATION_RETRY_MINUTES,
+                 cache_path: Optional[str] = EMAIL_VALIDATION_CACHE_FILE,
+                 disposable_domains: Optional[set] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._resolver = resolver
+        self.workers = workers
+        self.ttl = ttl_hours * 3600
+        self.retry_ttl = retry_minutes * 60
+        self.cache_path = cache_path
+        self.disposable_domains = disposable_domains if disposable_domains is not None else load_disposable_domains()
+        self._lock = threading.Lock()
+        self._cache = None
+
+    @property
+    def resolver(self):
+        if self._resolver is None:
+            self._resolver = DnsResolver()
+        return self._resolver
+
+    @property
+    def cache(self) -> Dict[str, Dict]:
+        """domain -> {'status', 'mx', 'expires'}, loaded from cache_path on first use"""
+        if self._cache is None:
+            self._cache = {}
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path) as f:
+                        self._cache = json.load(f)
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Ignoring unreadable domain cache {self.cache_path}: {str(e)}")
+        return self._cache
+
+    def save_cache(self):
+        if not self.cache_path or self._cache is None:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        with self._lock:
+            live = {domain: entry for domain, entry in self._cache.items() if entry['expires'] > now}
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(live, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def check_domain(self, domain: str) -> Dict:
+        """Deliverability of one domain, from the cache or a fresh MX lookup"""
+        now = time.time()
+        entry = self.cache.get(domain)
+        if entry and entry['expires'] > now:
+            return entry
+
+        if domain in self.disposable_domains:
+            entry = {'status': DISPOSABLE, 'mx': [], 'expires': now + self.ttl}
+        else:
+            try:
+                hosts = self.resolver.mx(domain)
+                entry = {'status': DELIVERABLE if hosts else NO_MX, 'mx': hosts, 'expires': now + self.ttl}
+            except DnsLookupError as e:
+                self.logger.debug(f"MX lookup for {domain} failed: {str(e)}")
+                entry = {'status': UNKNOWN, 'mx': [], 'expires': now + self.retry_ttl}
+        with self._lock:
+            self.cache[domain] = entry
+        return entry
+
+    def check_domains(self, domains) -> Dict[str, Dict]:
+        """Check distinct domains concurrently; cached ones don't hit DNS"""
+        now = time.time()
+        cache = self.cache
+        results = {}
+        pending = []
+        for domain in set(domains):
+            entry = cache.get(domain)
+            if entry and entry['expires'] > now:
+                results[domain] = entry
+            else:
+                pending.append(domain)
+
+        if len(pending) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as executor:
+                results.update(zip(pending, executor.map(self.check_domain, pending)))
+        else:
+            results.update((domain, self.check_domain(domain)) for domain in pending)
+        if pending:
+            self.logger.info(f"Looked up {len(pending)} email domains ({len(results) - len(pending)} cached)")
+            self.save_cache()
+        return results
+
+    def validate(self, email: str) -> str:
+        """Status of a single address"""
+        normalized = normalize_email(email)
+        if normalized is None:
+            return INVALID_SYNTAX
+        return self.check_domain(normalized.rsplit('@', 1)[1])['status']
+
+    def validate_leads(self, leads: List[Dict]) -> Dict[str, int]:
+        """Normalize lead['email'], set lead['email_status'] and return counts per status"""
+        counts = {}
+        domains = {}
+        for lead in leads:
+            if not lead.get('email'):
+                continue
+            normalized = normalize_email(lead['email'])
+            if normalized is None:
+                lead['email_status'] = INVALID_SYNTAX
+                counts[INVALID_SYNTAX] = counts.get(INVALID_SYNTAX, 0) + 1
+                continue
+            lead['email'] = normalized
+            domains.setdefault(normalized.rsplit('@', 1)[1], []).append(lead)
+
+        for domain, entry in self.check_domains(domains).items():
+            status = entry['status']
+            for lead in domains[domain]:
+                lead['email_status'] = status
+            counts[status] = counts.get(status, 0) + len(domains[domain])
+        return counts
@@ -0,0 +1,454 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import JOB_MAX_ATTEMPTS, JOB_SHARD_SIZES, JOB_HEARTBEAT_SECONDS, JOB_LEASE_SECONDS
+from storage.lead_export import lead_fingerprint, read_jsonl, write_jsonl
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+DEAD = 'dead'  # failed JOB_MAX_ATTEMPTS times
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def make_job(platform: str, targets: List[str], run: str) -> Dict:
+    """A job with an id derived from its run and content, so re-sharding the same targets within a run is idempotent"""
+    digest = hashlib.blake2b('\x1f'.join([run, platform] + list(targets)).encode('utf-8'), digest_size=8).hexdigest()
+    return {'id': f"{platform}-{digest}", 'run': run, 'platform': platform, 'targets': list(targets)}
+
+
+def shard_targets(targets: Dict[str, List[str]], run: str,
+                  shard_sizes: Dict[str, int] = JOB_SHARD_SIZES) -> List[Dict]:
+    """Split platform -> targets into jobs of shard_sizes[platform] targets each"""
+    jobs = []
+    for platform, items in targets.items():
+        size = max(1, shard_sizes.get(platform, 1))
+        for start in range(0, len(items), size):
+            jobs.append(make_job(platform, items[start:start + size], run))
+    return jobs
+
+
+class JobBroker(ABC):
+    """Queue of scraping jobs claimed by workers under renewable leases, plus the shared lead store.
+
+    A job whose lease runs out (the worker died or hung) goes back to pending,
+    counting as a failed attempt; after max_attempts it is marked dead.
+    """
+
+    def __init__(self, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def enqueue(self, jobs: List[Dict]) -> int:
+        """Add jobs that aren't already known; returns how many were added"""
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Dict]:
+        """Lease the next pending job to worker, or None if there is nothing to do"""
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if the worker no longer holds the job"""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker: str):
+        pass
+
+    @abstractmethod
+    def fail(self, job_id: str, worker: str, error: str):
+        """Release a job after an error so it is retried (or marked dead)"""
+
+    @abstractmethod
+    def add_results(self, job_id: str, worker: str, leads: List[Dict]) -> int:
+        """Append leads to the lead store"""
+
+    @abstractmethod
+    def iter_results(self, job_ids: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """Leads stored by job_ids (default: every job), deduplicated by fingerprint"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+
+    def finished(self) -> bool:
+        counts = self.counts()
+        return not counts.get(PENDING) and not counts.get(RUNNING)
+
+    def close(self):
+        pass
+
+
+class SQLiteBroker(JobBroker):
+    """Broker in one SQLite database; fine for several workers on one host or a local network share"""
+
+    def __init__(self, path: str, max_attempts: int = JOB_MAX_ATTEMPTS):
+        super().__init__(max_attempts)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    targets TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_until REAL,
+                    error TEXT,
+                    updated REAL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until);
+                CREATE TABLE IF NOT EXISTS results (
+                    job_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (job_id, fingerprint)
+                );
+            """)
+
+    def connection(self) -> sqlite3.Connection:
+        """One connection per thread (heartbeats run on their own thread)"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def enqueue(self, jobs: List[Dict]) -> int:
+        db = self.connection()
+        now = time.time()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            before = db.total_changes
+            db.executemany(
+                'INSERT OR IGNORE INTO jobs (id, platform, targets, updated) VALUES (?, ?, ?, ?)',
+                [(job['id'], job['platform'], json.dumps(job['targets']), now) for job in jobs]
+            )
+            return db.total_changes - before
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float):
+        db.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE 'pending' END, "
+            "attempts = attempts + 1, worker = NULL, error = 'lease expired', updated = ? "
+            "WHERE status = 'running' AND lease_until < ?",
+            (self.max_attempts, now, now)
+        )
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Dict]:
+        db = self.connection()
+        now = time.time()
+        with db:
+            # IMMEDIATE takes the write lock up front so two workers can't claim the same row
+            db.execute('BEGIN IMMEDIATE')
+            self._expire_leases(db, now)
+            row = db.execute(
+                "SELECT id, platform, targets, attempts FROM jobs WHERE status = 'pending' "
+                "ORDER BY attempts, updated LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, updated = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, row[0])
+            )
+        return {'id': row[0], 'platform': row[1], 'targets': json.loads(row[2]), 'attempts': row[3]}
+
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        db = self.connection()
+        now = time.time()
+        with db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker: str):
+        db = self.connection()
+        with db:
+            db.execute(
+                "UPDATE jobs SET status = 'done', lease_until = NULL, updated = ? WHERE id = ? AND worker = ?",
+                (time.time(), job_id, worker)
+            )
+
+    def fail(self, job_id: str, worker: str, error: str):
+        db = self.connection()
+        with db:
+            db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE 'pending' END, "
+                "attempts = attempts + 1, worker = NULL, lease_until = NULL, error = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (self.max_attempts, error, time.time(), job_id, worker)
+            )
+
+    def add_results(self, job_id: str, worker: str, leads: List[Dict]) -> int:
+        db = self.connection()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            before = db.total_changes
+            db.executemany(
+                'INSERT OR IGNORE INTO results (job_id, fingerprint, data) VALUES (?, ?, ?)',
+                [(job_id, lead_fingerprint(lead), json.dumps(lead, default=str)) for lead in leads]
+            )
+            return db.total_changes - before
+
+    def iter_results(self, job_ids: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        db = self.connection()
+        if job_ids is None:
+            rows = db.execute('SELECT fingerprint, data FROM results ORDER BY rowid')
+        else:
+            rows = (row for job_id in job_ids for row in db.execute(
+                'SELECT fingerprint, data FROM results WHERE job_id = ? ORDER BY rowid', (job_id,)
+            ))
+        seen = set()
+        for fingerprint, data in rows:
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                yield json.loads(data)
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'))
+
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+class FileBroker(JobBroker):
+    """Broker on a shared directory (e.g. NFS) using atomic renames between status folders.
+
+    <root>/pending/<id>.json   claimable jobs
+    <root>/running/<id>.json   leased jobs, with <id>.lease holding the worker and expiry
+    <root>/done, <root>/dead   finished jobs
+    <root>/results/            one JSONL file per result batch
+    """
+
+    def __init__(self, root: str, max_attempts: int = JOB_MAX_ATTEMPTS):
+        super().__init__(max_attempts)
+        self.root = root
+        for status in (PENDING, RUNNING, DONE, DEAD, 'results'):
+            os.makedirs(os.path.join(root, status), exist_ok=True)
+
+    def _path(self, status: str, job_id: str, suffix: str = '.json') -> str:
+        return os.path.join(self.root, status, f"{job_id}{suffix}")
+
+    def _write(self, path: str, data: Dict):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _move(self, job_id: str, source: str, target: str) -> bool:
+        """Rename is atomic, so exactly one process wins a race for a job"""
+        try:
+            os.rename(self._path(source, job_id), self._path(target, job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _job_ids(self, status: str) -> List[str]:
+        return sorted(os.path.basename(path)[:-5] for path in glob.glob(os.path.join(self.root, status, '*.json')))
+
+    def enqueue(self, jobs: List[Dict]) -> int:
+        added = 0
+        for job in jobs:
+            if any(os.path.exists(self._path(status, job['id'])) for status in (PENDING, RUNNING, DONE, DEAD)):
+                continue
+            self._write(self._path(PENDING, job['id']), dict(job, attempts=0))
+            added += 1
+        return added
+
+    def _lease(self, job_id: str) -> Optional[Dict]:
+        return self._read(self._path(RUNNING, job_id, '.lease'))
+
+    def _expired_lease(self, job_id: str, now: float) -> Optional[Dict]:
+        """A running job's lease if it has run out ({} for a claim that never wrote one), else None"""
+        lease = self._lease(job_id)
+        if lease is None:
+            # Claimed but the lease was never written (worker died in between)
+            try:
+                stale = os.path.getmtime(self._path(RUNNING, job_id)) < now - 3600
+            except FileNotFoundError:
+                return None
+            return {} if stale else None
+        return lease if lease['until'] < now else None
+
+    def _release(self, job_id: str, error: str, lease: Dict):
+        """Move a running job back to pending, or to dead once it is out of attempts.
+
+        lease is the lease the caller decided on; if it has changed since (the job
+        was renewed, or requeued and claimed by another worker) nothing is moved.
+        """
+        job = self._read(self._path(RUNNING, job_id))
+        if job is None:
+            return
+        current = self._lease(job_id) if lease else self._expired_lease(job_id, time.time())
+        if current != lease:
+            self.logger.info(f"Lease on {job_id} changed, not releasing it")
+            return
+        job['attempts'] = job.get('attempts', 0) + 1
+        job['error'] = error
+        target = DEAD if job['attempts'] >= self.max_attempts else PENDING
+        self._write(self._path(RUNNING, job_id), job)
+        if self._move(job_id, RUNNING, target):
+            try:
+                os.remove(self._path(RUNNING, job_id, '.lease'))
+            except FileNotFoundError:
+                pass
+
+    def _expire_leases(self, now: float):
+        for job_id in self._job_ids(RUNNING):
+            lease = self._expired_lease(job_id, now)
+            if lease is None:
+                continue
+            self.logger.warning(f"Lease on {job_id} expired, requeueing")
+            self._release(job_id, 'lease expired', lease)
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Dict]:
+        now = time.time()
+        self._expire_leases(now)
+        candidates = []
+        for job_id in self._job_ids(PENDING):
+            job = self._read(self._path(PENDING, job_id))
+            if job is not None:
+                candidates.append((job.get('attempts', 0), job_id))
+        for _, job_id in sorted(candidates):
+            # rename() keeps the mtime, and _expire_leases takes a lease-less running
+            # job older than an hour for an abandoned claim; stamp the claim time first
+            try:
+                os.utime(self._path(PENDING, job_id))
+            except FileNotFoundError:
+                continue
+            if self._move(job_id, PENDING, RUNNING):
+                self._write(self._path(RUNNING, job_id, '.lease'), {'worker': worker, 'until': now + lease_seconds})
+                return self._read(self._path(RUNNING, job_id))
+        return None
+
+    def _held_lease(self, job_id: str, worker: str) -> Optional[Dict]:
+        """worker's lease on a job, unless it has run out (an expirer may be requeueing the job)"""
+        lease = self._lease(job_id)
+        if lease is None or lease['worker'] != worker or lease['until'] < time.time():
+            return None
+        return lease
+
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        if self._held_lease(job_id, worker) is None:
+            return False
+        lease = {'worker': worker, 'until': time.time() + lease_seconds}
+        self._write(self._path(RUNNING, job_id, '.lease'), lease)
+        # An expirer that read the old lease just before the write may have moved the job anyway
+        return os.path.exists(self._path(RUNNING, job_id)) and self._lease(job_id) == lease
+
+    def complete(self, job_id: str, worker: str):
+        if self._held_lease(job_id, worker) is not None and self._move(job_id, RUNNING, DONE):
+            os.remove(self._path(RUNNING, job_id, '.lease'))
+
+    def fail(self, job_id: str, worker: str, error: str):
+        lease = self._held_lease(job_id, worker)
+        if lease is not None:
+            self._release(job_id, error, lease)
+
+    def add_results(self, job_id: str, worker: str, leads: List[Dict]) -> int:
+        if not leads:
+            return 0
+        name = f"{job_id}.{worker}.{time.time_ns()}.jsonl"
+        tmp_path = os.path.join(self.root, 'results', f".{name}.tmp")
+        count = write_jsonl(leads, tmp_path)
+        os.replace(tmp_path, os.path.join(self.root, 'results', name))
+        return count
+
+    def iter_results(self, job_ids: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        if job_ids is None:
+            paths = sorted(glob.glob(os.path.join(self.root, 'results', '*.jsonl')))
+        else:
+            paths = [path for job_id in job_ids
+                     for path in sorted(glob.glob(os.path.join(self.root, 'results', f"{job_id}.*.jsonl")))]
+        seen = set()
+        for path in paths:
+            for lead in read_jsonl(path):
+                fingerprint = lead_fingerprint(lead)
+                if fingerprint not in seen:
+                    seen.add(fingerprint)
+                    yield lead
+
+    def counts(self) -> Dict[str, int]:
+        counts = {}
+        for status in (PENDING, RUNNING, DONE, DEAD):
+            count = len(self._job_ids(status))
+            if count:
+                counts[status] = count
+        return counts
+
+
+class Heartbeat:
+    """Renews a job lease from a background thread while the job runs.
+
+    lost is set once the broker says the lease was taken away (e.g. after a long
+    GC pause or network partition); the worker should then stop and not report.
+    """
+
+    def __init__(self, broker: JobBroker, job_id: str, worker: str,
+                 lease_seconds: float = JOB_LEASE_SECONDS, interval: float = JOB_HEARTBEAT_SECONDS):
+        self.broker = broker
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.broker.heartbeat(self.job_id, self.worker, self.lease_seconds):
+                    self.lost.set()
+                    return
+            except Exception as e:
+                # Keep trying; the lease only lapses if this persists past lease_seconds
+                self.broker.logger.warning(f"Heartbeat for {self.job_id} failed: {str(e)}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def open_broker(url: str) -> JobBroker:
+    """Broker for 'sqlite:///path/to/jobs.db' or 'file:///shared/dir'"""
+    if url.startswith('sqlite:///'):
+        return SQLiteBroker(url[len('sqlite:///'):])
+    if url.startswith('file://'):
+        return FileBroker(url[len('file://'):])
+    raise ValueError(f"Unsupported broker URL: {url}")
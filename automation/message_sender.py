@@ -9,12 +9,14 @@ from config import (
     MESSAGE_DELAY_SECONDS,
     MAX_DAILY_MESSAGES
 )
+from .email_validator import EmailValidator, DELIVERABLE
 import logging
 
 class MessageSender:
-    def __init__(self):
+    def __init__(self, validator: EmailValidator = None):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.messages_sent_today = 0
+        self.validator = validator or EmailValidator()
     
     def send_email(self, lead: Dict, smtp_config: Dict) -> bool:
         """Send email to a lead"""
@@ -34,8 +36,10 @@ class MessageSender:
             
             # Connect to SMTP server
             with smtplib.SMTP(smtp_config['server'], smtp_config['port']) as server:
-                server.starttls()
-                server.login(smtp_config['email'], smtp_config['password'])
+                if smtp_config.get('use_tls', True):
+                    server.starttls()
+                if smtp_config.get('password'):
+                    server.login(smtp_config['email'], smtp_config['password'])
                 server.send_message(msg)
             
             return True
@@ -70,18 +74,33 @@ class MessageSender:
         results = {
             'success': 0,
             'failed': 0,
-            'skipped': 0
+            'skipped': 0,
+            'undeliverable': 0
         }
         
+        # Drop addresses that would bounce before they cost an SMTP round trip
+        # and a slot of the daily quota
+        if smtp_config:
+            counts = self.validator.validate_leads(leads)
+            self.logger.info(f"Email validation: {counts}")
+        
         for lead in leads:
             if self.messages_sent_today >= MAX_DAILY_MESSAGES:
                 self.logger.warning("Daily message limit reached")
                 break
             
+            # Undeliverable addresses never reach SMTP; skip the lead (and the
+            # delay) unless it can still be messaged on Facebook
+            deliverable = lead.get('email_status') == DELIVERABLE
+            if lead.get('email') and smtp_config and not deliverable:
+                results['undeliverable'] += 1
+                if not (lead.get('profile_url') and fb_session):
+                    continue
+            
             success = False
             
             # Try email if available
-            if lead.get('email') and smtp_config:
+            if lead.get('email') and smtp_config and deliverable:
                 success = self.send_email(lead, smtp_config)
                 
             # Try Facebook DM if email failed or wasn't available
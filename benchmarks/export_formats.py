@@ -0,0 +1,138 @@
+"""Compare file size and write/read time of the lead export formats.
+
+Usage: python -m benchmarks.export_formats [--leads 100000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from storage.lead_export import flatten_lead, LEAD_FIELDS, read_jsonl, read_parquet, export_file
+
+
+def make_leads(count: int, seed: int = 0):
+    """Build synthetic leads shaped like the scrapers' output"""
+    rng = random.Random(seed)
+    words = ['roofing', 'lawyer', 'plumbing', 'call', 'today', 'free', 'quote',
+             'best', 'service', 'in', 'houston', 'contact', 'me', 'for', 'info']
+    platforms = [('Facebook', 'FacebookScraper', 'Group Post'),
+                 ('YouTube', 'YouTubeScraper', 'Video Comment'),
+                 ('Google Maps', 'GoogleMapsScraper', 'Place')]
+    leads = []
+    for i in range(count):
+        platform, source, kind = platforms[i % 3]
+        leads.append({
+            'name': f"Lead {i}",
+            'email': f"lead{i}@example.com" if rng.random() < 0.3 else None,
+            'phone': f"+1 713-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+            'website': f"https://lead{i}.example.com/",
+            'content': ' '.join(rng.choice(words) for _ in range(rng.randint(5, 60))),
+            'source_url': f"https://www.facebook.com/groups/{i % 50}",
+            'platform': platform,
+            'source': source,
+            'type': kind,
+        })
+    return leads
+
+
+def _write_json(leads, path):
+    with open(path, 'w') as f:
+        json.dump(leads, f, indent=2)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_csv(leads, path):
+    import csv
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=LEAD_FIELDS)
+        writer.writeheader()
+        for lead in leads:
+            writer.writerow(flatten_lead(lead))
+
+
+def _read_csv(path):
+    import csv
+
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def _write_xlsx(leads, path):
+    import tablib
+
+    dataset = tablib.Dataset(headers=LEAD_FIELDS)
+    for lead in leads:
+        row = flatten_lead(lead)
+        dataset.append([row[field] if row[field] is not None else '' for field in LEAD_FIELDS])
+    with open(path, 'wb') as f:
+        f.write(dataset.export('xlsx'))
+
+
+def _read_xlsx(path):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    rows = list(wb.active.iter_rows(values_only=True))
+    wb.close()
+    return rows
+
+
+FORMATS = {
+    'xlsx': (_write_xlsx, _read_xlsx),
+    'csv': (_write_csv, _read_csv),
+    'json': (_write_json, _read_json),
+    'jsonl.gz': (lambda leads, path: export_file(leads, path, 'jsonl.gz'),
+                 lambda path: list(read_jsonl(path))),
+    'jsonl.zst': (lambda leads, path: export_file(leads, path, 'jsonl.zst'),
+                  lambda path: list(read_jsonl(path))),
+    'parquet': (lambda leads, path: export_file(leads, path, 'parquet'), read_parquet),
+}
+
+
+def run(count: int):
+    """Time each format and return a list of result dicts"""
+    leads = make_leads(count)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (writer, reader) in FORMATS.items():
+            path = os.path.join(tmp, f"leads.{name}")
+            try:
+                start = time.perf_counter()
+                writer(leads, path)
+                write_s = time.perf_counter() - start
+                start = time.perf_counter()
+                reader(path)
+                read_s = time.perf_counter() - start
+            except ImportError as e:
+                print(f"{name:<10} skipped ({e.name} not installed)")
+                continue
+            results.append({
+                'format': name,
+                'size_mb': os.path.getsize(path) / 1e6,
+                'write_s': write_s,
+                'read_s': read_s,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--leads', type=int, default=100000)
+    args = parser.parse_args()
+
+    results = run(args.leads)
+    print(f"\n{args.leads} leads")
+    print(f"{'format':<10} {'size MB':>9} {'write s':>9} {'read s':>9}")
+    for r in results:
+        print(f"{r['format']:<10} {r['size_mb']:>9.2f} {r['write_s']:>9.3f} {r['read_s']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
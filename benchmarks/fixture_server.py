@@ -0,0 +1,58 @@
+"""Local HTTP server that serves the recorded page fixtures."""
+import os
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# URL prefix -> fixture file, mirroring the live site paths the scrapers load
+ROUTES = {
+    '/maps/search/': 'maps/search.html',
+    '/search': 'maps/search_tbm_map.txt',
+    '/groups/': 'facebook/group.html',
+    '/robots.txt': 'site/robots.txt',
+}
+
+# /site/<n>/<page> serves site/<page>, so every n looks like a separate lead website
+SITE_PREFIX = '/site/'
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    def translate_path(self, path):
+        path = path.split('?', 1)[0]
+        if path.startswith(SITE_PREFIX):
+            page = path.rsplit('/', 1)[-1] or 'index.html'
+            return os.path.join(FIXTURES_DIR, 'site', page)
+        for prefix, fixture in ROUTES.items():
+            if path.startswith(prefix):
+                return os.path.join(FIXTURES_DIR, fixture)
+        return super().translate_path(path)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Serves benchmarks/fixtures on a free localhost port while in a with block"""
+
+    def __init__(self, directory: str = FIXTURES_DIR):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), partial(FixtureHandler, directory=directory))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,68 @@
+"""Measure how the extraction process pool scales with worker count.
+
+Usage: python -m benchmarks.postprocess_scaling [--payloads 200000] [--max-workers 8]
+"""
+import argparse
+import os
+import random
+import time
+
+from scrapers.postprocess import ExtractionPool
+
+
+def make_payloads(count: int, seed: int = 0):
+    """Synthetic Facebook posts of realistic length with some contacts in them"""
+    rng = random.Random(seed)
+    words = ('looking for a roofer in houston call me anytime we offer free quotes '
+             'great service best prices message for details').split()
+    payloads = []
+    for i in range(count):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(40, 400)))
+        if i % 4 == 0:
+            text += f" email owner{i}@example.com"
+        if i % 3 == 0:
+            text += f" or call (713) 555-{i % 10000:04d} https://shop{i}.example.com/"
+        payloads.append({
+            'text': text,
+            'lead': {'name': f"Author {i}", 'content': text, 'platform': 'Facebook', 'type': 'Group Post'}
+        })
+    return payloads
+
+
+def run(payloads, workers: int, chunk_size: int) -> float:
+    pool = ExtractionPool(workers=workers, chunk_size=chunk_size)
+    try:
+        if workers > 0:
+            # Start the workers outside the timed region
+            pool.executor.submit(int).result()
+        start = time.perf_counter()
+        leads = pool.map('FacebookScraper', payloads)
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+    assert len(leads) == len(payloads)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payloads', type=int, default=200000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.payloads)
+    worker_counts = [0] + [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= args.max_workers]
+
+    print(f"{args.payloads} payloads, chunk size {args.chunk_size}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'payloads/s':>12} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        elapsed = run(payloads, workers, args.chunk_size)
+        baseline = baseline or elapsed
+        label = 'inline' if workers == 0 else str(workers)
+        print(f"{label:>8} {elapsed:>9.2f} {args.payloads / elapsed:>12.0f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
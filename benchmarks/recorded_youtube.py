@@ -0,0 +1,64 @@
+"""Stand-in for the googleapiclient YouTube resource that replays recorded responses."""
+import json
+import os
+
+from .fixture_server import FIXTURES_DIR
+
+YOUTUBE_FIXTURES = os.path.join(FIXTURES_DIR, 'youtube')
+
+
+class _Request:
+    def __init__(self, method_id: str, response: dict):
+        self.methodId = method_id
+        self._response = response
+
+    def execute(self):
+        return self._response
+
+
+class _Resource:
+    def __init__(self, client: 'RecordedYouTube', name: str):
+        self.client = client
+        self.name = name
+
+    def list(self, **params):
+        return _Request(f"youtube.{self.name}.list", self.client.response(self.name, params))
+
+
+class RecordedYouTube:
+    """Answers videos().list / commentThreads().list / comments().list from benchmarks/fixtures/youtube"""
+
+    def __init__(self, directory: str = YOUTUBE_FIXTURES):
+        self.directory = directory
+        self.calls = 0
+        self._cache = {}
+
+    def _load(self, name: str) -> dict:
+        if name not in self._cache:
+            with open(os.path.join(self.directory, name)) as f:
+                self._cache[name] = json.load(f)
+        return self._cache[name]
+
+    def response(self, resource: str, params: dict) -> dict:
+        self.calls += 1
+        if resource == 'videos':
+            return self._load('videos_list.json')
+        if resource == 'comments':
+            replies = self._load('comment_replies.json').get(params['parentId'], [])
+            start = int(params.get('pageToken') or 0)
+            end = start + params.get('maxResults', 20)
+            response = {'kind': 'youtube#commentListResponse', 'items': replies[start:end]}
+            if end < len(replies):
+                response['nextPageToken'] = str(end)
+            return response
+        page = params.get('pageToken') or 'page0'
+        return self._load(f"comment_threads_{page[len('page'):]}.json")
+
+    def videos(self):
+        return _Resource(self, 'videos')
+
+    def commentThreads(self):
+        return _Resource(self, 'commentThreads')
+
+    def comments(self):
+        return _Resource(self, 'comments')
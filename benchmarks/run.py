@@ -0,0 +1,434 @@
+"""Offline benchmark suite for the scrapers, extraction, exporters and MessageSender.
+
+Everything runs against local fixtures: recorded pages served over HTTP for the
+Selenium scrapers (headless Chrome), recorded API responses for YouTube and an
+SMTP sink for MessageSender. The website enrichment crawler runs against
+recorded business sites served the same way. Scraper cases first check that the
+leads they produce have the expected schema and values (EXPECTED_LEADS).
+
+Usage:
+    python -m benchmarks.run                      # run all cases, compare to baseline
+    python -m benchmarks.run --cases youtube,extraction
+    python -m benchmarks.run --save-baseline      # record current numbers as the baseline
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Cases that launch Chrome are slow (fixed waits in the scrapers), so they
+# run fewer iterations by default
+BROWSER_CASES = {'maps', 'facebook'}
+
+# Lead schema of GoogleMapsScraper; the HTTP engine and network capture must match it
+MAPS_LEAD_FIELDS = ['name', 'website', 'phone', 'email', 'address', 'rating', 'reviews', 'source', 'query',
+                    'place_id', 'latitude', 'longitude']
+
+# First lead each fixture must produce. The recorded tbm=map response wraps this
+# place's website in a /url?q= redirect; the rendered panel shows it plain.
+EXPECTED_LEADS = {
+    'maps': {
+        'name': 'MAVERICK RAY LAW', 'website': 'https://www.maverickraylaw.com/', 'phone': '+1 281-947-2007',
+        'address': '100 Main St, Houston, TX 77000', 'source': 'Google Maps'
+    },
+    'maps_http': {
+        'name': 'MAVERICK RAY LAW', 'website': 'https://www.maverickraylaw.com/', 'phone': '281-947-2007',
+        'address': '100 Main St, Houston, TX 77000', 'rating': 3.5, 'reviews': 10, 'source': 'Google Maps',
+        'place_id': 'ChIJ000fixtureplace0000', 'latitude': 29.76, 'longitude': -95.36
+    },
+    'facebook': {
+        'name': 'Member 0', 'email': 'member0@example.com', 'phone': '(713) 555-1000',
+        'website': 'https://roofing0.example.com', 'phone_e164': '+17135551000', 'source': 'FacebookScraper'
+    }
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process plus its (waited-for) children, e.g. chromedriver"""
+    scale = 1024 if sys.platform != 'darwin' else 1024 * 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / scale
+
+
+def measure(name: str, call: Callable[[], int], iterations: int) -> Dict:
+    """Run call() iterations times; call returns the number of items it produced"""
+    latencies = []
+    items = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        items += call()
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    return {
+        'name': name,
+        'iterations': iterations,
+        'items': items,
+        'seconds': total,
+        'throughput': items / total if total else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def check_lead(case: str, leads: List[Dict], expected: Dict, fields: List[str] = ()):
+    """Fail the case unless the first lead has every field in fields and the expected values"""
+    if not leads:
+        raise AssertionError(f"{case}: no leads")
+    missing = [field for field in fields if field not in leads[0]]
+    if missing:
+        raise AssertionError(f"{case}: lead is missing {', '.join(missing)}")
+    wrong = {field: leads[0].get(field) for field, value in expected.items() if leads[0].get(field) != value}
+    if wrong:
+        raise AssertionError(f"{case}: unexpected lead values {wrong}")
+
+
+def _unthrottled(scraper):
+    """Benchmarks measure our code, not the politeness delays"""
+    from scrapers.rate_limiter import RateLimiterRegistry
+
+    scraper.rate_limiters = RateLimiterRegistry({'default': {'rate': 1e9, 'burst': 1e9}})
+    return scraper
+
+
+def case_extraction(iterations: int) -> Dict:
+    from scrapers.postprocess import process_chunk
+    from benchmarks.postprocess_scaling import make_payloads
+
+    payloads = make_payloads(200)
+    return measure('extraction', lambda: len(process_chunk('FacebookScraper', payloads)), iterations)
+
+
+def case_export(iterations: int) -> List[Dict]:
+    from storage.lead_export import EXPORT_FORMATS, export_file
+    from benchmarks.export_formats import make_leads
+
+    leads = make_leads(10000)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for format in EXPORT_FORMATS:
+            path = os.path.join(tmp, f"leads.{format}")
+            try:
+                results.append(measure(f"export_{format}", lambda: export_file(leads, path, format), iterations))
+            except ImportError as e:
+                print(f"export_{format}: skipped ({e.name} not installed)")
+    return results
+
+
+def case_delta_export(iterations: int) -> Dict:
+    from storage.delta_export import DeltaIndex
+    from storage.lead_export import export_file
+    from benchmarks.export_formats import make_leads
+
+    leads = make_leads(10000)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DeltaIndex(os.path.join(tmp, 'index.db'), os.path.join(tmp, 'manifests'))
+        index.commit(index.plan('leads.jsonl', leads), None)
+        # Every run after the first sees 1% of the leads changed
+        runs = iter(range(1, 10 ** 9))
+
+        def run():
+            for lead in leads[next(runs) % 100::100]:
+                lead['email'] = f"changed{id(lead)}@example.com"
+            plan = index.plan('leads.jsonl', leads)
+            path = os.path.join(tmp, 'delta.jsonl')
+            export_file(plan.records, path, 'jsonl')
+            index.commit(plan, path, 'jsonl')
+            return len(leads)
+
+        try:
+            return measure('delta_export', run, iterations)
+        finally:
+            index.close()
+
+
+def case_lead_search(iterations: int) -> Dict:
+    from storage.lead_index import LeadIndex
+    from benchmarks.export_formats import make_leads
+
+    leads = make_leads(100000)
+    for lead in leads[::500]:
+        lead['content'] += ' shingles replacement'
+    queries = [
+        dict(text='shingles'),
+        dict(text='shingle*', platform='facebook', has_phone=True),
+        dict(text='roofing houston', has_email=True, order='recent'),
+        dict(platform='google maps', has_email=True),
+        dict(phone=leads[123]['phone']),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LeadIndex(os.path.join(tmp, 'leads.db'))
+        index.bulk_load(leads)
+        runs = iter(range(10 ** 9))
+
+        def run():
+            return len(index.search(**queries[next(runs) % len(queries)]))
+
+        try:
+            return measure('lead_search', run, iterations * 20)
+        finally:
+            index.close()
+
+
+def case_youtube(iterations: int) -> Dict:
+    from scrapers.youtube_scraper import YouTubeScraper
+    from benchmarks.recorded_youtube import RecordedYouTube
+
+    scraper = _unthrottled(YouTubeScraper(youtube=RecordedYouTube()))
+    return measure('youtube', lambda: len(scraper.get_video_comments('dQw4w9WgXcQ', 5000)), iterations)
+
+
+def case_maps(iterations: int) -> Dict:
+    from benchmarks.fixture_server import FixtureServer
+    from scrapers.google_maps_scraper import GoogleMapsScraper
+
+    with FixtureServer() as server:
+        scraper = _unthrottled(GoogleMapsScraper(headless=True))
+        scraper.base_url = server.url('/maps/search/')
+        try:
+            check_lead('maps', scraper.search_area('lawyers in Houston, TX'), EXPECTED_LEADS['maps'], MAPS_LEAD_FIELDS)
+            return measure('maps', lambda: len(scraper.search_area('lawyers in Houston, TX')), iterations)
+        finally:
+            scraper.cleanup()
+
+
+def case_maps_http(iterations: int) -> Dict:
+    from benchmarks.fixture_server import FixtureServer
+    from scrapers.maps_http_engine import MapsHttpEngine
+
+    with FixtureServer() as server:
+        engine = _unthrottled(MapsHttpEngine(search_url=server.url('/search')))
+        try:
+            check_lead('maps_http', engine.search('lawyers in Houston, TX'), EXPECTED_LEADS['maps_http'],
+                       MAPS_LEAD_FIELDS)
+            return measure('maps_http', lambda: len(engine.search('lawyers in Houston, TX')), iterations)
+        finally:
+            engine.close()
+
+
+def case_maps_grid(iterations: int) -> Dict:
+    from benchmarks.fixture_server import FixtureServer
+    from scrapers.maps_http_engine import MapsHttpEngine
+    from scrapers.maps_grid import GridPlanner
+
+    # Downtown Houston; the recorded response is saturated, so the tile holding
+    # its places is subdivided down to the max zoom
+    bbox = (29.70, -95.45, 29.80, -95.30)
+    with FixtureServer() as server:
+        engine = _unthrottled(MapsHttpEngine(search_url=server.url('/search')))
+
+        def run():
+            planner = GridPlanner('lawyers', bbox)
+            planner.run([lambda keyword, tile: engine.search_results(keyword, tile.viewport())] * 4)
+            return planner.stats['tiles']
+
+        try:
+            return measure('maps_grid', run, iterations)
+        finally:
+            engine.close()
+
+
+def case_facebook(iterations: int) -> Dict:
+    from benchmarks.fixture_server import FixtureServer
+    from scrapers.facebook_scraper import FacebookScraper
+
+    with FixtureServer() as server:
+        scraper = _unthrottled(FacebookScraper())
+        url = server.url('/groups/houston-home-improvement')
+        try:
+            check_lead('facebook', scraper.scrape_group(url), EXPECTED_LEADS['facebook'])
+            return measure('facebook', lambda: len(scraper.scrape_group(url)), iterations)
+        finally:
+            scraper.cleanup()
+
+
+def case_enrichment(iterations: int) -> Dict:
+    from benchmarks.fixture_server import FixtureServer
+    from scrapers.website_enricher import WebsiteEnricher
+
+    with FixtureServer() as server:
+        def run():
+            # Every /site/<n>/ is a distinct website on one local host, so lift the per-host cap
+            enricher = WebsiteEnricher(per_host=100, cache_path=None)
+            leads = [{'name': f"Lead {i}", 'website': server.url(f"/site/{i}/")} for i in range(200)]
+            return sum(1 for lead in enricher.scrape(leads) if lead.get('email'))
+
+        return measure('enrichment', run, iterations)
+
+
+def case_email_validation(iterations: int) -> Dict:
+    from automation.email_validator import EmailValidator, StaticResolver
+
+    # 100k addresses over 2,000 domains; every domain resolves, a few are disposable
+    records = {f"firm{i}.com": [f"mx.firm{i}.com"] for i in range(2000)}
+    emails = [f"Contact{i}@Firm{i % 2000}.com" for i in range(99000)]
+    emails += [f"x{i}@mailinator.com" for i in range(500)] + [f"broken{i}@" for i in range(500)]
+
+    def run():
+        validator = EmailValidator(resolver=StaticResolver(records), cache_path=None)
+        leads = [{'name': 'Lead', 'email': email} for email in emails]
+        return validator.validate_leads(leads).get('deliverable', 0)
+
+    return measure('email_validation', run, iterations)
+
+
+def case_message_sender(iterations: int) -> Dict:
+    from automation.message_sender import MessageSender
+    from benchmarks.smtp_sink import SMTPSink
+
+    sender = MessageSender()
+    lead = {'name': 'Bench Lead', 'email': 'lead@example.com', 'business_type': 'roofing'}
+    with SMTPSink() as sink:
+        smtp_config = {'server': '127.0.0.1', 'port': sink.port, 'email': 'bench@example.com', 'use_tls': False}
+        return measure('message_sender', lambda: int(sender.send_email(lead, smtp_config)), iterations)
+
+
+
+def case_replay(iterations: int) -> Dict:
+    from benchmarks.fixture_server import FIXTURES_DIR
+    from benchmarks.recorded_youtube import RecordedYouTube
+    from scrapers.cassette import Cassette
+    from scrapers.facebook_scraper import FacebookScraper
+    from scrapers.youtube_scraper import YouTubeScraper
+
+    group_url = 'https://www.facebook.com/groups/houston-home-improvement'
+    with open(os.path.join(FIXTURES_DIR, 'facebook', 'group.html')) as f:
+        html = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Record once, then re-run extraction from the archive without a browser or API
+        recorder = Cassette(tmp, 'record')
+        live = _unthrottled(YouTubeScraper(youtube=RecordedYouTube(), cassette=recorder)).get_video_comments(
+            'dQw4w9WgXcQ', 5000
+        )
+        recorder.record('facebook', group_url, {'url': group_url, 'html': html, 'final_html': html, 'responses': []})
+
+        cassette = Cassette(tmp, 'replay')
+        if YouTubeScraper(cassette=cassette).get_video_comments('dQw4w9WgXcQ', 5000) != live:
+            raise AssertionError("replay: YouTube leads differ from the recorded run")
+        check_lead('replay', FacebookScraper(cassette=cassette).scrape_group(group_url), EXPECTED_LEADS['facebook'])
+
+        def run():
+            cassette = Cassette(tmp, 'replay')
+            leads = YouTubeScraper(cassette=cassette).get_video_comments('dQw4w9WgXcQ', 5000)
+            leads += FacebookScraper(cassette=cassette).scrape_group(group_url)
+            return len(leads)
+
+        return measure('replay', run, iterations)
+
+
+CASES = {
+    'extraction': case_extraction,
+    'export': case_export,
+    'delta_export': case_delta_export,
+    'lead_search': case_lead_search,
+    'youtube': case_youtube,
+    'message_sender': case_message_sender,
+    'email_validation': case_email_validation,
+    'enrichment': case_enrichment,
+    'maps': case_maps,
+    'maps_http': case_maps_http,
+    'maps_grid': case_maps_grid,
+    'facebook': case_facebook,
+    'replay': case_replay,
+}
+
+
+def compare(results: List[Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Describe every case whose throughput dropped or p95 grew by more than threshold"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result['name'])
+        if not base:
+            continue
+        if base['throughput'] and result['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(
+                f"{result['name']}: throughput {result['throughput']:.1f}/s vs baseline {base['throughput']:.1f}/s"
+            )
+        if base['p95_ms'] and result['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f"{result['name']}: p95 {result['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms"
+            )
+    return regressions
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', default=','.join(CASES), help='comma-separated subset of: ' + ', '.join(CASES))
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--browser-iterations', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression (default 0.2)')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = []
+    for name in args.cases.split(','):
+        iterations = args.browser_iterations if name in BROWSER_CASES else args.iterations
+        try:
+            outcome = CASES[name](iterations)
+        except ImportError as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        except AssertionError as e:
+            print(f"{name}: wrong output ({e})")
+            failed.append(name)
+            continue
+        except Exception as e:
+            print(f"{name}: failed ({e.__class__.__name__}: {e})")
+            continue
+        results.extend(outcome if isinstance(outcome, list) else [outcome])
+
+    print(f"\n{'case':<18} {'items/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'peak RSS MB':>12}")
+    for r in results:
+        print(f"{r['name']:<18} {r['throughput']:>10.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} {r['peak_rss_mb']:>12.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if failed:
+        print(f"\nWrong output from: {', '.join(failed)}")
+        sys.exit(1)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update({r['name']: r for r in results})
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Single entry point for scraping, exporting, sending and benchmarks.
+
+    python cli.py scrape --platforms youtube --format jsonl.zst
+    python cli.py export data/leads_youtube_*.jsonl.zst --format xlsx
+    python cli.py send leads.jsonl --smtp-server smtp.gmail.com --smtp-email me@example.com
+    python cli.py bench --cases youtube,export
+    python cli.py --import-times scrape --platforms facebook
+
+Only the backends a command needs (Selenium, the YouTube API client, aiohttp,
+tablib, pyarrow, ...) are imported; --import-times shows what each one cost.
+"""
+import argparse
+import importlib
+import logging
+import os
+import sys
+import time
+
+from config import CASSETTE_DIR, DELTA_EXPORTS, LEAD_INDEX_ENABLED
+
+STARTED = time.perf_counter()
+
+PLATFORMS = ['facebook', 'youtube', 'google_maps']
+
+# Modules behind each platform / export format / command
+SCRAPER_BACKENDS = {
+    'facebook': ['scrapers.facebook_scraper'],
+    'youtube': ['scrapers.youtube_scraper'],
+    'google_maps': ['scrapers.google_maps_scraper']
+}
+EXPORT_BACKENDS = {
+    'xlsx': ['tablib', 'openpyxl'],
+    'csv': ['tablib'],
+    'parquet': ['pyarrow', 'pyarrow.parquet'],
+    'jsonl.zst': ['zstandard']
+}
+
+logger = logging.getLogger('cli')
+
+import_times = {}
+
+
+def load(module: str):
+    """Import a backend, recording how long it took if it wasn't loaded yet"""
+    if module in sys.modules:
+        return sys.modules[module]
+    start = time.perf_counter()
+    loaded = importlib.import_module(module)
+    import_times[module] = time.perf_counter() - start
+    return loaded
+
+
+def report_import_times(ready: float):
+    print(f"\n{'module':<32} {'import ms':>10}", file=sys.stderr)
+    for module, seconds in import_times.items():
+        print(f"{module:<32} {seconds * 1000:>10.1f}", file=sys.stderr)
+    print(f"{'total':<32} {sum(import_times.values()) * 1000:>10.1f}", file=sys.stderr)
+    print(f"CLI ready after {ready * 1000:.1f} ms (before any backend import)", file=sys.stderr)
+
+
+def read_inputs(paths):
+    from storage.lead_export import read_leads
+
+    leads = []
+    for path in paths:
+        leads.extend(read_leads(path))
+    return leads
+
+
+def cmd_scrape(args):
+    platforms = args.platforms.split(',')
+    unknown = set(platforms) - set(PLATFORMS)
+    if unknown:
+        raise SystemExit(f"Unknown platforms: {', '.join(sorted(unknown))}")
+    formats = args.format.split(',')
+    # Checked up front so a typo doesn't cost a whole scrape
+    unsupported = set(formats) - set(load('storage.lead_export').EXPORT_FORMATS + ['xlsx', 'csv'])
+    if unsupported:
+        raise SystemExit(f"Unsupported export formats: {', '.join(sorted(unsupported))}")
+
+    scraping_manager = load('scraping_manager')
+    cassette = load('scrapers.cassette').Cassette(args.cassette_dir, args.cassette) if args.cassette else None
+    manager = scraping_manager.ScrapingManager(cassette)
+    targets = manager.load_targets(args.targets)
+    if not targets:
+        return 1
+    for platform in platforms:
+        if targets[platform]:
+            for module in SCRAPER_BACKENDS[platform]:
+                load(module)
+    if 'google_maps' in platforms and targets['google_maps'] and manager.enrich:
+        load('scrapers.website_enricher')
+    for format in formats:
+        for module in EXPORT_BACKENDS.get(format, []):
+            load(module)
+
+    leads = manager.scrape_all(platforms, args.targets)
+    if leads:
+        if args.index:
+            manager.index_leads(leads)
+        for format in formats:
+            manager.export_leads(leads, format, delta=args.delta)
+    manager.write_metrics()
+    return 0
+
+
+def cmd_export(args):
+    for module in EXPORT_BACKENDS.get(args.format, []):
+        load(module)
+    manager = load('scraping_manager').ScrapingManager()
+    leads = read_inputs(args.inputs)
+    filename = manager.export_leads(leads, args.format, delta=args.delta)
+    if filename:
+        print(filename)
+    return 0
+
+
+def cmd_send(args):
+    message_sender = load('automation.message_sender')
+    leads = read_inputs(args.inputs)
+    smtp_config = None
+    if args.smtp_server:
+        smtp_config = {
+            'server': args.smtp_server,
+            'port': args.smtp_port,
+            'email': args.smtp_email,
+            'password': args.smtp_password
+        }
+    results = message_sender.MessageSender().process_leads(leads, smtp_config=smtp_config)
+    logger.info(f"Message sending results: {results}")
+    return 0
+
+
+def cmd_bench(args):
+    load('benchmarks.run').main(args.args)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--import-times', action='store_true', help="print what each backend import cost")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scrape = commands.add_parser('scrape', help="scrape the targets in scraping_targets.xlsx")
+    scrape.add_argument('--platforms', default=','.join(PLATFORMS), help="comma-separated subset of: " + ', '.join(PLATFORMS))
+    scrape.add_argument('--targets', default='scraping_targets.xlsx')
+    scrape.add_argument('--format', default='xlsx,csv', help="comma-separated export formats")
+    scrape.add_argument('--delta', action=argparse.BooleanOptionalAction, default=DELTA_EXPORTS,
+                        help="export only leads that are new or changed since the last export (--no-delta: all)")
+    scrape.add_argument('--no-index', dest='index', action='store_false', default=LEAD_INDEX_ENABLED,
+                        help="don't add the leads to the local search index")
+    scrape.add_argument('--cassette', choices=['record', 'replay'],
+                        help="record raw pages/API responses, or re-run extraction from them offline")
+    scrape.add_argument('--cassette-dir', default=CASSETTE_DIR)
+    scrape.set_defaults(run=cmd_scrape)
+
+    export = commands.add_parser('export', help="convert lead files (.json, .jsonl[.gz|.zst], .parquet, .csv)")
+    export.add_argument('inputs', nargs='+')
+    export.add_argument('--format', default='csv', choices=['xlsx', 'csv', 'parquet', 'jsonl', 'jsonl.gz', 'jsonl.zst'])
+    export.add_argument('--delta', action=argparse.BooleanOptionalAction, default=DELTA_EXPORTS)
+    export.set_defaults(run=cmd_export)
+
+    send = commands.add_parser('send', help="message the leads in lead files")
+    send.add_argument('inputs', nargs='+')
+    send.add_argument('--smtp-server')
+    send.add_argument('--smtp-port', type=int, default=587)
+    send.add_argument('--smtp-email')
+    send.add_argument('--smtp-password', default=os.getenv('SMTP_PASSWORD'))
+    send.set_defaults(run=cmd_send)
+
+    # Everything after `bench` is handed to benchmarks/run.py
+    bench = commands.add_parser('bench', help="run the offline benchmark suite (options as benchmarks/run.py)")
+    bench.set_defaults(run=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != 'bench':
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.args = extra
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    ready = time.perf_counter() - STARTED
+    try:
+        return args.run(args)
+    finally:
+        if args.import_times:
+            report_import_times(ready)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
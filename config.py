@@ -15,6 +15,126 @@ YOUTUBE_MAX_COMMENTS = 1000
 FACEBOOK_MAX_POSTS = 100
 GOOGLE_MAPS_MAX_RESULTS = 100
 
+# YouTube replies come inline with their thread (up to 5); threads with more
+# are paged through comments().list on YOUTUBE_REPLY_WORKERS threads
+YOUTUBE_FETCH_REPLIES = True
+YOUTUBE_REPLY_WORKERS = 4
+
+# 'browser' drives undetected Chrome for every query; 'http' fetches search
+# results over a pooled HTTP session and only starts Chrome for pages it
+# can't parse
+GOOGLE_MAPS_ENGINE = 'browser'
+MAPS_HTTP_WORKERS = 8
+MAPS_HTTP_POOL_SIZE = 16
+MAPS_HTTP_TIMEOUT = 15
+
+# Grid search splits "<keyword> in <location>" into Web Mercator tiles
+# starting at MAPS_GRID_ZOOM (12 is ~10 km across at mid latitudes). Tiles
+# with at least MAPS_TILE_SATURATION results inside them are split into four,
+# down to MAPS_GRID_MAX_ZOOM. Browser grid searches run MAPS_GRID_WORKERS
+# Chrome sessions; HTTP grid searches use MAPS_HTTP_WORKERS threads.
+MAPS_GRID_SEARCH = False
+MAPS_GRID_ZOOM = 12
+MAPS_GRID_MAX_ZOOM = 16
+MAPS_TILE_SATURATION = 20
+MAPS_GRID_WORKERS = 2
+MAPS_GEOCODE_CACHE_FILE = 'data/geocode_cache.json'
+
+# Read Maps/Facebook results from the XHR/GraphQL responses (Chrome DevTools
+# Protocol) instead of walking the rendered DOM; the DOM path is still used
+# when nothing could be captured
+CAPTURE_NETWORK = True
+CAPTURE_SCROLLS = 5
+
+# Browser Health
+# Selenium sessions are restarted (cookies, URL and scroll position restored)
+# when chromedriver + Chrome use more than BROWSER_MAX_RSS_MB, the moving
+# average page load exceeds BROWSER_MAX_PAGE_LOAD_SECONDS, BROWSER_MAX_ERROR_STREAK
+# errors happen in a row, or after BROWSER_MAX_PAGES_PER_SESSION page loads.
+BROWSER_MAX_RSS_MB = 2048
+BROWSER_MAX_PAGE_LOAD_SECONDS = 20
+BROWSER_MAX_ERROR_STREAK = 5
+BROWSER_MAX_PAGES_PER_SESSION = 500
+BROWSER_HEALTH_CHECK_SECONDS = 30  # how often process memory is sampled
+
+# Website Enrichment
+# Leads with a website but no email get their homepage and up to
+# ENRICH_MAX_PAGES - 1 contact/about pages crawled. Found contacts are cached
+# per site for ENRICH_CACHE_TTL_DAYS (sites that had none are cached too);
+# unreachable sites are retried after ENRICH_FAILURE_TTL_HOURS.
+ENRICH_WEBSITES = True
+ENRICH_CONCURRENCY = 100  # open connections across all sites
+ENRICH_PER_HOST = 2
+ENRICH_TIMEOUT = 10  # seconds per request
+ENRICH_MAX_PAGES = 4
+ENRICH_MAX_BYTES = 1024 * 1024  # larger pages are truncated
+ENRICH_RESPECT_ROBOTS = True
+ENRICH_USER_AGENT = 'Mozilla/5.0 (compatible; LeadEnricher/1.0)'
+ENRICH_CACHE_FILE = 'data/enrichment_cache.json'
+ENRICH_CACHE_TTL_DAYS = 30
+ENRICH_FAILURE_TTL_HOURS = 24
+
+# Record/Replay
+# 'record' archives raw pages (Selenium scrapers) and API responses (YouTube)
+# in CASSETTE_DIR; 'replay' re-runs extraction from that archive without a
+# browser, network or quota. The scraping_manager.py --cassette flag overrides this.
+CASSETTE_MODE = 'off'  # 'off', 'record' or 'replay'
+CASSETTE_DIR = 'data/cassettes'
+
+# Rate Limiting
+# Per-host / per-API token buckets (requests per second). Rates adapt between
+# min_rate and max_rate: +increase after each success, *decrease and a
+# cooldown pause (seconds) after a 429, captcha or quota error.
+RATE_LIMITS = {
+    'default': {'rate': 0.5, 'burst': 2, 'min_rate': 0.05, 'max_rate': 2},
+    'www.facebook.com': {'rate': 0.3, 'burst': 1, 'min_rate': 0.02, 'max_rate': 1, 'cooldown': 120},
+    'www.google.com': {'rate': 0.5, 'burst': 2, 'min_rate': 0.05, 'max_rate': 2, 'cooldown': 60},
+    'youtube_api': {'rate': 5, 'burst': 10, 'min_rate': 0.5, 'max_rate': 20, 'cooldown': 10}
+}
+YOUTUBE_DAILY_QUOTA = 10000  # API units per day
+
+# Post-processing
+# Contact extraction/validation runs in a process pool. Payloads are sent in
+# chunks of POSTPROCESS_CHUNK_SIZE; scrapers block once POSTPROCESS_MAX_PENDING
+# chunks are in flight. POSTPROCESS_WORKERS = 0 runs everything inline.
+POSTPROCESS_WORKERS = 4
+POSTPROCESS_CHUNK_SIZE = 200
+POSTPROCESS_MAX_PENDING = 8
+
+# Instrumentation
+# Timing spans and counters for scrapers/exports. A per-run JSON summary and a
+# Prometheus text file are written to METRICS_DIR; set METRICS_PORT to also
+# serve /metrics over HTTP.
+METRICS_ENABLED = True
+METRICS_DIR = 'metrics'
+METRICS_PORT = None
+
+# Phone Normalization
+# Numbers are stored as E.164 (phone_e164) plus an integer key (phone_key).
+# National-format numbers are parsed with the region of the Maps query or
+# address when one can be recognised, else DEFAULT_PHONE_REGION.
+DEFAULT_PHONE_REGION = 'US'
+PHONE_PARSE_CACHE_SIZE = 1 << 16
+
+# Export Configuration
+# 'json' keeps the legacy indented dump; 'jsonl.zst', 'jsonl.gz' and
+# 'parquet' are much smaller and faster to reload
+LEADS_EXPORT_FORMAT = 'json'
+
+# Delta exports write only leads that are new or whose contact fields changed
+# since the previous export of the same file series, plus a numbered manifest
+# in DELTA_MANIFEST_DIR. Exported lead fingerprints are kept in DELTA_INDEX_FILE.
+DELTA_EXPORTS = False
+DELTA_INDEX_FILE = 'data/export_index.db'
+DELTA_MANIFEST_DIR = 'data/manifests'
+
+# Lead Index
+# scraping_manager.py adds every run's leads to a local SQLite store with a
+# full-text index over names and post/comment text; query it with
+# `python -m storage.lead_index search ...`
+LEAD_INDEX_ENABLED = True
+LEAD_INDEX_FILE = 'data/leads.db'
+
 # Message Templates
 EMAIL_TEMPLATE = """
 Hi {name},
@@ -38,3 +158,40 @@ DATABASE_NAME = "lead_scraper"
 SCRAPING_INTERVAL_HOURS = 24
 MESSAGE_DELAY_SECONDS = 60
 MAX_DAILY_MESSAGES = 50
+
+# Email Validation
+# Addresses are checked (syntax, disposable domain, MX record) before sending.
+# Results are cached per domain; DNS failures are retried sooner.
+EMAIL_VALIDATION_WORKERS = 32
+EMAIL_VALIDATION_TIMEOUT = 5  # seconds per DNS lookup
+EMAIL_VALIDATION_TTL_HOURS = 24
+EMAIL_VALIDATION_RETRY_MINUTES = 30
+EMAIL_VALIDATION_CACHE_FILE = 'data/email_domains.json'
+DISPOSABLE_DOMAINS_FILE = None  # optional extra blocklist, one domain per line
+
+# Distributed Mode
+# `python scraping_manager.py --mode coordinator` shards targets into jobs in
+# the broker; `--mode worker` (on any number of machines) claims and runs them.
+# Brokers: 'sqlite:///path/jobs.db' or 'file:///shared/dir'. Workers renew
+# their lease every JOB_HEARTBEAT_SECONDS; a job whose lease lapses or fails is
+# retried up to JOB_MAX_ATTEMPTS times.
+BROKER_URL = 'sqlite:///data/jobs.db'
+JOB_SHARD_SIZES = {'facebook': 5, 'youtube': 20, 'google_maps': 1}
+JOB_LEASE_SECONDS = 600
+JOB_HEARTBEAT_SECONDS = 60
+JOB_MAX_ATTEMPTS = 3
+BROKER_POLL_SECONDS = 10
+
+# Crawl Scheduler
+# Targets are recrawled every SCRAPING_INTERVAL_HOURS when they yield
+# SCHEDULER_TARGET_NEW_LEADS new leads per crawl; busier targets come back
+# sooner, quiet or failing ones later. Only leads a target hasn't produced
+# before (fingerprints in SCHEDULER_SEEN_FILE) are messaged.
+SCHEDULER_STATE_FILE = 'data/crawl_state.json'
+SCHEDULER_SEEN_FILE = 'data/crawl_seen.db'
+SCHEDULER_TICK_MINUTES = 15
+SCHEDULER_MIN_INTERVAL_HOURS = 1
+SCHEDULER_MAX_INTERVAL_HOURS = 24 * 7
+SCHEDULER_TARGET_NEW_LEADS = 5
+CYCLE_BROWSER_MINUTES = 30  # Selenium time per scheduler cycle
+CYCLE_API_QUOTA = 2000  # YouTube API units per scheduler cycle
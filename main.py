@@ -6,11 +6,10 @@ from datetime import datetime
 import json
 import os
 
-from scrapers.youtube_scraper import YouTubeScraper
-from scrapers.facebook_scraper import FacebookScraper
-from scrapers.google_maps_scraper import GoogleMapsScraper
-from automation.message_sender import MessageSender
-from config import SCRAPING_INTERVAL_HOURS
+from automation.crawl_scheduler import CrawlScheduler
+from config import SCHEDULER_TICK_MINUTES, LEADS_EXPORT_FORMAT, ENRICH_WEBSITES, DELTA_EXPORTS
+from storage.lead_export import EXPORT_FORMATS, export_file
+from storage.delta_export import DeltaIndex
 
 # Setup logging
 logging.basicConfig(
@@ -26,21 +25,76 @@ logger = logging.getLogger(__name__)
 
 class LeadScraper:
     def __init__(self):
-        self.youtube_scraper = YouTubeScraper()
-        self.facebook_scraper = FacebookScraper()
-        self.gmaps_scraper = GoogleMapsScraper()
-        self.message_sender = MessageSender()
+        self._backends = {}
+        self.scheduler = CrawlScheduler()
+        self.delta_index = DeltaIndex()
+        self._facebook_logged_in = False
+    
+    # Scrapers and the sender are imported and built on first use, so a cycle
+    # with nothing due on a platform never loads its browser/API stack
+    @property
+    def youtube_scraper(self):
+        if 'youtube' not in self._backends:
+            from scrapers.youtube_scraper import YouTubeScraper
+            self._backends['youtube'] = YouTubeScraper()
+        return self._backends['youtube']
+    
+    @property
+    def facebook_scraper(self):
+        if 'facebook' not in self._backends:
+            from scrapers.facebook_scraper import FacebookScraper
+            self._backends['facebook'] = FacebookScraper()
+        return self._backends['facebook']
+    
+    @property
+    def gmaps_scraper(self):
+        if 'gmaps' not in self._backends:
+            from scrapers.google_maps_scraper import GoogleMapsScraper
+            self._backends['gmaps'] = GoogleMapsScraper()
+        return self._backends['gmaps']
+    
+    @property
+    def website_enricher(self):
+        if 'enricher' not in self._backends:
+            from scrapers.website_enricher import WebsiteEnricher
+            self._backends['enricher'] = WebsiteEnricher()
+        return self._backends['enricher']
+    
+    @property
+    def message_sender(self):
+        if 'sender' not in self._backends:
+            from automation.message_sender import MessageSender
+            self._backends['sender'] = MessageSender()
+        return self._backends['sender']
+        
+    def save_leads(self, leads: List[Dict], source: str, format: str = LEADS_EXPORT_FORMAT,
+                   delta: bool = DELTA_EXPORTS):
+        """Save leads to a JSON, JSONL or Parquet file; with delta, only new or changed ones"""
+        if format != 'json' and format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported lead file format: {format} (use json or one of {', '.join(EXPORT_FORMATS)})")
+        
+        plan = None
+        if delta:
+            plan = self.delta_index.plan(f"leads_{source}.{format}", leads)
+            leads = plan.records
+            if not leads:
+                logger.info(f"No new or changed {source} leads to save")
+                self.delta_index.commit(plan, None, format)
+                return
         
-    def save_leads(self, leads: List[Dict], source: str):
-        """Save leads to JSON file"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"leads_{source}_{timestamp}.json"
+        filename = f"leads_{source}_{timestamp}.{format}"
         
         os.makedirs('data', exist_ok=True)
         filepath = os.path.join('data', filename)
         
-        with open(filepath, 'w') as f:
-            json.dump(leads, f, indent=2)
+        if format == 'json':
+            with open(filepath, 'w') as f:
+                json.dump(leads, f, indent=2)
+        else:
+            export_file(leads, filepath, format)
+        if plan:
+            self.delta_index.commit(plan, filepath, format)
         
         logger.info(f"Saved {len(leads)} leads to {filepath}")
     
@@ -62,6 +116,9 @@ class LeadScraper:
         """Scrape Google Maps"""
         logger.info("Starting Google Maps scraping...")
         leads = self.gmaps_scraper.scrape(searches)
+        if ENRICH_WEBSITES and leads:
+            logger.info("Looking up missing emails on business websites...")
+            self.website_enricher.scrape(leads)
         self.save_leads(leads, 'gmaps')
         return leads
     
@@ -97,6 +154,64 @@ class LeadScraper:
         except Exception as e:
             logger.error(f"Error in scraping job: {str(e)}")
 
+    def _crawl_facebook_group(self, group_url: str) -> List[Dict]:
+        """Scheduler runner: scrape one group, logging in on first use"""
+        if not self._facebook_logged_in:
+            self._facebook_logged_in = self.facebook_scraper.login()
+            if not self._facebook_logged_in:
+                raise RuntimeError("Facebook login failed")
+        return self.facebook_scraper.scrape_group(group_url)
+    
+    def _crawl_youtube_video(self, video_url: str) -> List[Dict]:
+        """Scheduler runner: scrape comments of one video"""
+        return self.youtube_scraper.scrape([video_url])
+    
+    def _crawl_maps_query(self, query: str) -> List[Dict]:
+        """Scheduler runner: one Maps search, tile by tile when MAPS_GRID_SEARCH is on"""
+        if self.gmaps_scraper.grid:
+            return self.gmaps_scraper.scrape_grid(query)
+        return self.gmaps_scraper.search_area(query)
+    
+    def run_scheduled_cycle(self, config: Dict):
+        """Crawl the targets that are due, in priority order, within the cycle budget"""
+        try:
+            self.scheduler.register_targets({
+                'youtube': config.get('youtube_videos', []),
+                'facebook': config.get('facebook_groups', []),
+                'google_maps': [
+                    f"{search['query']} in {search['location']}"
+                    for search in config.get('gmaps_searches', [])
+                ]
+            })
+            
+            results, new_results = self.scheduler.run_cycle({
+                'youtube': self._crawl_youtube_video,
+                'facebook': self._crawl_facebook_group,
+                'google_maps': self._crawl_maps_query
+            })
+            
+            # Maps listings rarely show an email; look for one on the business websites
+            if ENRICH_WEBSITES and results.get('google_maps'):
+                logger.info("Looking up missing emails on business websites...")
+                self.website_enricher.scrape(results['google_maps'])
+            
+            for platform, leads in results.items():
+                if leads:
+                    self.save_leads(leads, platform)
+            
+            # Targets are recrawled often; only contact people not seen on an earlier crawl
+            new_leads = [lead for leads in new_results.values() for lead in leads]
+            if config.get('send_messages') and new_leads:
+                results = self.message_sender.process_leads(
+                    new_leads,
+                    smtp_config=config.get('smtp_config'),
+                    fb_session=config.get('fb_session')
+                )
+                logger.info(f"Message sending results: {results}")
+            
+        except Exception as e:
+            logger.error(f"Error in scheduled cycle: {str(e)}")
+
 def main():
     # Example configuration
     config = {
@@ -124,11 +239,11 @@ def main():
     scraper = LeadScraper()
     
     # Run immediately
-    scraper.run_scraping_job(config)
+    scraper.run_scheduled_cycle(config)
     
-    # Schedule periodic runs
-    schedule.every(SCRAPING_INTERVAL_HOURS).hours.do(
-        scraper.run_scraping_job, config
+    # Check for due targets periodically; each target has its own recrawl interval
+    schedule.every(SCHEDULER_TICK_MINUTES).minutes.do(
+        scraper.run_scheduled_cycle, config
     )
     
     # Keep the script running
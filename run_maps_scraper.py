@@ -1,15 +1,15 @@
 import logging
-from scrapers.google_maps_scraper import GoogleMapsScraper
-import pandas as pd
 import os
 from datetime import datetime
+from storage.lead_export import EXPORT_FORMATS, export_file
+from config import ENRICH_WEBSITES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def export_leads(leads, format='csv'):
-    """Export leads to CSV or XLSX file"""
+    """Export leads to CSV, XLSX, Parquet or (compressed) JSONL file"""
     if not leads:
         return None
         
@@ -21,7 +21,14 @@ def export_leads(leads, format='csv'):
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f'output/leads_{timestamp}.{format}'
     
+    # Columnar/JSONL formats don't need a DataFrame
+    if format in EXPORT_FORMATS:
+        export_file(leads, filename, format)
+        return filename
+        
     # Convert to DataFrame and export
+    import pandas as pd
+    
     df = pd.DataFrame(leads)
     if format == 'csv':
         df.to_csv(filename, index=False)
@@ -31,19 +38,27 @@ def export_leads(leads, format='csv'):
     return filename
 
 def main():
+    from scrapers.google_maps_scraper import GoogleMapsScraper
+    from scrapers.website_enricher import WebsiteEnricher
+    
     # Test queries
     queries = [
         "lawyers in Houston, TX",
         "lawyers in Austin, TX"
     ]
     
-    # Initialize scraper
-    scraper = GoogleMapsScraper()
+    # Initialize scraper; grid search splits each metro into map tiles so
+    # results aren't capped at a single result list
+    scraper = GoogleMapsScraper(grid=True)
     
     try:
         # Run scraper
         leads = scraper.scrape(queries)
         
+        # Fill in emails from the business websites
+        if ENRICH_WEBSITES and leads:
+            WebsiteEnricher().scrape(leads)
+        
         # Export results
         if leads:
             csv_file = export_leads(leads, 'csv')
@@ -2,39 +2,78 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
 import re
 import logging
+from .rate_limiter import rate_limiters
+from .metrics import metrics
+from .cassette import Cassette, open_cassette
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+PHONE_PATTERN = re.compile(r'[\+]?[(]?[0-9]{3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4,6}')
+URL_PATTERN = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
 
 class BaseScraper(ABC):
-    def __init__(self):
+    def __init__(self, cassette: Optional[Cassette] = None):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.rate_limiters = rate_limiters
+        self.metrics = metrics
+        self.cassette = cassette if cassette is not None else open_cassette()
+    
+    @property
+    def recording(self) -> bool:
+        """Raw pages/responses are being archived to the cassette"""
+        return self.cassette is not None and self.cassette.recording
+    
+    @property
+    def replaying(self) -> bool:
+        """Pages/responses come from the cassette instead of the network"""
+        return self.cassette is not None and self.cassette.replaying
         
     @abstractmethod
     def scrape(self) -> List[Dict]:
         """Main scraping method to be implemented by each platform scraper"""
         pass
     
+    def span(self, op: str, **labels):
+        """Time an operation (driver_startup, navigation, wait, element_lookup, api_call, extraction)"""
+        return self.metrics.span(op, scraper=self.__class__.__name__, **labels)
+    
+    def count(self, name: str, value: float = 1, **labels):
+        """Increment a per-scraper counter (leads_total, errors_total, retries_total)"""
+        self.metrics.incr(name, value, scraper=self.__class__.__name__, **labels)
+    
+    def throttle(self, key: str, tokens: float = 1, max_wait: float = None) -> float:
+        """Wait for the shared rate limiter of a host or API"""
+        return self.rate_limiters.acquire(key, tokens, max_wait)
+    
+    def report_success(self, key: str):
+        """Let the limiter speed up after a successful request"""
+        self.rate_limiters.on_success(key)
+    
+    def report_throttled(self, key: str, retry_after: float = None):
+        """Back off after a 429, captcha or quota error"""
+        self.rate_limiters.on_throttled(key, retry_after)
+        self.count('throttled_total', key=key)
+    
     def extract_email(self, text: str) -> Optional[str]:
         """Extract email from text using regex"""
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        match = re.search(email_pattern, text)
+        match = EMAIL_PATTERN.search(text)
         return match.group(0) if match else None
     
     def extract_phone(self, text: str) -> Optional[str]:
         """Extract phone number from text using regex"""
-        phone_pattern = r'[\+]?[(]?[0-9]{3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4,6}'
-        match = re.search(phone_pattern, text)
+        match = PHONE_PATTERN.search(text)
         return match.group(0) if match else None
     
     def extract_website(self, text: str) -> Optional[str]:
         """Extract website URL from text using regex"""
-        url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+'
-        match = re.search(url_pattern, text)
+        match = URL_PATTERN.search(text)
         return match.group(0) if match else None
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         if not text:
             return ""
-        text = re.sub(r'\s+', ' ', text)  # Remove extra whitespace
+        text = WHITESPACE_PATTERN.sub(' ', text)  # Remove extra whitespace
         text = text.strip()
         return text
     
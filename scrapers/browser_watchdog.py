@@ -0,0 +1,183 @@
+import logging
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import psutil
+
+from config import (
+    BROWSER_MAX_RSS_MB, BROWSER_MAX_PAGE_LOAD_SECONDS, BROWSER_MAX_ERROR_STREAK,
+    BROWSER_MAX_PAGES_PER_SESSION, BROWSER_HEALTH_CHECK_SECONDS
+)
+
+# Weight of the newest page load in the latency moving average
+LATENCY_ALPHA = 0.3
+
+# WebDriver errors meaning the browser or its session is gone for good
+FATAL_ERRORS = ('invalid session id', 'chrome not reachable', 'disconnected', 'target window already closed',
+                'session deleted because of page crash', 'tab crashed')
+
+
+def process_tree_rss_mb(driver) -> float:
+    """Resident memory of chromedriver, Chrome and all renderer/GPU children in MB"""
+    roots = []
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    if process is not None:
+        roots.append(process.pid)
+    browser_pid = getattr(driver, 'browser_pid', None)
+    if browser_pid:
+        roots.append(browser_pid)
+
+    seen = set()
+    total = 0
+    for pid in roots:
+        try:
+            root = psutil.Process(pid)
+            for proc in [root] + root.children(recursive=True):
+                if proc.pid in seen:
+                    continue
+                seen.add(proc.pid)
+                total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserWatchdog:
+    """Watches a Selenium session's memory, page-load latency and error streak.
+
+    ensure(scraper) restarts the scraper's browser when a threshold is crossed,
+    restoring cookies, the current URL and scroll position so the current
+    target can carry on. The scraper needs .driver, .setup_driver() and .count().
+    """
+
+    def __init__(self, max_rss_mb: float = BROWSER_MAX_RSS_MB,
+                 max_page_load: float = BROWSER_MAX_PAGE_LOAD_SECONDS,
+                 max_error_streak: int = BROWSER_MAX_ERROR_STREAK,
+                 max_pages: int = BROWSER_MAX_PAGES_PER_SESSION,
+                 check_seconds: float = BROWSER_HEALTH_CHECK_SECONDS):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_rss_mb = max_rss_mb
+        self.max_page_load = max_page_load
+        self.max_error_streak = max_error_streak
+        self.max_pages = max_pages
+        self.check_seconds = check_seconds
+        self.restarts = 0
+        self._checkpoint = {}
+        self.reset()
+
+    def reset(self):
+        """Forget the per-session counters (after a restart)"""
+        self.pages = 0
+        self.latency = None
+        self.error_streak = 0
+        self.fatal = False
+        self.rss_mb = 0.0
+        self._last_check = 0.0
+
+    def page_loaded(self, seconds: float):
+        self.pages += 1
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency = LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * self.latency
+
+    def success(self):
+        self.error_streak = 0
+
+    def error(self, exc: Exception = None):
+        self.error_streak += 1
+        if exc is not None and any(marker in str(exc).lower() for marker in FATAL_ERRORS):
+            self.fatal = True
+
+    def check(self, driver) -> Optional[str]:
+        """Why the session should be recycled, or None if it looks healthy"""
+        if driver is None:
+            return None
+        if self.fatal:
+            return 'dead'
+        if self.error_streak >= self.max_error_streak:
+            return 'errors'
+        if self.latency is not None and self.latency > self.max_page_load:
+            return 'latency'
+        if self.max_pages and self.pages >= self.max_pages:
+            return 'pages'
+
+        now = time.monotonic()
+        if now - self._last_check < self.check_seconds:
+            return None
+        self._last_check = now
+        self.rss_mb = process_tree_rss_mb(driver)
+        if self.rss_mb > self.max_rss_mb:
+            return 'memory'
+        # Healthy: remember the session state in case the browser dies before the next check
+        self._checkpoint = self.snapshot(driver, self._checkpoint)
+        return None
+
+    def snapshot(self, driver, fallback: Dict = None) -> Dict:
+        """URL, cookies and scroll position; anything unreadable is taken from fallback"""
+        state = dict(fallback or {})
+        try:
+            state['url'] = driver.current_url
+            state['cookies'] = driver.get_cookies()
+            state['scroll'] = driver.execute_script('return window.pageYOffset || 0;')
+        except Exception as e:
+            self.logger.debug(f"Could not snapshot browser state: {str(e)}")
+        return state
+
+    def restore(self, driver, state: Dict):
+        """Put cookies back and reopen the URL at the same scroll position"""
+        url = state.get('url')
+        cookies: List[Dict] = state.get('cookies') or []
+        if cookies and url and url.startswith('http'):
+            parts = urlsplit(url)
+            # Cookies can only be set for the domain of the page that is open
+            driver.get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+            for cookie in cookies:
+                cookie = {k: v for k, v in cookie.items() if k != 'sameSite' or v in ('Strict', 'Lax', 'None')}
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    self.logger.debug(f"Skipping cookie {cookie.get('name')}: {str(e)}")
+        if url and url.startswith('http'):
+            driver.get(url)
+            if state.get('scroll'):
+                driver.execute_script('window.scrollTo(0, arguments[0]);', state['scroll'])
+
+    def recycle(self, scraper, reason: str, url: str = None):
+        """Replace the scraper's browser with a fresh one in the same state (or at url)"""
+        state = self.snapshot(scraper.driver, self._checkpoint)
+        if url:
+            state.update(url=url, scroll=0)
+        self.logger.warning(
+            f"Restarting browser ({reason}): {self.rss_mb:.0f} MB, {self.pages} pages, "
+            f"latency {self.latency or 0:.1f}s, {self.error_streak} errors in a row"
+        )
+        try:
+            scraper.driver.quit()
+        except Exception:
+            pass
+        scraper.driver = None
+        scraper.setup_driver()
+        self.reset()
+        self.restarts += 1
+        scraper.count('browser_restarts_total', reason=reason)
+        # The fresh browser re-navigates to the page the old one was on
+        scraper.count('retries_total', reason='browser_restart')
+        try:
+            self.restore(scraper.driver, state)
+        except Exception as e:
+            self.logger.error(f"Could not restore browser state: {str(e)}")
+        self._checkpoint = self.snapshot(scraper.driver, state)
+
+    def ensure(self, scraper, url: str = None) -> bool:
+        """Recycle the scraper's browser if unhealthy; True if it was restarted.
+
+        url is where the fresh browser should go instead of the current page.
+        """
+        reason = self.check(scraper.driver)
+        if reason is None:
+            return False
+        self.recycle(scraper, reason, url)
+        return True
@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from config import CASSETTE_MODE, CASSETTE_DIR
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MODES = ('off', 'record', 'replay')
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when nothing was recorded for a request or page"""
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data)
+
+
+def _decompress(data: bytes) -> bytes:
+    # zstd frames start with 28 b5 2f fd, gzip members with 1f 8b
+    if data[:4] == b'\x28\xb5\x2f\xfd':
+        if zstandard is None:
+            raise ImportError("zstandard is needed to read this cassette")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class Cassette:
+    """Content-addressed archive of raw pages and API responses for offline re-runs.
+
+    Each recording is a JSON document stored once under objects/ by its sha256,
+    compressed with zstd (gzip if zstandard is missing). index.jsonl maps
+    (kind, key) to the digests recorded for it; replays use the newest one.
+    """
+
+    def __init__(self, path: str = CASSETTE_DIR, mode: str = CASSETTE_MODE):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.mode = mode
+        self.index_path = os.path.join(path, 'index.jsonl')
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    @property
+    def index(self) -> Dict[str, Dict[str, str]]:
+        """kind -> key -> digest of the newest recording, in first-recorded order"""
+        if self._index is None:
+            index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # A line cut short by a crash mid-write
+                            continue
+                        index.setdefault(entry['kind'], {})[entry['key']] = entry['digest']
+            self._index = index
+        return self._index
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.path, 'objects', digest[:2], digest[2:])
+
+    def put(self, data: bytes) -> str:
+        """Store a blob under its sha256 (once) and return the digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(_compress(data))
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with open(self._object_path(digest), 'rb') as f:
+            return _decompress(f.read())
+
+    def record(self, kind: str, key: str, document) -> str:
+        """Archive a JSON document (page bundle or API response) under (kind, key)"""
+        digest = self.put(json.dumps(document, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        line = json.dumps({'kind': kind, 'key': key, 'digest': digest, 'recorded_at': time.time()})
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+            self.index.setdefault(kind, {})[key] = digest
+        return digest
+
+    def load(self, kind: str, key: str):
+        """The newest document recorded under (kind, key); raises CassetteMiss if there is none"""
+        digest = self.index.get(kind, {}).get(key)
+        if digest is None:
+            raise CassetteMiss(f"Nothing recorded for {kind} {key}")
+        return json.loads(self.get(digest))
+
+    def keys(self, kind: str) -> List[str]:
+        return list(self.index.get(kind, {}))
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def open_cassette(path: str = CASSETTE_DIR, mode: str = CASSETTE_MODE) -> Optional[Cassette]:
+    """Process-wide cassette for path and mode, or None when recording/replay is off"""
+    if mode == 'off':
+        return None
+    with _cassettes_lock:
+        cassette = _cassettes.get((path, mode))
+        if cassette is None:
+            cassette = _cassettes[(path, mode)] = Cassette(path, mode)
+        return cassette
+
+
+def api_key(resource: str, params: Dict) -> str:
+    """Cassette key of an API call: resource and its parameters in a stable order"""
+    return f"{resource}.list?{urlencode(sorted((k, str(v)) for k, v in params.items() if k != 'key'))}"
+
+
+class _CassetteRequest:
+    def __init__(self, client: 'CassetteYouTube', resource: str, params: Dict):
+        self.client = client
+        self.methodId = f"youtube.{resource}.list"
+        self.key = api_key(resource, params)
+        self._request = None
+        if client.client is not None:
+            self._request = getattr(client.client, resource)().list(**params)
+
+    def execute(self):
+        if self._request is None:
+            return self.client.cassette.load('youtube', self.key)
+        response = self._request.execute()
+        self.client.cassette.record('youtube', self.key, response)
+        return response
+
+
+class _CassetteResource:
+    def __init__(self, client: 'CassetteYouTube', name: str):
+        self.client = client
+        self.name = name
+
+    def list(self, **params):
+        return _CassetteRequest(self.client, self.name, params)
+
+
+class CassetteYouTube:
+    """YouTube client stand-in: records a real client's responses, or replays them without one"""
+
+    def __init__(self, cassette: Cassette, client=None):
+        self.cassette = cassette
+        self.client = client
+
+    def videos(self):
+        return _CassetteResource(self, 'videos')
+
+    def commentThreads(self):
+        return _CassetteResource(self, 'commentThreads')
+
+    def comments(self):
+        return _CassetteResource(self, 'comments')
@@ -8,15 +8,28 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium_stealth import stealth
 from .base_scraper import BaseScraper
-from config import FACEBOOK_EMAIL, FACEBOOK_PASSWORD
+from .rate_limiter import host_key
+from .postprocess import extraction_pool
+from .network_capture import NetworkCapture, PERFORMANCE_LOGGING, FACEBOOK_URL_PATTERNS, decode_facebook_graphql
+from .browser_watchdog import BrowserWatchdog
+from .cassette import CassetteMiss
+from bs4 import BeautifulSoup
+from config import FACEBOOK_EMAIL, FACEBOOK_PASSWORD, CAPTURE_NETWORK
 import time
 import logging
+import re
+
+# Server-rendered GraphQL data embedded in the group page
+EMBEDDED_JSON_PATTERN = re.compile(r'<script type="application/json"[^>]*>(.*?)</script>', re.S)
 
 class FacebookScraper(BaseScraper):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, capture_network: bool = CAPTURE_NETWORK, cassette=None):
+        super().__init__(cassette)
         self.driver = None
-        self.setup_driver()
+        self.capture_network = capture_network
+        self.watchdog = BrowserWatchdog()
+        if not self.replaying:
+            self.setup_driver()
     
     def setup_driver(self):
         """Setup Selenium WebDriver with stealth mode"""
@@ -26,25 +39,80 @@ class FacebookScraper(BaseScraper):
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
+        if self.capture_network:
+            chrome_options.set_capability(*PERFORMANCE_LOGGING)
         
-        # Initialize the Chrome WebDriver
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Apply stealth mode
-        stealth(self.driver,
-            languages=["en-US", "en"],
-            vendor="Google Inc.",
-            platform="Win32",
-            webgl_vendor="Intel Inc.",
-            renderer="Intel Iris OpenGL Engine",
-            fix_hairline=True,
+        with self.span('driver_startup'):
+            # Initialize the Chrome WebDriver
+            service = Service(ChromeDriverManager().install())
+            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            
+            # Apply stealth mode
+            stealth(self.driver,
+                languages=["en-US", "en"],
+                vendor="Google Inc.",
+                platform="Win32",
+                webgl_vendor="Intel Inc.",
+                renderer="Intel Iris OpenGL Engine",
+                fix_hairline=True,
+            )
+    
+    def navigate(self, url: str, target: str = None):
+        """Open a page, reporting its load time to the watchdog"""
+        start = time.time()
+        with self.span('navigation', target=target or url):
+            self.driver.get(url)
+        self.watchdog.page_loaded(time.time() - start)
+    
+    def start_capture(self, group_url: str, bodies: List = None) -> NetworkCapture:
+        capture = NetworkCapture(
+            self.driver, FACEBOOK_URL_PATTERNS,
+            lambda url, body: decode_facebook_graphql(url, body, group_url)
         )
+        # Raw GraphQL responses are kept for the cassette
+        capture.bodies = bodies if bodies is not None else ([] if self.recording else None)
+        capture.start()
+        return capture
+    
+    def decode_embedded(self, html: str, group_url: str) -> List[Dict]:
+        """Stories in the GraphQL data server-rendered into the group page"""
+        payloads = []
+        for block in EMBEDDED_JSON_PATTERN.findall(html):
+            payloads.extend(decode_facebook_graphql(group_url, block, group_url))
+        return payloads
+    
+    def post_payload(self, group_url: str, content: str, author_name: str, author_profile: str) -> Dict:
+        """Extraction payload for a post read from the DOM"""
+        # Phone, email and website are extracted from the content
+        return {
+            'text': content,
+            'lead': {
+                'name': author_name,
+                'profile_url': author_profile,
+                'content': content,
+                'source_url': group_url,
+                'platform': 'Facebook',
+                'type': 'Group Post'
+            }
+        }
+    
+    def captured_leads(self, group_url: str, captured: List[Dict]) -> List[Dict]:
+        """Leads from stories decoded out of the feed's GraphQL data - no DOM walk needed"""
+        unique = {}
+        for payload in captured:
+            unique.setdefault((payload['lead']['profile_url'], payload['text']), payload)
+        self.logger.info(f"Captured {len(unique)} posts from network responses")
+        with self.span('extraction', target=group_url):
+            leads = extraction_pool.map(self.__class__.__name__, list(unique.values()))
+        self.count('leads_total', len(leads), target=group_url)
+        return leads
     
     def login(self):
         """Login to Facebook"""
+        if self.replaying:
+            return True
         try:
-            self.driver.get('https://www.facebook.com')
+            self.navigate('https://www.facebook.com', target='login')
             
             # Wait for email field and enter credentials
             email_field = WebDriverWait(self.driver, 10).until(
@@ -68,26 +136,72 @@ class FacebookScraper(BaseScraper):
             self.logger.error(f"Failed to login to Facebook: {str(e)}")
             return False
     
+    def is_blocked(self) -> bool:
+        """Detect checkpoint/captcha pages that mean we're going too fast"""
+        url = self.driver.current_url
+        return '/checkpoint/' in url or 'captcha' in url
+    
     def scrape_group(self, group_url: str) -> List[Dict]:
         """Scrape posts and comments from a Facebook group"""
+        if self.replaying:
+            return self.replay_group(group_url)
         leads = []
+        host = host_key(group_url)
         try:
-            self.driver.get(group_url)
-            time.sleep(5)  # Wait for content to load
+            self.throttle(host)
+            capture = self.start_capture(group_url) if self.capture_network else None
+            self.navigate(group_url)
+            with self.span('wait', target=group_url):
+                time.sleep(5)  # Wait for content to load
+            
+            if self.is_blocked():
+                self.logger.warning(f"Blocked by Facebook checkpoint on {group_url}")
+                self.report_throttled(host)
+                return leads
+            self.report_success(host)
+            self.watchdog.success()
+            
+            captured = []
+            html = self.driver.page_source if capture or self.recording else None
+            if capture:
+                with self.span('extraction', target=group_url):
+                    captured.extend(self.decode_embedded(html, group_url))
+                    captured.extend(capture.poll())
             
             # Scroll to load more posts
             for _ in range(5):
-                self.driver.execute_script(
-                    "window.scrollTo(0, document.body.scrollHeight);"
-                )
-                time.sleep(2)
+                with self.span('wait', target=group_url):
+                    self.driver.execute_script(
+                        "window.scrollTo(0, document.body.scrollHeight);"
+                    )
+                    time.sleep(2)
+                if capture:
+                    with self.span('extraction', target=group_url):
+                        captured.extend(capture.poll())
+                # A restarted browser reopens the group at the same scroll position
+                if self.watchdog.ensure(self) and capture:
+                    capture = self.start_capture(group_url, capture.bodies)
+            
+            if self.recording:
+                self.cassette.record('facebook', group_url, {
+                    'url': group_url,
+                    'html': html,
+                    'final_html': self.driver.page_source,
+                    'responses': capture.bodies if capture else []
+                })
+            
+            if captured:
+                return self.captured_leads(group_url, captured)
             
             # Find all posts
-            posts = self.driver.find_elements(
-                By.CSS_SELECTOR, 
-                '[role="article"]'
-            )
+            with self.span('element_lookup', target=group_url):
+                posts = self.driver.find_elements(
+                    By.CSS_SELECTOR, 
+                    '[role="article"]'
+                )
             
+            # DOM reads stay on this thread; extraction runs in the process pool
+            batch = extraction_pool.batch(self.__class__.__name__)
             for post in posts:
                 try:
                     # Extract post content
@@ -105,37 +219,57 @@ class FacebookScraper(BaseScraper):
                         author_name = ""
                         author_profile = ""
                     
-                    # Try to get phone numbers from post
-                    phone = self.extract_phone(content)
-                    
-                    # Try to get email from post
-                    email = self.extract_email(content)
-                    
-                    # Try to get website from post
-                    website = self.extract_website(content)
-                    
-                    lead_data = {
-                        'name': author_name,
-                        'profile_url': author_profile,
-                        'email': email,
-                        'phone': phone,
-                        'website': website,
-                        'content': content,
-                        'source_url': group_url,
-                        'platform': 'Facebook',
-                        'type': 'Group Post'
-                    }
-                    
-                    if self.validate_data(lead_data):
-                        leads.append(self.format_lead_data(lead_data))
+                    batch.submit(self.post_payload(group_url, content, author_name, author_profile))
                         
                 except Exception as e:
                     self.logger.error(f"Error processing post: {str(e)}")
+                    self.count('errors_total', target=group_url)
+                    self.watchdog.error(e)
                     continue
+            
+            with self.span('extraction', target=group_url):
+                leads = batch.results()
+            self.count('leads_total', len(leads), target=group_url)
                     
         except Exception as e:
             self.logger.error(f"Error scraping Facebook group {group_url}: {str(e)}")
+            self.count('errors_total', target=group_url)
+            self.watchdog.error(e)
+        
+        return leads
+    
+    def replay_group(self, group_url: str) -> List[Dict]:
+        """Re-run extraction on the group page recorded in the cassette"""
+        try:
+            bundle = self.cassette.load('facebook', group_url)
+        except CassetteMiss as e:
+            self.logger.warning(str(e))
+            return []
+        
+        captured = []
+        if self.capture_network:
+            with self.span('extraction', target=group_url):
+                captured.extend(self.decode_embedded(bundle['html'], group_url))
+                for url, body in bundle['responses']:
+                    try:
+                        captured.extend(decode_facebook_graphql(url, body, group_url))
+                    except Exception as e:
+                        self.logger.debug(f"Could not decode response from {url}: {str(e)}")
+        if captured:
+            return self.captured_leads(group_url, captured)
         
+        payloads = []
+        with self.span('element_lookup', target=group_url):
+            for post in BeautifulSoup(bundle['final_html'], 'html.parser').select('[role="article"]'):
+                author = post.select_one('h2 a')
+                payloads.append(self.post_payload(
+                    group_url, post.get_text('\n', strip=True),
+                    author.get_text(strip=True) if author else "",
+                    author.get('href', "") if author else ""
+                ))
+        with self.span('extraction', target=group_url):
+            leads = extraction_pool.map(self.__class__.__name__, payloads)
+        self.count('leads_total', len(leads), target=group_url)
         return leads
     
     def scrape(self, group_urls: List[str]) -> List[Dict]:
@@ -145,10 +279,15 @@ class FacebookScraper(BaseScraper):
             if self.login():
                 for group_url in group_urls:
                     self.logger.info(f"Scraping group: {group_url}")
+                    # Restarts keep the login: session cookies are carried over
+                    self.watchdog.ensure(self)
                     leads = self.scrape_group(group_url)
+                    if not leads and self.watchdog.ensure(self):
+                        # The group died with the browser; give it one go on the fresh session
+                        self.count('retries_total', target=group_url, reason='rerun_after_restart')
+                        leads = self.scrape_group(group_url)
                     all_leads.extend(leads)
                     self.logger.info(f"Found {len(leads)} leads in group")
-                    time.sleep(2)  # Pause between groups
         finally:
             self.cleanup()
         
@@ -1,4 +1,5 @@
 import logging
+import threading
 import time
 import re
 from selenium.webdriver.common.by import By
@@ -7,13 +8,49 @@ from selenium.webdriver.support import expected_conditions as EC
 import undetected_chromedriver as uc
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from .base_scraper import BaseScraper
+from .rate_limiter import host_key
+from .maps_http_engine import extract_payload, has_contact, parse_places
+from .network_capture import NetworkCapture, PERFORMANCE_LOGGING, MAPS_URL_PATTERNS
+from .maps_grid import Geocoder, GridPlanner, place_key, split_query
+from .browser_watchdog import BrowserWatchdog
+from .cassette import CassetteMiss
+from bs4 import BeautifulSoup
+from storage.phone_index import normalize_leads, region_hint
+from config import (
+    GOOGLE_MAPS_ENGINE, MAPS_HTTP_WORKERS, CAPTURE_NETWORK, CAPTURE_SCROLLS,
+    MAPS_GRID_SEARCH, MAPS_GRID_WORKERS
+)
+from concurrent.futures import ThreadPoolExecutor
+
+# Place ID and coordinates in a place page URL (.../data=!4m...!3d29.76!4d-95.36...!19sChIJ...)
+PLACE_ID_PATTERN = re.compile(r'!19s(ChIJ[\w-]+)')
+PLACE_COORDS_PATTERN = re.compile(r'!3d(-?\d+\.\d+)!4d(-?\d+\.\d+)')
 
 class GoogleMapsScraper(BaseScraper):
-    def __init__(self):
-        super().__init__()
+    base_url = "https://www.google.com/maps/search/"
+    
+    def __init__(self, headless: bool = False, engine: str = GOOGLE_MAPS_ENGINE,
+                 capture_network: bool = CAPTURE_NETWORK, grid: bool = MAPS_GRID_SEARCH, cassette=None):
+        super().__init__(cassette)
         self.driver = None
+        self.headless = headless
+        self.capture_network = capture_network
+        self.engine = engine
+        self.grid = grid
+        self.http_engine = None
+        self._browser_lock = threading.Lock()
+        self.watchdog = BrowserWatchdog()
         self.logger = logging.getLogger(__name__)
-        self.setup_driver()
+        if self.replaying:
+            # Recorded searches are replayed without a browser or network
+            pass
+        elif engine == 'http':
+            from .maps_http_engine import MapsHttpEngine
+            
+            # The browser is only started if a page needs the fallback
+            self.http_engine = MapsHttpEngine(recorder=self.record_http_response if self.recording else None)
+        else:
+            self.setup_driver()
         
     def setup_driver(self):
         """Setup Selenium WebDriver with undetected-chromedriver"""
@@ -23,10 +60,15 @@ class GoogleMapsScraper(BaseScraper):
             options.add_argument("--disable-dev-shm-usage")
             options.add_argument("--disable-gpu")
             options.add_argument("--disable-extensions")
+            if self.headless:
+                options.add_argument("--headless=new")
+            if self.capture_network:
+                options.set_capability(*PERFORMANCE_LOGGING)
             
-            self.driver = uc.Chrome(options=options)
-            self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
+            with self.span('driver_startup'):
+                self.driver = uc.Chrome(options=options)
+                self.driver.set_page_load_timeout(30)
+                self.driver.implicitly_wait(10)
             
         except Exception as e:
             self.logger.error(f"Error setting up Chrome driver: {str(e)}")
@@ -34,6 +76,13 @@ class GoogleMapsScraper(BaseScraper):
                 self.driver.quit()
             raise
             
+    def navigate(self, url: str, target: str = None):
+        """Open a page, reporting its load time to the watchdog"""
+        start = time.time()
+        with self.span('navigation', target=target or url):
+            self.driver.get(url)
+        self.watchdog.page_loaded(time.time() - start)
+            
     def extract_email(self, text: str) -> str:
         """Extract email from text using regex"""
         if not text:
@@ -43,68 +92,191 @@ class GoogleMapsScraper(BaseScraper):
         match = re.search(email_pattern, text)
         return match.group(0) if match else None
         
+    def panel_lead(self, query: str, name: str, place_url: str):
+        """Lead for a place panel; the panel's URL carries its ID and coordinates"""
+        lead_data = {
+            'name': name,
+            'website': None,
+            'phone': None,
+            'email': None,
+            'address': None,
+            'rating': None,
+            'reviews': None,
+            'source': 'Google Maps',
+            'query': query,
+            'place_id': None,
+            'latitude': None,
+            'longitude': None
+        }
+        match = PLACE_ID_PATTERN.search(place_url)
+        if match:
+            lead_data['place_id'] = match.group(1)
+        match = PLACE_COORDS_PATTERN.search(place_url)
+        if match:
+            lead_data['latitude'] = float(match.group(1))
+            lead_data['longitude'] = float(match.group(2))
+        return lead_data
+        
+    def unique_places(self, leads):
+        """Overlapping responses repeat places"""
+        unique = {}
+        for lead in leads:
+            unique.setdefault(place_key(lead), lead)
+        return list(unique.values())
+        
+    def normalize_phones(self, leads, query: str):
+        """Add E.164 phones, parsing national numbers with the query's region"""
+        return normalize_leads(leads, region_hint(query))
+        
+    def results_url(self, query: str, viewport=None) -> str:
+        """Maps search URL for a query; also the cassette key of its recording"""
+        url = f"{self.base_url}{query}"
+        if viewport:
+            url += "/@{:.6f},{:.6f},{}z".format(*viewport)
+        return url
+        
+    def record_http_response(self, query: str, viewport, text: str):
+        """Archive a raw HTTP engine response under the key replay_search() looks up"""
+        url = self.results_url(query, viewport)
+        self.cassette.record('google_maps', url, {
+            'url': url, 'engine': 'http', 'html': text, 'responses': [], 'panels': [], 'result_count': 0
+        })
+        
     def search_area(self, query: str):
-        """Search for businesses in an area"""
+        """Search for businesses in an area with the configured engine"""
+        if self.http_engine:
+            with self.span('http_search', target=query):
+                leads = self.http_engine.search(query)
+            if leads is not None:
+                self.count('leads_total', len(leads), target=query)
+                return self.normalize_phones(leads, query)
+            self.logger.info(f"Falling back to browser for query: {query}")
+            self.count('browser_fallbacks_total', target=query)
+            self.count('retries_total', target=query, reason='browser_fallback')
+        return self.normalize_phones(self.search_area_browser(query), query)
+        
+    def search_area_browser(self, query: str, viewport=None):
+        """Search for businesses in an area by driving Chrome, optionally in a (lat, lng, zoom) viewport"""
+        return self.browser_search(query, viewport)[0]
+        
+    def browser_search(self, query: str, viewport=None):
+        """search_area_browser() plus the number of results Maps listed, before any filtering.
+
+        Tile searches (with a viewport) open every listing; plain searches the first 10.
+        """
+        url = self.results_url(query, viewport)
+        if self.replaying:
+            return self.replay_search(query, url)
+        if not self.driver:
+            self.setup_driver()
+        self.watchdog.ensure(self)
         leads = []
+        result_count = 0
+        # Raw pages and responses for the cassette
+        bundle = {'url': url, 'html': None, 'responses': [], 'panels': []} if self.recording else None
         
         try:
             # Search for query
-            self.driver.get(f"https://www.google.com/maps/search/{query}")
-            time.sleep(3)
+            host = host_key(url)
+            self.throttle(host)
+            capture = None
+            if self.capture_network:
+                capture = NetworkCapture(
+                    self.driver, MAPS_URL_PATTERNS,
+                    lambda response_url, body: parse_places(extract_payload(body), query, contact_only=False)
+                )
+                if bundle:
+                    capture.bodies = bundle['responses']
+                capture.start()
+            self.navigate(url, target=query)
+            
+            if '/sorry/' in self.driver.current_url:
+                self.logger.warning(f"Google unusual-traffic page for query: {query}")
+                self.report_throttled(host)
+                return leads, result_count
             
             # Wait for results
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.Nv2PK"))
-            )
+            with self.span('wait', target=query):
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.Nv2PK"))
+                )
+            
+            self.report_success(host)
+            if bundle:
+                bundle['html'] = self.driver.page_source
+            
+            if capture:
+                places = self.collect_captured(capture, query)
+                if places:
+                    if bundle:
+                        self.cassette.record('google_maps', url, bundle)
+                    captured = [lead for lead in places if has_contact(lead)]
+                    self.logger.info(f"Captured {len(captured)} places from network responses")
+                    self.count('leads_total', len(captured), target=query)
+                    return captured, len(places)
             
             # Get all listings
-            listings = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+            with self.span('element_lookup', target=query):
+                listings = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
+            result_count = len(listings)
+            if bundle:
+                bundle['result_count'] = result_count
             
             # Process each listing
-            for idx, listing in enumerate(listings[:10]):  # Process first 10 for testing
+            limit = len(listings) if viewport else min(len(listings), 10)
+            for idx in range(limit):
                 try:
-                    # Click on listing
-                    listing.click()
-                    time.sleep(2)
+                    # A restarted browser is back on the results page; pick up at this listing
+                    if self.watchdog.ensure(self, url=url):
+                        with self.span('wait', target=query):
+                            WebDriverWait(self.driver, 10).until(
+                                EC.presence_of_element_located((By.CSS_SELECTOR, "div.Nv2PK"))
+                            )
+                        listings = self.driver.find_elements(By.CSS_SELECTOR, "div.Nv2PK")
                     
-                    # Get business details
-                    name = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf span"))
-                    ).text
+                    # Click on listing (loads place details from the same host)
+                    self.throttle(host)
+                    start = time.time()
+                    with self.span('click', target=query):
+                        listings[idx].click()
+                    with self.span('wait', target=query):
+                        time.sleep(2)
+                        
+                        # Get business details
+                        name = WebDriverWait(self.driver, 10).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf span"))
+                        ).text
+                    self.watchdog.page_loaded(time.time() - start)
+                    self.watchdog.success()
+                    self.report_success(host)
                     
                     # Initialize lead data
-                    lead_data = {
-                        'name': name,
-                        'website': None,
-                        'phone': None,
-                        'email': None,
-                        'address': None,
-                        'rating': None,
-                        'reviews': None,
-                        'source': 'Google Maps',
-                        'query': query
-                    }
+                    place_url = self.driver.current_url
+                    lead_data = self.panel_lead(query, name, place_url)
+                    if bundle:
+                        bundle['panels'].append({'url': place_url, 'html': self.driver.page_source})
                     
-                    # Get website
-                    try:
-                        website = self.driver.find_element(By.CSS_SELECTOR, 'a[data-item-id="authority"]')
-                        lead_data['website'] = website.get_attribute('href')
-                    except:
-                        pass
+                    with self.span('extraction', target=query):
+                        # Get website
+                        try:
+                            website = self.driver.find_element(By.CSS_SELECTOR, 'a[data-item-id="authority"]')
+                            lead_data['website'] = website.get_attribute('href')
+                        except:
+                            pass
                         
-                    # Get phone
-                    try:
-                        phone = self.driver.find_element(By.CSS_SELECTOR, 'button[data-tooltip="Copy phone number"]')
-                        lead_data['phone'] = phone.get_attribute('aria-label').replace('Phone:', '').strip()
-                    except:
-                        pass
+                        # Get phone
+                        try:
+                            phone = self.driver.find_element(By.CSS_SELECTOR, 'button[data-tooltip="Copy phone number"]')
+                            lead_data['phone'] = phone.get_attribute('aria-label').replace('Phone:', '').strip()
+                        except:
+                            pass
                         
-                    # Get address
-                    try:
-                        address = self.driver.find_element(By.CSS_SELECTOR, 'button[data-item-id^="address"]')
-                        lead_data['address'] = address.text
-                    except:
-                        pass
+                        # Get address
+                        try:
+                            address = self.driver.find_element(By.CSS_SELECTOR, 'button[data-item-id^="address"]')
+                            lead_data['address'] = address.text
+                        except:
+                            pass
                         
                     # Add lead if we have enough data
                     if name and (lead_data['website'] or lead_data['phone']):
@@ -113,20 +285,179 @@ class GoogleMapsScraper(BaseScraper):
                         
                 except Exception as e:
                     self.logger.error(f"Error processing listing {idx + 1}: {str(e)}")
+                    self.count('errors_total', target=query)
+                    self.watchdog.error(e)
                     continue
+            
+            if bundle:
+                self.cassette.record('google_maps', url, bundle)
                     
         except Exception as e:
             self.logger.error(f"Error searching area: {str(e)}")
+            self.count('errors_total', target=query)
+            self.watchdog.error(e)
             
-        return leads
+        self.count('leads_total', len(leads), target=query)
+        return leads, result_count
+        
+    def collect_captured(self, capture: NetworkCapture, query: str):
+        """Places from the page's embedded payload plus the XHRs fired while scrolling the feed,
+        including those without a website or phone"""
+        leads = []
+        with self.span('extraction', target=query):
+            try:
+                payload = extract_payload(self.driver.page_source)
+                if payload is not None:
+                    leads.extend(parse_places(payload, query, contact_only=False))
+            except ValueError:
+                pass
+            leads.extend(capture.poll())
+        
+        for _ in range(CAPTURE_SCROLLS):
+            with self.span('wait', target=query):
+                self.driver.execute_script(
+                    "var feed = document.querySelector('div[role=\"feed\"]');"
+                    "if (feed) { feed.scrollTop = feed.scrollHeight; }"
+                )
+                time.sleep(1)
+            with self.span('extraction', target=query):
+                batch = capture.poll()
+            if not batch and leads:
+                break
+            leads.extend(batch)
+        
+        return self.unique_places(leads)
+        
+    def replay_search(self, query: str, url: str):
+        """Re-run extraction on the search recorded in the cassette for url; returns (leads, result count)"""
+        try:
+            bundle = self.cassette.load('google_maps', url)
+        except CassetteMiss as e:
+            self.logger.warning(str(e))
+            return [], 0
+        
+        # HTTP engine recordings are a raw search response, parsed like a captured one
+        if self.capture_network or bundle.get('engine') == 'http':
+            leads = []
+            with self.span('extraction', target=query):
+                for body in [bundle['html']] + [body for _, body in bundle['responses']]:
+                    try:
+                        payload = extract_payload(body)
+                        if payload is not None:
+                            leads.extend(parse_places(payload, query, contact_only=False))
+                    except Exception as e:
+                        self.logger.debug(f"Could not decode recorded response: {str(e)}")
+            places = self.unique_places(leads)
+            if places:
+                captured = [lead for lead in places if has_contact(lead)]
+                self.count('leads_total', len(captured), target=query)
+                return captured, len(places)
+        
+        leads = []
+        with self.span('extraction', target=query):
+            for panel in bundle['panels']:
+                soup = BeautifulSoup(panel['html'], 'html.parser')
+                name = soup.select_one('h1.DUwDvf span')
+                if name is None:
+                    continue
+                lead_data = self.panel_lead(query, name.get_text(strip=True), panel['url'])
+                website = soup.select_one('a[data-item-id="authority"]')
+                if website is not None:
+                    lead_data['website'] = website.get('href')
+                phone = soup.select_one('button[data-tooltip="Copy phone number"]')
+                if phone is not None and phone.get('aria-label'):
+                    lead_data['phone'] = phone['aria-label'].replace('Phone:', '').strip()
+                address = soup.select_one('button[data-item-id^="address"]')
+                if address is not None:
+                    lead_data['address'] = address.get_text(' ', strip=True)
+                if has_contact(lead_data):
+                    leads.append(lead_data)
+        self.count('leads_total', len(leads), target=query)
+        return leads, bundle.get('result_count', len(bundle['panels']))
+        
+    def search_tile(self, keyword: str, tile):
+        """Places for a keyword inside one grid tile, with the number of results Maps listed for it"""
+        viewport = tile.viewport()
+        if self.http_engine:
+            with self.span('http_search', target=keyword):
+                results = self.http_engine.search_results(keyword, viewport)
+            if results is not None:
+                return results
+            self.count('browser_fallbacks_total', target=keyword)
+            self.count('retries_total', target=keyword, reason='browser_fallback')
+            # HTTP workers share this scraper's single Chrome session
+            with self._browser_lock:
+                return self.browser_search(keyword, viewport)
+        return self.browser_search(keyword, viewport)
+        
+    def scrape_grid(self, query: str, bbox=None, workers: int = None):
+        """Search "<keyword> in <location>" tile by tile over the location's bounding box"""
+        keyword, location = split_query(query)
+        if bbox is None and location:
+            bbox = Geocoder().bbox(location)
+        if bbox is None:
+            self.logger.warning(f"No area to split for {query}; running a single search")
+            return self.search_area(query)
+        
+        planner = GridPlanner(keyword, bbox)
+        extra = []
+        if self.http_engine:
+            searchers = [self.search_tile] * (workers or MAPS_HTTP_WORKERS)
+        else:
+            # One Chrome session per worker; tiles are pulled from the planner's shared queue
+            for _ in range((workers or MAPS_GRID_WORKERS) - 1):
+                worker = GoogleMapsScraper(headless=self.headless, engine=self.engine,
+                                           capture_network=self.capture_network, cassette=self.cassette)
+                worker.base_url = self.base_url
+                worker.rate_limiters = self.rate_limiters
+                extra.append(worker)
+            searchers = [self.search_tile] + [worker.search_tile for worker in extra]
+        
+        try:
+            with self.span('grid_search', target=query):
+                places = planner.run(searchers)
+        finally:
+            for worker in extra:
+                worker.cleanup()
+        
+        for lead in places:
+            lead['query'] = query
+        self.count('grid_tiles_total', planner.stats['tiles'], target=query)
+        self.count('leads_total', len(places), target=query)
+        return self.normalize_phones(places, query)
         
     def scrape(self, queries):
         """Run scraper for multiple queries"""
         all_leads = []
         
+        if self.grid:
+            for query in queries:
+                self.logger.info(f"Grid searching: {query}")
+                all_leads.extend(self.scrape_grid(query))
+            return all_leads
+        
+        if self.http_engine:
+            # HTTP searches run concurrently; browser fallbacks stay sequential
+            with ThreadPoolExecutor(max_workers=MAPS_HTTP_WORKERS) as executor:
+                results = list(executor.map(self.http_engine.search, queries))
+            for query, leads in zip(queries, results):
+                if leads is None:
+                    self.logger.info(f"Falling back to browser for query: {query}")
+                    self.count('browser_fallbacks_total', target=query)
+                    self.count('retries_total', target=query, reason='browser_fallback')
+                    leads = self.search_area_browser(query)
+                else:
+                    self.count('leads_total', len(leads), target=query)
+                all_leads.extend(self.normalize_phones(leads, query))
+            return all_leads
+        
         for query in queries:
             self.logger.info(f"Searching for: {query}")
             leads = self.search_area(query)
+            if not leads and self.watchdog.ensure(self):
+                # The search died with the browser; give it one go on the fresh session
+                self.count('retries_total', target=query, reason='rerun_after_restart')
+                leads = self.search_area(query)
             all_leads.extend(leads)
             
         return all_leads
@@ -135,3 +466,6 @@ class GoogleMapsScraper(BaseScraper):
         """Clean up resources"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
+        if self.http_engine:
+            self.http_engine.close()
@@ -0,0 +1,245 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from config import (
+    MAPS_GRID_ZOOM, MAPS_GRID_MAX_ZOOM, MAPS_TILE_SATURATION, MAPS_GEOCODE_CACHE_FILE
+)
+from .rate_limiter import host_key, rate_limiters
+
+GEOCODE_URL = "https://nominatim.openstreetmap.org/search"
+
+# A Maps viewport is about four 256px tiles wide, so a viewport showing one
+# tile of zoom z is opened at zoom z + 2
+VIEWPORT_ZOOM_OFFSET = 2
+
+# "lawyers in Houston, TX" / "plumbers near Austin"
+QUERY_PATTERN = re.compile(r'^(?P<keyword>.+?)\s+(?:in|near|around)\s+(?P<location>.+)$', re.I)
+
+# (south, west, north, east) in degrees
+BBox = Tuple[float, float, float, float]
+
+
+class Tile(NamedTuple):
+    """Web Mercator (slippy map) tile"""
+    x: int
+    y: int
+    z: int
+
+    @staticmethod
+    def lng(x: float, z: int) -> float:
+        return x / (1 << z) * 360.0 - 180.0
+
+    @staticmethod
+    def lat(y: float, z: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / (1 << z)))))
+
+    @classmethod
+    def containing(cls, lat: float, lng: float, z: int) -> 'Tile':
+        n = 1 << z
+        lat = max(min(lat, 85.0511), -85.0511)
+        x = int((lng + 180.0) / 360.0 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return cls(min(max(x, 0), n - 1), min(max(y, 0), n - 1), z)
+
+    def bounds(self) -> BBox:
+        return (self.lat(self.y + 1, self.z), self.lng(self.x, self.z),
+                self.lat(self.y, self.z), self.lng(self.x + 1, self.z))
+
+    def center(self) -> Tuple[float, float]:
+        return self.lat(self.y + 0.5, self.z), self.lng(self.x + 0.5, self.z)
+
+    def contains(self, lat: float, lng: float) -> bool:
+        south, west, north, east = self.bounds()
+        return south <= lat < north and west <= lng < east
+
+    def children(self) -> List['Tile']:
+        x, y, z = self.x * 2, self.y * 2, self.z + 1
+        return [Tile(x, y, z), Tile(x + 1, y, z), Tile(x, y + 1, z), Tile(x + 1, y + 1, z)]
+
+    def viewport(self) -> Tuple[float, float, int]:
+        """(lat, lng, zoom) of a Maps viewport covering this tile"""
+        lat, lng = self.center()
+        return lat, lng, self.z + VIEWPORT_ZOOM_OFFSET
+
+
+def tiles_for_bbox(bbox: BBox, zoom: int) -> List[Tile]:
+    """Tiles at zoom covering a bounding box, in row order"""
+    south, west, north, east = bbox
+    top_left = Tile.containing(north, west, zoom)
+    bottom_right = Tile.containing(south, east, zoom)
+    return [Tile(x, y, zoom)
+            for y in range(top_left.y, bottom_right.y + 1)
+            for x in range(top_left.x, bottom_right.x + 1)]
+
+
+def split_query(query: str) -> Tuple[str, Optional[str]]:
+    """('lawyers', 'Houston, TX') for 'lawyers in Houston, TX'; the location is None if absent"""
+    match = QUERY_PATTERN.match(query.strip())
+    if not match:
+        return query.strip(), None
+    return match.group('keyword'), match.group('location')
+
+
+def place_key(lead: Dict):
+    """Identity of a place across tiles: Maps place ID, else name + address"""
+    if lead.get('place_id'):
+        return lead['place_id']
+    return ((lead.get('name') or '').lower(), (lead.get('address') or '').lower())
+
+
+class Geocoder:
+    """Bounding boxes of place names from OpenStreetMap Nominatim, cached on disk"""
+
+    def __init__(self, cache_path: Optional[str] = MAPS_GEOCODE_CACHE_FILE, url: str = GEOCODE_URL):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.cache_path = cache_path
+        self.url = url
+        self.rate_limiters = rate_limiters
+        self._cache = None
+
+    @property
+    def cache(self) -> Dict[str, List[float]]:
+        if self._cache is None:
+            self._cache = {}
+            if self.cache_path and os.path.exists(self.cache_path):
+                with open(self.cache_path) as f:
+                    self._cache = json.load(f)
+        return self._cache
+
+    def bbox(self, location: str) -> Optional[BBox]:
+        key = ' '.join(location.lower().split())
+        if key in self.cache:
+            return tuple(self.cache[key])
+        try:
+            self.rate_limiters.acquire(host_key(self.url))
+            response = requests.get(
+                self.url,
+                params={'q': location, 'format': 'json', 'limit': 1},
+                headers={'User-Agent': 'lead-scraper-grid-planner'},
+                timeout=15
+            )
+            response.raise_for_status()
+            results = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.logger.error(f"Geocoding failed for {location}: {str(e)}")
+            return None
+        if not results:
+            self.logger.warning(f"No bounding box found for {location}")
+            return None
+        # Nominatim returns [south, north, west, east] as strings
+        south, north, west, east = (float(v) for v in results[0]['boundingbox'])
+        self.cache[key] = [south, west, north, east]
+        if self.cache_path:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.cache_path, 'w') as f:
+                json.dump(self.cache, f, indent=2)
+        return south, west, north, east
+
+
+class GridPlanner:
+    """Searches a bounding box tile by tile, subdividing tiles whose result list is saturated.
+
+    Tiles are handed to any number of workers through a shared priority queue;
+    children of tiles that produced many new places are searched first so the
+    budget goes where unseen places are. Places are deduplicated by place_key.
+    """
+
+    def __init__(self, keyword: str, bbox: BBox, zoom: int = MAPS_GRID_ZOOM,
+                 max_zoom: int = MAPS_GRID_MAX_ZOOM, saturation: int = MAPS_TILE_SATURATION):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.keyword = keyword
+        self.max_zoom = max_zoom
+        self.saturation = saturation
+        self.places = {}
+        self.stats = {'tiles': 0, 'subdivided': 0, 'failed': 0}
+        self._queue = []
+        self._seq = 0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        for tile in tiles_for_bbox(bbox, zoom):
+            self._push(tile, 0)
+
+    def _push(self, tile: Tile, priority: float):
+        heapq.heappush(self._queue, (priority, self._seq, tile))
+        self._seq += 1
+
+    def _next(self) -> Optional[Tile]:
+        with self._cond:
+            while not self._queue and self._in_flight:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            self._in_flight += 1
+            return heapq.heappop(self._queue)[2]
+
+    def record(self, tile: Tile, results: Optional[Tuple[List[Dict], int]]):
+        """Merge a tile's (leads, result count) and queue its children if the list was saturated.
+
+        The count is what Maps listed for the tile before leads without a
+        website or phone were dropped, so filtering can't hide a capped list.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self.stats['tiles'] += 1
+            if results is None:
+                self.stats['failed'] += 1
+                self._cond.notify_all()
+                return
+            leads, result_count = results
+            new = 0
+            inside = 0
+            for lead in leads:
+                key = place_key(lead)
+                if key not in self.places:
+                    self.places[key] = lead
+                    new += 1
+                lat, lng = lead.get('latitude'), lead.get('longitude')
+                if lat is None or lng is None or tile.contains(lat, lng):
+                    inside += 1
+            # A full result list means Maps capped it and there are probably more
+            # places here; results entirely outside the tile belong to neighbours
+            if result_count >= self.saturation and (inside or not leads) and tile.z < self.max_zoom:
+                self.stats['subdivided'] += 1
+                for child in tile.children():
+                    self._push(child, -new / 4)
+            self._cond.notify_all()
+
+    def _work(self, search: Callable[[str, Tile], Optional[Tuple[List[Dict], int]]]):
+        while True:
+            tile = self._next()
+            if tile is None:
+                return
+            try:
+                results = search(self.keyword, tile)
+            except Exception as e:
+                self.logger.error(f"Tile {tile} failed: {str(e)}")
+                results = None
+            self.record(tile, results)
+
+    def run(self, searchers: List[Callable[[str, Tile], Optional[Tuple[List[Dict], int]]]]) -> List[Dict]:
+        """Search every tile with one thread per searcher; returns the unique places"""
+        start = time.time()
+        threads = [threading.Thread(target=self._work, args=(search,), daemon=True) for search in searchers[1:]]
+        for thread in threads:
+            thread.start()
+        self._work(searchers[0])
+        for thread in threads:
+            thread.join()
+        minutes = max(time.time() - start, 1e-9) / 60
+        self.logger.info(
+            f"{self.keyword}: {len(self.places)} unique places from {self.stats['tiles']} tiles "
+            f"({self.stats['subdivided']} subdivided, {self.stats['failed']} failed), "
+            f"{len(self.places) / minutes / len(searchers):.1f} places per worker-minute"
+        )
+        return list(self.places.values())
@@ -0,0 +1,217 @@
+import json
+import logging
+import math
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import MAPS_HTTP_POOL_SIZE, MAPS_HTTP_TIMEOUT
+from .rate_limiter import host_key, rate_limiters
+
+SEARCH_URL = "https://www.google.com/search"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Google prefixes JSON responses with this to prevent JSON hijacking
+XSSI_PREFIX = ")]}'"
+
+APP_STATE_PATTERN = re.compile(r'window\.APP_INITIALIZATION_STATE\s*=\s*(\[.*?\]);window\.', re.S)
+
+# Positions of the lead fields inside a place array of the search payload.
+# Google does not document these; keep them in one place so they are easy to
+# update when the payload layout shifts.
+PLACE_FIELDS = {
+    'name': (11,),
+    'address': (39,),
+    'website': (7, 0),
+    'phone': (178, 0, 0),
+    'rating': (4, 7),
+    'reviews': (4, 8),
+    'place_id': (78,),
+    'latitude': (9, 2),
+    'longitude': (9, 3),
+}
+
+# Position of the result list (header, then one entry per place) in the search payload;
+# a payload that has it but no places is a search with no results
+RESULTS_PATH = (0, 1)
+
+# Screen size sent with viewport searches; results are limited to roughly
+# what would be visible on it
+VIEWPORT_SIZE = (1024, 768)
+
+
+def viewport_pb(lat: float, lng: float, zoom: int) -> str:
+    """The 'pb' search parameter that pins results to a viewport (height in meters, center)"""
+    width, height = VIEWPORT_SIZE
+    meters = height * 156543.03 * math.cos(math.radians(lat)) / (1 << zoom)
+    return f"!4m8!1m3!1d{meters:.1f}!2d{lng:.6f}!3d{lat:.6f}!3m2!1i{width}!2i{height}!4f13.1"
+
+
+def _dig(node, path):
+    for index in path:
+        if not isinstance(node, list) or index >= len(node):
+            return None
+        node = node[index]
+    return node
+
+
+def _loads_prefixed(text: str):
+    text = text.lstrip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    return json.loads(text)
+
+
+def extract_payload(text: str):
+    """Decode a search response: raw XSSI-prefixed JSON or a Maps HTML page with embedded state"""
+    if text.lstrip().startswith(XSSI_PREFIX):
+        return _loads_prefixed(text)
+
+    match = APP_STATE_PATTERN.search(text)
+    if not match:
+        return None
+    state = json.loads(match.group(1))
+
+    # The search results are embedded as an XSSI-prefixed JSON string
+    stack = [state]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, str) and node.startswith(XSSI_PREFIX):
+            try:
+                return _loads_prefixed(node)
+            except ValueError:
+                continue
+    return None
+
+
+def iter_places(payload) -> Iterator[list]:
+    """Yield the place arrays found anywhere in a decoded search payload"""
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, list):
+            continue
+        place = node[14] if len(node) > 14 else None
+        if isinstance(place, list) and isinstance(_dig(place, PLACE_FIELDS['name']), str):
+            yield place
+            continue
+        stack.extend(reversed(node))
+
+
+def _clean_website(url: Optional[str]) -> Optional[str]:
+    if url and url.startswith('/url?'):
+        return parse_qs(urlsplit(url).query).get('q', [url])[0]
+    return url
+
+
+def has_contact(lead: Dict) -> bool:
+    """Places without a website or phone aren't worth keeping as leads"""
+    return bool(lead['name'] and (lead['website'] or lead['phone']))
+
+
+def parse_places(payload, query: str, contact_only: bool = True) -> List[Dict]:
+    """Turn a decoded search payload into leads with the browser scraper's schema
+
+    contact_only=False keeps places without a website or phone, e.g. to count
+    how many results a search returned.
+    """
+    leads = []
+    for place in iter_places(payload):
+        lead_data = {
+            'name': _dig(place, PLACE_FIELDS['name']),
+            'website': _clean_website(_dig(place, PLACE_FIELDS['website'])),
+            'phone': _dig(place, PLACE_FIELDS['phone']),
+            'email': None,
+            'address': _dig(place, PLACE_FIELDS['address']),
+            'rating': _dig(place, PLACE_FIELDS['rating']),
+            'reviews': _dig(place, PLACE_FIELDS['reviews']),
+            'source': 'Google Maps',
+            'query': query,
+            'place_id': _dig(place, PLACE_FIELDS['place_id']),
+            'latitude': _dig(place, PLACE_FIELDS['latitude']),
+            'longitude': _dig(place, PLACE_FIELDS['longitude'])
+        }
+        if not contact_only or has_contact(lead_data):
+            leads.append(lead_data)
+    return leads
+
+
+class MapsHttpEngine:
+    """Browserless Google Maps search over a pooled keep-alive HTTP session.
+
+    recorder, if given, is called with (query, viewport, raw response text)
+    for every successful fetch, e.g. to archive it in a cassette.
+    """
+
+    def __init__(self, search_url: str = SEARCH_URL, pool_size: int = MAPS_HTTP_POOL_SIZE,
+                 timeout: float = MAPS_HTTP_TIMEOUT,
+                 recorder: Optional[Callable[[str, Optional[Tuple[float, float, int]], str], None]] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.search_url = search_url
+        self.timeout = timeout
+        self.recorder = recorder
+        self.rate_limiters = rate_limiters
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Language': 'en-US,en;q=0.9'
+        })
+
+    def fetch(self, query: str, viewport: Optional[Tuple[float, float, int]] = None) -> Optional[str]:
+        """Fetch the raw search response for a query, optionally limited to a (lat, lng, zoom) viewport"""
+        host = host_key(self.search_url)
+        self.rate_limiters.acquire(host)
+        params = {'tbm': 'map', 'hl': 'en', 'q': query}
+        if viewport:
+            params['pb'] = viewport_pb(*viewport)
+        response = self.session.get(self.search_url, params=params, timeout=self.timeout)
+        if response.status_code == 429 or '/sorry/' in response.url:
+            self.rate_limiters.on_throttled(host)
+            return None
+        response.raise_for_status()
+        self.rate_limiters.on_success(host)
+        if self.recorder:
+            self.recorder(query, viewport, response.text)
+        return response.text
+
+    def search(self, query: str, viewport: Optional[Tuple[float, float, int]] = None) -> Optional[List[Dict]]:
+        """Leads for a query, or None if the response can't be handled without a browser"""
+        results = self.search_results(query, viewport)
+        return results[0] if results is not None else None
+
+    def search_results(self, query: str, viewport: Optional[Tuple[float, float, int]] = None
+                       ) -> Optional[Tuple[List[Dict], int]]:
+        """search() plus the number of places Maps returned, before leads without contacts are dropped"""
+        try:
+            text = self.fetch(query, viewport)
+        except requests.RequestException as e:
+            self.logger.error(f"HTTP search failed for {query}: {str(e)}")
+            return None
+        if text is None:
+            return None
+
+        try:
+            payload = extract_payload(text)
+        except ValueError as e:
+            self.logger.warning(f"Could not decode search payload for {query}: {str(e)}")
+            return None
+        places = parse_places(payload, query, contact_only=False) if payload is not None else []
+        if not places and not isinstance(_dig(payload, RESULTS_PATH), list):
+            # Unknown layout (or a consent/interstitial page) - let the browser handle it
+            return None
+        return [lead for lead in places if has_contact(lead)], len(places)
+
+    def close(self):
+        self.session.close()
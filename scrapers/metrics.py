@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict
+
+from config import METRICS_ENABLED
+from .rate_limiter import rate_limiters
+
+# Upper bounds (seconds) of the span duration histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_NULL_SPAN = nullcontext()
+
+
+def _label_key(labels: Dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: tuple) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in key]
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Span:
+    __slots__ = ('metrics', 'key', 'start')
+
+    def __init__(self, metrics: 'Metrics', key: tuple):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics._observe(self.key, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics._incr(('errors_total', self.key[1]), 1)
+        return False
+
+
+class Metrics:
+    """Timing spans and counters for scrapers; near-free when disabled"""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._spans = {}
+            self._counters = {}
+
+    def span(self, op: str, **labels):
+        """Context manager timing one operation (navigation, wait, api_call, ...)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        labels['op'] = op
+        return _Span(self, ('span_seconds', _label_key(labels)))
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """Add to a counter such as leads_total, errors_total or retries_total"""
+        if not self.enabled:
+            return
+        self._incr((name, _label_key(labels)), value)
+
+    def _incr(self, key: tuple, value: float):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, key: tuple, seconds: float):
+        with self._lock:
+            stats = self._spans.get(key)
+            if stats is None:
+                stats = self._spans[key] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * len(BUCKETS)}
+            stats['count'] += 1
+            stats['sum'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+                    break
+
+    def prometheus_text(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            spans = dict(self._spans)
+            counters = dict(self._counters)
+
+        if spans:
+            lines.append('# TYPE scraper_span_seconds histogram')
+        for (_, key), stats in sorted(spans.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats['buckets']):
+                cumulative += count
+                lines.append(f"scraper_span_seconds_bucket{_format_labels(key + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"scraper_span_seconds_bucket{_format_labels(key + (('le', '+Inf'),))} {stats['count']}")
+            lines.append(f"scraper_span_seconds_sum{_format_labels(key)} {stats['sum']:.6f}")
+            lines.append(f"scraper_span_seconds_count{_format_labels(key)} {stats['count']}")
+
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE scraper_{name} counter")
+            for (counter, key), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f"scraper_{name}{_format_labels(key)} {value}")
+
+        limits = rate_limiters.metrics()
+        if limits:
+            lines.append('# TYPE scraper_rate_limit_rate gauge')
+            for key, stats in sorted(limits.items()):
+                lines.append(f"scraper_rate_limit_rate{_format_labels((('key', key),))} {stats['rate']:.6f}")
+            lines.append('# TYPE scraper_rate_limit_throttled_total counter')
+            for key, stats in sorted(limits.items()):
+                lines.append(f"scraper_rate_limit_throttled_total{_format_labels((('key', key),))} {stats['throttled']}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict:
+        """Per-run summary: span timings by operation and counters"""
+        with self._lock:
+            spans = dict(self._spans)
+            counters = dict(self._counters)
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(),
+            'duration_seconds': time.time() - self.started,
+            'spans': [
+                dict(key, count=stats['count'], total_seconds=stats['sum'],
+                     mean_seconds=stats['sum'] / stats['count'], max_seconds=stats['max'])
+                for (_, key), stats in sorted(spans.items())
+            ],
+            'counters': [
+                dict(key, name=name, value=value)
+                for (name, key), value in sorted(counters.items())
+            ],
+            'rate_limits': rate_limiters.metrics()
+        }
+
+    def write_prometheus(self, path: str):
+        """Write the text exposition to a file (e.g. for node_exporter's textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def write_summary(self, directory: str) -> str:
+        """Write the per-run JSON summary and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(directory, f"run_{timestamp}.json")
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def serve(self, port: int):
+        """Serve /metrics over HTTP from a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('', port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.logger.info(f"Serving metrics on http://localhost:{port}/metrics")
+        return server
+
+
+# Process-wide metrics shared by all scrapers
+metrics = Metrics()
@@ -0,0 +1,130 @@
+import base64
+import json
+import logging
+from typing import Callable, Dict, Iterator, List
+
+# Chrome capability that makes Network.* DevTools events readable through
+# driver.get_log('performance')
+PERFORMANCE_LOGGING = ('goog:loggingPrefs', {'performance': 'ALL'})
+
+MAPS_URL_PATTERNS = ('/search?tbm=map',)
+FACEBOOK_URL_PATTERNS = ('/api/graphql',)
+
+
+class NetworkCapture:
+    """Collects decoded records from XHR/fetch responses via the Chrome DevTools Protocol.
+
+    The driver must be started with PERFORMANCE_LOGGING set. decoder(url, body)
+    turns one matching response body into a list of records. If bodies is a
+    list, the raw [url, body] of every matching response is appended to it.
+    """
+
+    def __init__(self, driver, url_patterns, decoder: Callable[[str, str], List[Dict]]):
+        self.driver = driver
+        self.url_patterns = url_patterns
+        self.decoder = decoder
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._pending = {}
+        self.responses = 0
+        self.bodies = None
+
+    def start(self):
+        """Enable network events and drop anything logged before this point"""
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.get_log('performance')
+        self._pending = {}
+
+    def _events(self) -> Iterator[Dict]:
+        for entry in self.driver.get_log('performance'):
+            try:
+                yield json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+
+    def _body(self, request_id: str) -> str:
+        result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        body = result.get('body', '')
+        if result.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', 'replace')
+        return body
+
+    def poll(self) -> List[Dict]:
+        """Decode the matching responses that finished loading since the last poll"""
+        records = []
+        for event in self._events():
+            method = event.get('method')
+            params = event.get('params', {})
+            if method == 'Network.responseReceived':
+                url = params.get('response', {}).get('url', '')
+                if any(pattern in url for pattern in self.url_patterns):
+                    self._pending[params['requestId']] = url
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                url = self._pending.pop(params['requestId'])
+                try:
+                    body = self._body(params['requestId'])
+                    if self.bodies is not None:
+                        self.bodies.append([url, body])
+                    records.extend(self.decoder(url, body))
+                    self.responses += 1
+                except Exception as e:
+                    self.logger.debug(f"Could not decode response from {url}: {str(e)}")
+        return records
+
+
+def _iter_json_documents(body: str) -> Iterator:
+    """GraphQL responses are often several JSON documents separated by newlines"""
+    body = body.strip()
+    if body.startswith('for (;;);'):
+        body = body[len('for (;;);'):]
+    try:
+        yield json.loads(body)
+        return
+    except ValueError:
+        pass
+    for line in body.splitlines():
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _walk(node) -> Iterator[Dict]:
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def decode_facebook_graphql(url: str, body: str, group_url: str) -> List[Dict]:
+    """Turn group feed GraphQL responses into extraction payloads (see postprocess.process_chunk)"""
+    payloads = []
+    seen = set()
+    for document in _iter_json_documents(body):
+        for node in _walk(document):
+            if node.get('__typename') != 'Story':
+                continue
+            message = node.get('message') or {}
+            text = message.get('text') if isinstance(message, dict) else None
+            actors = node.get('actors') or []
+            if not text or not actors or node.get('id') in seen:
+                continue
+            seen.add(node.get('id'))
+            actor = actors[0]
+            payloads.append({
+                'text': text,
+                'lead': {
+                    'name': actor.get('name', ''),
+                    'profile_url': actor.get('url', ''),
+                    'content': text,
+                    'source_url': group_url,
+                    'platform': 'Facebook',
+                    'type': 'Group Post'
+                }
+            })
+    return payloads
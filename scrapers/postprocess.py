@@ -0,0 +1,129 @@
+import atexit
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from config import POSTPROCESS_WORKERS, POSTPROCESS_CHUNK_SIZE, POSTPROCESS_MAX_PENDING
+from storage.phone_index import normalize_lead
+from .base_scraper import BaseScraper
+
+
+class _Extractor(BaseScraper):
+    """BaseScraper used only for its extraction/validation helpers"""
+
+    def scrape(self) -> List[Dict]:
+        return []
+
+
+_extractor = None
+
+
+def process_chunk(source: str, payloads: List[Dict]) -> List[Dict]:
+    """Extract contacts, normalize and validate a chunk of raw payloads.
+
+    Each payload is {'text': ..., 'lead': {...}}; email/phone/website found in
+    text take precedence over the values already in lead. Only valid leads are
+    returned, already passed through format_lead_data and with phone_e164/phone_key set.
+    """
+    global _extractor
+    if _extractor is None:
+        _extractor = _Extractor()
+
+    leads = []
+    for payload in payloads:
+        text = payload.get('text') or ''
+        lead_data = dict(payload['lead'])
+        lead_data['email'] = _extractor.extract_email(text) or lead_data.get('email')
+        lead_data['phone'] = _extractor.extract_phone(text) or lead_data.get('phone')
+        lead_data['website'] = _extractor.extract_website(text) or lead_data.get('website')
+        if _extractor.validate_data(lead_data):
+            lead = _extractor.format_lead_data(lead_data)
+            lead['source'] = source
+            leads.append(normalize_lead(lead))
+    return leads
+
+
+class ExtractionPool:
+    """Process pool that runs CPU-bound extraction off the scraping thread"""
+
+    def __init__(self, workers: int = POSTPROCESS_WORKERS, chunk_size: int = POSTPROCESS_CHUNK_SIZE,
+                 max_pending: int = POSTPROCESS_MAX_PENDING):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self.logger.info(f"Starting extraction pool with {self.workers} workers")
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def batch(self, source: str) -> 'ExtractionBatch':
+        """Start a batch of payloads whose leads are attributed to source"""
+        return ExtractionBatch(self, source)
+
+    def map(self, source: str, payloads: List[Dict]) -> List[Dict]:
+        """Process all payloads and return the valid leads in order"""
+        batch = self.batch(source)
+        for payload in payloads:
+            batch.submit(payload)
+        return batch.results()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+class ExtractionBatch:
+    """Chunks payloads into the pool, blocking the producer when too many are in flight"""
+
+    def __init__(self, pool: ExtractionPool, source: str):
+        self.pool = pool
+        self.source = source
+        self._buffer = []
+        self._futures = deque()
+        self._results = []
+
+    def submit(self, payload: Dict):
+        self._buffer.append(payload)
+        if len(self._buffer) >= self.pool.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self.pool.workers <= 0:
+            self._results.extend(process_chunk(self.source, self._buffer))
+            self._buffer = []
+            return
+        # Back-pressure: wait for the oldest chunk before queueing another
+        while len(self._futures) >= self.pool.max_pending:
+            self._results.extend(self._futures.popleft().result())
+        self._futures.append(self.pool.executor.submit(process_chunk, self.source, self._buffer))
+        self._buffer = []
+
+    def results(self) -> List[Dict]:
+        """Wait for every chunk and return the leads in submission order"""
+        if not self._futures:
+            # Too small to be worth the IPC round trip
+            self._results.extend(process_chunk(self.source, self._buffer))
+            self._buffer = []
+        else:
+            self._flush()
+        while self._futures:
+            self._results.extend(self._futures.popleft().result())
+        return self._results
+
+
+# Pool shared by all scrapers in the process
+extraction_pool = ExtractionPool()
+atexit.register(extraction_pool.shutdown)
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+from config import RATE_LIMITS, YOUTUBE_DAILY_QUOTA
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than the caller allows"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers block until their tokens are available"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        if now > self._last:
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+    def acquire(self, tokens: float = 1, max_wait: float = None) -> float:
+        """Take tokens from the bucket, sleeping if needed; returns seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            # _last is in the future while a back-off pause is in effect
+            wait = max(0.0, self._last - now) + max(0.0, -self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                self._tokens += tokens
+                raise RateLimitExceeded(f"Would wait {wait:.1f}s for {tokens} tokens")
+            self.requests += 1
+            self.waited += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket whose rate follows AIMD: creep up on success, halve on throttling"""
+
+    def __init__(self, rate: float, burst: float = 1, min_rate: float = None,
+                 max_rate: float = None, increase: float = None,
+                 decrease: float = 0.5, cooldown: float = 30):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.increase = increase if increase is not None else rate / 20
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.throttled = 0
+
+    def on_success(self):
+        """Additive increase after a request went through"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after: float = None):
+        """Multiplicative decrease and a pause after a 429, captcha or quota error"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0)
+            self._last = max(self._last, now + (retry_after if retry_after is not None else self.cooldown))
+            self.throttled += 1
+
+
+class RateLimiterRegistry:
+    """Shared limiters keyed by host name or API name, configured from RATE_LIMITS"""
+
+    def __init__(self, limits: Dict[str, Dict] = RATE_LIMITS):
+        self.limits = limits
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> TokenBucket:
+        """Return the limiter for key, creating it on first use"""
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    if key == 'youtube_quota':
+                        # Daily API quota refilled evenly over 24 hours
+                        limiter = TokenBucket(YOUTUBE_DAILY_QUOTA / 86400, YOUTUBE_DAILY_QUOTA)
+                    else:
+                        limiter = AdaptiveRateLimiter(**self.limits.get(key, self.limits['default']))
+                    self._limiters[key] = limiter
+        return limiter
+
+    def acquire(self, key: str, tokens: float = 1, max_wait: float = None) -> float:
+        return self.get(key).acquire(tokens, max_wait)
+
+    def on_success(self, key: str):
+        limiter = self.get(key)
+        if isinstance(limiter, AdaptiveRateLimiter):
+            limiter.on_success()
+
+    def on_throttled(self, key: str, retry_after: float = None):
+        limiter = self.get(key)
+        if isinstance(limiter, AdaptiveRateLimiter):
+            limiter.on_throttled(retry_after)
+            self.logger.warning(f"Throttled on {key}, backing off to {limiter.rate:.3f} req/s")
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Current rate and counters for every limiter in use"""
+        return {
+            key: {
+                'rate': limiter.rate,
+                'requests': limiter.requests,
+                'waited_seconds': limiter.waited,
+                'throttled': getattr(limiter, 'throttled', 0)
+            }
+            for key, limiter in list(self._limiters.items())
+        }
+
+
+def host_key(url: str) -> str:
+    """Limiter key for a URL: its host name"""
+    return urlsplit(url).netloc.lower() or 'default'
+
+
+# Process-wide registry shared by all scrapers
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from config import (
+    ENRICH_CONCURRENCY, ENRICH_PER_HOST, ENRICH_TIMEOUT, ENRICH_MAX_PAGES, ENRICH_MAX_BYTES,
+    ENRICH_RESPECT_ROBOTS, ENRICH_USER_AGENT, ENRICH_CACHE_FILE, ENRICH_CACHE_TTL_DAYS,
+    ENRICH_FAILURE_TTL_HOURS
+)
+from .base_scraper import BaseScraper
+
+# Link text/paths that usually lead to a page with contact details, best first
+CONTACT_HINTS = ('contact', 'kontakt', 'about', 'team', 'impressum', 'imprint', 'location')
+
+LINK_PATTERN = re.compile(r'<a\s[^>]*?href\s*=\s*["\']([^"\'#]+)["\'][^>]*>(.*?)</a>', re.I | re.S)
+MAILTO_PATTERN = re.compile(r'href\s*=\s*["\']mailto:([^"\'?]+)', re.I)
+TEL_PATTERN = re.compile(r'href\s*=\s*["\']tel:([^"\']+)', re.I)
+SCRIPT_PATTERN = re.compile(r'<(script|style|noscript)\b.*?</\1>', re.I | re.S)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Regex hits that look like emails but are asset names (logo@2x.png) or placeholders
+JUNK_EMAIL_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js')
+JUNK_EMAIL_DOMAINS = ('example.com', 'domain.com', 'sentry.io', 'wixpress.com')
+
+
+def site_url(website: str) -> str:
+    """Absolute URL for a lead's website field (bare domains default to http, which redirects)"""
+    website = website.strip()
+    if '://' not in website:
+        website = 'http://' + website
+    parts = urlsplit(website)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+def bare_host(netloc: str) -> str:
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def site_key(website: str) -> str:
+    """Cache key shared by every lead pointing at the same site"""
+    parts = urlsplit(site_url(website))
+    return bare_host(parts.netloc) + parts.path.rstrip('/')
+
+
+def visible_text(html: str) -> str:
+    return TAG_PATTERN.sub(' ', SCRIPT_PATTERN.sub(' ', html))
+
+
+class WebsiteEnricher(BaseScraper):
+    """Fills missing emails/phones by crawling lead websites over pooled async HTTP"""
+
+    def __init__(self, concurrency: int = ENRICH_CONCURRENCY, per_host: int = ENRICH_PER_HOST,
+                 timeout: float = ENRICH_TIMEOUT, max_pages: int = ENRICH_MAX_PAGES,
+                 respect_robots: bool = ENRICH_RESPECT_ROBOTS, cache_path: Optional[str] = ENRICH_CACHE_FILE,
+                 cache_ttl_days: float = ENRICH_CACHE_TTL_DAYS,
+                 failure_ttl_hours: float = ENRICH_FAILURE_TTL_HOURS):
+        super().__init__()
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.respect_robots = respect_robots
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl_days * 86400
+        self.failure_ttl = failure_ttl_hours * 3600
+        self._cache = None
+        self._pages = {}
+        self._robots = {}
+
+    def scrape(self, leads: List[Dict]) -> List[Dict]:
+        """Enrich leads in place and return them"""
+        return asyncio.run(self.enrich(leads))
+
+    def load_cache(self) -> Dict[str, Dict]:
+        """Contacts found per site on earlier runs"""
+        if self._cache is None:
+            self._cache = {}
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path) as f:
+                        self._cache = json.load(f)
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Ignoring unreadable enrichment cache {self.cache_path}: {str(e)}")
+        return self._cache
+
+    def save_cache(self):
+        if not self.cache_path or self._cache is None:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    async def enrich(self, leads: List[Dict]) -> List[Dict]:
+        """Crawl each distinct website once and fill email/phone on the leads that lack them"""
+        sites = {}
+        for lead in leads:
+            if lead.get('website') and not lead.get('email'):
+                sites.setdefault(site_key(lead['website']), []).append(lead)
+        if not sites:
+            return leads
+
+        cache = self.load_cache()
+        now = time.time()
+        fresh = {
+            key: entry for key, entry in cache.items()
+            if now - entry.get('checked', 0) < (self.failure_ttl if entry.get('failed') else self.cache_ttl)
+        }
+        pending = [key for key in sites if key not in fresh]
+        self.logger.info(f"Enriching {len(sites)} websites ({len(sites) - len(pending)} cached)")
+
+        if pending:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.timeout / 2)
+            headers = {'User-Agent': ENRICH_USER_AGENT, 'Accept': 'text/html,application/xhtml+xml'}
+            # Bounds how many sites are mid-crawl so memory stays flat on long lists
+            slots = asyncio.Semaphore(self.concurrency)
+
+            async def crawl(key):
+                async with slots:
+                    return key, await self.crawl_site(session, site_url(sites[key][0]['website']))
+
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+                with self.span('enrich'):
+                    for key, contacts in await asyncio.gather(*(crawl(key) for key in pending)):
+                        if contacts is None:
+                            # Unreachable; don't try the site again on every run
+                            contacts = {'email': None, 'phone': None, 'failed': True}
+                        cache[key] = fresh[key] = dict(contacts, checked=now)
+            self._pages = {}
+            self._robots = {}
+            self.save_cache()
+
+        enriched = 0
+        for key, site_leads in sites.items():
+            contacts = fresh.get(key)
+            if not contacts:
+                continue
+            for lead in site_leads:
+                if contacts.get('email'):
+                    lead['email'] = contacts['email']
+                    enriched += 1
+                if contacts.get('phone') and not lead.get('phone'):
+                    lead['phone'] = contacts['phone']
+        self.count('enriched_total', enriched)
+        self.logger.info(f"Found emails for {enriched} of {sum(len(v) for v in sites.values())} leads")
+        return leads
+
+    async def crawl_site(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict]:
+        """Contacts from the homepage, then its contact/about pages; None if the site is unreachable"""
+        page = await self.fetch(session, url)
+        if page is None:
+            return None
+        html, final_url = page
+        contacts = self.extract_contacts(html)
+        if contacts['email']:
+            return contacts
+
+        # Relative links are relative to where redirects ended up (e.g. /en/)
+        links = self.contact_links(html, final_url)[:max(self.max_pages - 1, 0)]
+        for page in await asyncio.gather(*(self.fetch(session, link) for link in links)):
+            if not page:
+                continue
+            found = self.extract_contacts(page[0])
+            contacts['email'] = contacts['email'] or found['email']
+            contacts['phone'] = contacts['phone'] or found['phone']
+            if contacts['email'] and contacts['phone']:
+                break
+        return contacts
+
+    def extract_contacts(self, html: str) -> Dict[str, Optional[str]]:
+        """Email and phone from a page, preferring mailto:/tel: links over free text"""
+        email = None
+        for candidate in MAILTO_PATTERN.findall(html):
+            candidate = self.extract_email(candidate)
+            if candidate and self.is_valid_email(candidate):
+                email = candidate
+                break
+        text = visible_text(html)
+        if email is None:
+            candidate = self.extract_email(text)
+            if candidate and self.is_valid_email(candidate):
+                email = candidate
+
+        phone = None
+        for candidate in TEL_PATTERN.findall(html):
+            phone = self.extract_phone(candidate)
+            if phone:
+                break
+        return {
+            'email': email.lower() if email else None,
+            'phone': phone or self.extract_phone(text)
+        }
+
+    def is_valid_email(self, email: str) -> bool:
+        email = email.lower()
+        return not email.endswith(JUNK_EMAIL_SUFFIXES) and email.rsplit('@', 1)[-1] not in JUNK_EMAIL_DOMAINS
+
+    def contact_links(self, html: str, base_url: str) -> List[str]:
+        """Same-site links that look like contact/about pages, most promising first"""
+        host = bare_host(urlsplit(base_url).netloc)
+        ranked = {}
+        for href, label in LINK_PATTERN.findall(html):
+            haystack = f"{href} {visible_text(label)}".lower()
+            rank = next((i for i, hint in enumerate(CONTACT_HINTS) if hint in haystack), None)
+            if rank is None:
+                continue
+            url = urljoin(base_url, href.strip())
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or bare_host(parts.netloc) != host:
+                continue
+            url = urlunsplit((parts.scheme, parts.netloc, parts.path or '/', parts.query, ''))
+            if url != base_url and rank < ranked.get(url, len(CONTACT_HINTS)):
+                ranked[url] = rank
+        return sorted(ranked, key=ranked.get)
+
+    @staticmethod
+    async def read_body(response: aiohttp.ClientResponse, limit: int = ENRICH_MAX_BYTES) -> bytes:
+        """Response body up to limit bytes; a single content.read() only returns what is buffered"""
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk[:limit - size])
+            size += len(chunks[-1])
+            if size >= limit:
+                break
+        return b''.join(chunks)
+
+    def fetch(self, session: aiohttp.ClientSession, url: str) -> 'asyncio.Future':
+        """(HTML, URL after redirects) of a page, or None; requests for the same URL share one fetch"""
+        task = self._pages.get(url)
+        if task is None:
+            task = self._pages[url] = asyncio.ensure_future(self._fetch(session, url))
+        return task
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[Tuple[str, str]]:
+        if self.respect_robots and not await self.allowed(session, url):
+            self.count('robots_blocked_total')
+            return None
+        try:
+            async with session.get(url, allow_redirects=True, max_redirects=5) as response:
+                self.count('pages_fetched_total', status=response.status // 100 * 100)
+                if response.status != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+                    return None
+                body = await self.read_body(response)
+                return body.decode(response.charset or 'utf-8', 'replace'), str(response.url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, LookupError) as e:
+            self.logger.debug(f"Could not fetch {url}: {e.__class__.__name__} {str(e)}")
+            self.count('errors_total', op='page_fetch')
+            return None
+
+    async def allowed(self, session: aiohttp.ClientSession, url: str) -> bool:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        task = self._robots.get(origin)
+        if task is None:
+            task = self._robots[origin] = asyncio.ensure_future(self._load_robots(session, origin))
+        return (await task).can_fetch(ENRICH_USER_AGENT, url)
+
+    async def _load_robots(self, session: aiohttp.ClientSession, origin: str) -> RobotFileParser:
+        """Parse /robots.txt; missing or unreachable means allowed, 401/403 means keep out"""
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            async with session.get(parser.url, allow_redirects=True) as response:
+                if response.status == 200:
+                    body = await self.read_body(response)
+                    parser.parse(body.decode('utf-8', 'replace').splitlines())
+                elif response.status in (401, 403):
+                    parser.disallow_all = True
+                else:
+                    parser.allow_all = True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.debug(f"No robots.txt for {origin}: {str(e)}")
+            parser.allow_all = True
+        return parser
@@ -1,41 +1,88 @@
 from typing import Dict, List
 import googleapiclient.discovery
+from googleapiclient.errors import HttpError
 from .base_scraper import BaseScraper
-from config import YOUTUBE_API_KEY
+from .rate_limiter import RateLimitExceeded
+from .postprocess import extraction_pool
+from .cassette import CassetteYouTube
+from config import YOUTUBE_API_KEY, YOUTUBE_FETCH_REPLIES, YOUTUBE_REPLY_WORKERS
+from storage.target_cache import extract_video_id
 import re
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 class YouTubeScraper(BaseScraper):
-    def __init__(self):
-        super().__init__()
-        self.setup_api()
+    def __init__(self, youtube=None, fetch_replies: bool = YOUTUBE_FETCH_REPLIES,
+                 reply_workers: int = YOUTUBE_REPLY_WORKERS, cassette=None):
+        super().__init__(cassette)
+        self.fetch_replies = fetch_replies
+        self.reply_workers = reply_workers
+        self._local = threading.local()
+        if youtube is None and self.replaying:
+            youtube = CassetteYouTube(self.cassette)
+        # Pre-built (or recorded) API clients are shared by the reply threads too
+        self._shared_client = youtube is not None
+        if youtube is not None:
+            self.youtube = self.wrap_client(youtube)
+        else:
+            self.setup_api()
+    
+    def wrap_client(self, client):
+        """Archive the client's responses when recording"""
+        if self.recording:
+            return CassetteYouTube(self.cassette, client)
+        return client
+    
+    def build_client(self):
+        return self.wrap_client(googleapiclient.discovery.build(
+            "youtube", "v3", 
+            developerKey=YOUTUBE_API_KEY,
+            cache_discovery=False
+        ))
     
     def setup_api(self):
         """Initialize YouTube API client"""
         try:
-            self.youtube = googleapiclient.discovery.build(
-                "youtube", "v3", 
-                developerKey=YOUTUBE_API_KEY,
-                cache_discovery=False
-            )
+            self.youtube = self.build_client()
         except Exception as e:
             self.logger.error(f"Failed to initialize YouTube API: {str(e)}")
             raise
     
+    def reply_client(self):
+        """API client for the calling reply thread (httplib2 connections can't be shared)"""
+        if self._shared_client:
+            return self.youtube
+        client = getattr(self._local, 'youtube', None)
+        if client is None:
+            client = self._local.youtube = self.build_client()
+        return client
+    
+    def execute(self, request, cost: int = 1) -> Dict:
+        """Execute an API request under the shared rate and daily quota limiters"""
+        if self.replaying:
+            # Recorded responses cost no quota
+            with self.span('api_call', method=getattr(request, 'methodId', None)):
+                return request.execute()
+        # Fail fast instead of sleeping for hours once the daily quota is gone
+        self.throttle('youtube_quota', cost, max_wait=60)
+        self.throttle('youtube_api')
+        try:
+            with self.span('api_call', method=getattr(request, 'methodId', None)):
+                response = request.execute()
+        except HttpError as e:
+            reason = str(e)
+            if e.resp.status == 429 or 'quotaExceeded' in reason or 'rateLimitExceeded' in reason:
+                self.report_throttled('youtube_api')
+                if 'quotaExceeded' in reason:
+                    raise RateLimitExceeded(f"YouTube API quota exhausted: {reason}")
+            raise
+        self.report_success('youtube_api')
+        return response
+    
     def extract_video_id(self, url: str) -> str:
         """Extract video ID from various YouTube URL formats"""
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/|youtube\.com\/v\/)([^&\n?#]+)',
-            r'youtube\.com\/watch.*[\&\?]v=([^&\n?#]+)',
-            r'youtube\.com\/shorts\/([^&\n?#]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        return extract_video_id(url)
     
     def get_video_info(self, video_id: str) -> Dict:
         """Get basic information about the video"""
@@ -44,7 +91,7 @@ class YouTubeScraper(BaseScraper):
                 part="snippet,statistics",
                 id=video_id
             )
-            response = request.execute()
+            response = self.execute(request)
             
             if response["items"]:
                 video = response["items"][0]
@@ -54,14 +101,67 @@ class YouTubeScraper(BaseScraper):
                     "view_count": video["statistics"]["viewCount"],
                     "comment_count": video["statistics"].get("commentCount", "0")
                 }
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Error fetching video info for {video_id}: {str(e)}")
         
         return None
     
+    def comment_payload(self, comment: Dict, video_id: str, video_info: Dict,
+                        comment_type: str = "Video Comment") -> Dict:
+        """Extraction payload for a comment or reply resource"""
+        snippet = comment["snippet"]
+        
+        # Extract potential lead information
+        text = snippet["textDisplay"]
+        return {
+            "text": text,
+            "lead": {
+                "name": snippet["authorDisplayName"],
+                "website": snippet.get("authorChannelUrl", ""),
+                "comment": text,
+                "video_id": video_id,
+                "video_title": video_info["title"],
+                "channel": video_info["channel"],
+                "platform": "YouTube",
+                "type": comment_type
+            }
+        }
+    
+    def get_replies(self, thread_id: str, limit: int = None) -> List[Dict]:
+        """Replies in a comment thread (at most limit), paged through comments().list"""
+        client = self.reply_client()
+        replies = []
+        params = {"part": "snippet", "parentId": thread_id, "maxResults": min(100, limit or 100)}
+        try:
+            while True:
+                response = self.execute(client.comments().list(**params))
+                replies.extend(response["items"])
+                if limit is not None and len(replies) >= limit:
+                    del replies[limit:]
+                    break
+                if "nextPageToken" not in response:
+                    break
+                params["pageToken"] = response["nextPageToken"]
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error fetching replies for thread {thread_id}: {str(e)}")
+            self.count('errors_total', target=thread_id)
+        return replies
+    
     def get_video_comments(self, video_id: str, max_comments: int = 100) -> List[Dict]:
-        """Fetch comments from a specific YouTube video"""
+        """Fetch comments from a specific YouTube video.
+        
+        max_comments caps the leads, replies included: once it is reached no more
+        threads are listed and no more reply pages are requested.
+        """
         comments = []
+        # Extraction runs in the process pool while the next page is fetched
+        batch = extraction_pool.batch(self.__class__.__name__)
+        # Threads with more replies than commentThreads returns inline are paged here
+        executor = ThreadPoolExecutor(max_workers=self.reply_workers) if self.fetch_replies else None
         try:
             # First get video info
             video_info = self.get_video_info(video_id)
@@ -74,55 +174,71 @@ class YouTubeScraper(BaseScraper):
                 self.logger.warning(f"Comments are disabled for video {video_id}")
                 return comments
             
+            part = "snippet,replies" if self.fetch_replies else "snippet"
             request = self.youtube.commentThreads().list(
-                part="snippet",
+                part=part,
                 videoId=video_id,
                 maxResults=min(100, max_comments)  # YouTube API limit is 100 per request
             )
             
-            while request and len(comments) < max_comments:
-                response = request.execute()
+            fetched = 0
+            pending = []
+            
+            while request and fetched < max_comments:
+                response = self.execute(request)
                 
                 for item in response["items"]:
-                    comment = item["snippet"]["topLevelComment"]["snippet"]
-                    
-                    # Extract potential lead information
-                    text = comment["textDisplay"]
-                    author = comment["authorDisplayName"]
-                    channel_url = comment.get("authorChannelUrl", "")
+                    batch.submit(self.comment_payload(item["snippet"]["topLevelComment"], video_id, video_info))
+                    fetched += 1
                     
-                    lead_data = {
-                        "name": author,
-                        "email": self.extract_email(text),
-                        "phone": self.extract_phone(text),
-                        "website": self.extract_website(text) or channel_url,
-                        "comment": text,
-                        "video_id": video_id,
-                        "video_title": video_info["title"],
-                        "channel": video_info["channel"],
-                        "platform": "YouTube",
-                        "type": "Video Comment"
-                    }
+                    remaining = max_comments - fetched
+                    if self.fetch_replies and remaining > 0:
+                        inline = item.get("replies", {}).get("comments", [])
+                        total_replies = item["snippet"].get("totalReplyCount", 0)
+                        if total_replies > len(inline):
+                            # Reserve the thread's replies against the cap before paging them
+                            limit = min(total_replies, remaining)
+                            pending.append(executor.submit(self.get_replies, item["id"], limit))
+                            fetched += limit
+                        else:
+                            for reply in inline[:remaining]:
+                                batch.submit(self.comment_payload(reply, video_id, video_info, "Comment Reply"))
+                            fetched += min(len(inline), remaining)
                     
-                    if self.validate_data(lead_data):
-                        comments.append(self.format_lead_data(lead_data))
-                    
-                    if len(comments) >= max_comments:
+                    if fetched >= max_comments:
                         break
                 
                 # Get the next page of comments
-                if "nextPageToken" in response and len(comments) < max_comments:
+                if "nextPageToken" in response and fetched < max_comments:
                     request = self.youtube.commentThreads().list(
-                        part="snippet",
+                        part=part,
                         videoId=video_id,
                         pageToken=response["nextPageToken"],
-                        maxResults=min(100, max_comments - len(comments))
+                        maxResults=min(100, max_comments - fetched)
                     )
                 else:
                     break
+            
+            for future in pending:
+                for reply in future.result():
+                    batch.submit(self.comment_payload(reply, video_id, video_info, "Comment Reply"))
+            if pending:
+                self.count('reply_threads_paged_total', len(pending), target=video_id)
+            
+            with self.span('extraction', target=video_id):
+                comments = batch.results()
                     
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Error fetching comments for video {video_id}: {str(e)}")
+            self.count('errors_total', target=video_id)
+            comments = batch.results()
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+        
+        self.count('leads_total', len(comments), target=video_id)
         
         return comments
     
@@ -144,6 +260,9 @@ class YouTubeScraper(BaseScraper):
                 
                 all_leads.extend(leads)
                 
+            except RateLimitExceeded as e:
+                self.logger.error(f"Stopping YouTube scraping: {str(e)}")
+                break
             except Exception as e:
                 self.logger.error(f"Error processing video URL {url}: {str(e)}")
                 continue
@@ -1,18 +1,69 @@
+import argparse
 import os
-import tablib
+import socket
+import time
 from datetime import datetime
-from scrapers.facebook_scraper import FacebookScraper
-from scrapers.youtube_scraper import YoutubeScraper
-from scrapers.google_maps_scraper import GoogleMapsScraper
+from storage.lead_export import EXPORT_FORMATS, export_file
+from storage.delta_export import DeltaIndex
+from storage.lead_index import LeadIndex
+from storage.target_cache import TargetCache
+from scrapers.rate_limiter import rate_limiters
+from scrapers.metrics import metrics
+from scrapers.cassette import Cassette, open_cassette
+from automation.job_broker import Heartbeat, new_run_id, open_broker, shard_targets
+from config import (
+    METRICS_DIR, METRICS_PORT, ENRICH_WEBSITES,
+    BROKER_URL, BROKER_POLL_SECONDS, JOB_LEASE_SECONDS, CASSETTE_DIR, DELTA_EXPORTS,
+    LEAD_INDEX_ENABLED
+)
 import logging
-import openpyxl
 
 class ScrapingManager:
-    def __init__(self):
+    def __init__(self, cassette=None):
         self.setup_logging()
-        self.facebook_scraper = FacebookScraper()
-        self.youtube_scraper = YoutubeScraper()
-        self.google_maps_scraper = GoogleMapsScraper()
+        self._targets = {}
+        if metrics.enabled and METRICS_PORT:
+            metrics.serve(METRICS_PORT)
+        self.cassette = cassette if cassette is not None else open_cassette()
+        self._scrapers = {}
+        self.delta_index = DeltaIndex()
+        self.lead_index = LeadIndex()
+        self._facebook_logged_in = False
+        
+    # Scrapers (and Selenium, the YouTube API client, aiohttp behind them) are
+    # imported and built on first use, so a run only loads the platforms it scrapes
+    @property
+    def facebook_scraper(self):
+        if 'facebook' not in self._scrapers:
+            from scrapers.facebook_scraper import FacebookScraper
+            self._scrapers['facebook'] = FacebookScraper(cassette=self.cassette)
+        return self._scrapers['facebook']
+    
+    @property
+    def youtube_scraper(self):
+        if 'youtube' not in self._scrapers:
+            from scrapers.youtube_scraper import YouTubeScraper
+            self._scrapers['youtube'] = YouTubeScraper(cassette=self.cassette)
+        return self._scrapers['youtube']
+    
+    @property
+    def google_maps_scraper(self):
+        if 'google_maps' not in self._scrapers:
+            from scrapers.google_maps_scraper import GoogleMapsScraper
+            self._scrapers['google_maps'] = GoogleMapsScraper(cassette=self.cassette)
+        return self._scrapers['google_maps']
+    
+    @property
+    def website_enricher(self):
+        if 'enricher' not in self._scrapers:
+            from scrapers.website_enricher import WebsiteEnricher
+            self._scrapers['enricher'] = WebsiteEnricher()
+        return self._scrapers['enricher']
+    
+    @property
+    def enrich(self):
+        """Website enrichment needs the network, so replays skip it"""
+        return ENRICH_WEBSITES and not (self.cassette and self.cassette.replaying)
         
     def setup_logging(self):
         """Setup logging configuration"""
@@ -23,78 +74,209 @@ class ScrapingManager:
         self.logger = logging.getLogger(__name__)
     
     def load_targets(self, file_path='scraping_targets.xlsx'):
-        """Load scraping targets from Excel file"""
+        """Load normalized scraping targets, parsing the Excel file at most once per run"""
+        if file_path in self._targets:
+            return self._targets[file_path]
+        
         try:
-            wb = openpyxl.load_workbook(file_path)
-            
-            targets = {
-                'facebook': [],
-                'youtube': [],
-                'google_maps': []
-            }
-            
-            # Load Facebook group URLs
-            if 'Facebook' in wb.sheetnames:
-                sheet = wb['Facebook']
-                for row in sheet.iter_rows(min_row=2):
-                    if row[0].value:  # URL column
-                        targets['facebook'].append(row[0].value)
-            
-            # Load YouTube video URLs
-            if 'YouTube' in wb.sheetnames:
-                sheet = wb['YouTube']
-                for row in sheet.iter_rows(min_row=2):
-                    if row[0].value:  # URL column
-                        targets['youtube'].append(row[0].value)
-            
-            # Load Google Maps search queries
-            if 'GoogleMaps' in wb.sheetnames:
-                sheet = wb['GoogleMaps']
-                for row in sheet.iter_rows(min_row=2):
-                    if row[0].value:  # Search query column
-                        targets['google_maps'].append(row[0].value)
-            
+            targets = TargetCache(file_path).load()
+            self._targets[file_path] = targets
             return targets
             
         except Exception as e:
             self.logger.error(f"Error loading targets: {str(e)}")
             return None
     
-    def scrape_all(self):
-        """Run all scrapers and combine results"""
+    def scrape_all(self, platforms=None, file_path='scraping_targets.xlsx'):
+        """Run all scrapers (or those of the given platforms) and combine results"""
         all_leads = []
-        targets = self.load_targets()
+        targets = self.load_targets(file_path)
         
         if not targets:
-            self.logger.error("No targets loaded. Please check scraping_targets.xlsx")
+            self.logger.error(f"No targets loaded. Please check {file_path}")
             return
+        platforms = platforms or ['facebook', 'youtube', 'google_maps']
         
         # Scrape Facebook groups
-        if targets['facebook']:
+        if 'facebook' in platforms and targets['facebook']:
             self.logger.info(f"Scraping {len(targets['facebook'])} Facebook groups...")
-            facebook_leads = self.facebook_scraper.scrape(targets['facebook'])
+            with metrics.span('scrape', platform='facebook'):
+                facebook_leads = self.facebook_scraper.scrape(targets['facebook'])
             all_leads.extend(facebook_leads)
         
         # Scrape YouTube videos
-        if targets['youtube']:
+        if 'youtube' in platforms and targets['youtube']:
             self.logger.info(f"Scraping {len(targets['youtube'])} YouTube videos...")
-            youtube_leads = self.youtube_scraper.scrape(targets['youtube'])
+            with metrics.span('scrape', platform='youtube'):
+                youtube_leads = self.youtube_scraper.scrape(targets['youtube'])
             all_leads.extend(youtube_leads)
         
         # Scrape Google Maps
-        if targets['google_maps']:
+        if 'google_maps' in platforms and targets['google_maps']:
             self.logger.info(f"Scraping {len(targets['google_maps'])} Google Maps queries...")
-            maps_leads = self.google_maps_scraper.scrape(targets['google_maps'])
+            with metrics.span('scrape', platform='google_maps'):
+                maps_leads = self.google_maps_scraper.scrape(targets['google_maps'])
+            
+            # Maps listings rarely show an email; look for one on the business website
+            if self.enrich and maps_leads:
+                self.website_enricher.scrape(maps_leads)
             all_leads.extend(maps_leads)
         
+        for key, stats in rate_limiters.metrics().items():
+            self.logger.info(
+                f"Rate limit {key}: {stats['rate']:.3f} req/s, {stats['requests']} requests, "
+                f"{stats['throttled']} throttled, {stats['waited_seconds']:.1f}s waited"
+            )
+        
         return all_leads
     
-    def export_leads(self, leads, format='xlsx'):
-        """Export leads to file"""
+    def _scrape_facebook_group(self, group_url):
+        """Scrape one group, logging in on first use"""
+        if not self._facebook_logged_in:
+            self._facebook_logged_in = self.facebook_scraper.login()
+            if not self._facebook_logged_in:
+                raise RuntimeError("Facebook login failed")
+        return self.facebook_scraper.scrape_group(group_url)
+    
+    def _scrape_maps_query(self, query):
+        """Run one Maps query and fill missing emails from the business websites"""
+        leads = self.google_maps_scraper.scrape([query])
+        if self.enrich and leads:
+            self.website_enricher.scrape(leads)
+        return leads
+    
+    def target_runners(self):
+        """Platform -> function scraping a single target"""
+        return {
+            'facebook': self._scrape_facebook_group,
+            'youtube': lambda video_url: self.youtube_scraper.scrape([video_url]),
+            'google_maps': self._scrape_maps_query
+        }
+    
+    def run_coordinator(self, broker, wait=True):
+        """Shard the targets into a new run of jobs; with wait, block until they are done and return the run's leads"""
+        targets = self.load_targets()
+        if not targets:
+            self.logger.error("No targets loaded. Please check scraping_targets.xlsx")
+            return None
+        
+        run = new_run_id()
+        jobs = shard_targets({platform: targets[platform] for platform in self.target_runners()}, run)
+        added = broker.enqueue(jobs)
+        self.logger.info(f"Queued {added} new jobs for run {run} ({len(jobs) - added} already known)")
+        if not wait:
+            return None
+        
+        while not broker.finished():
+            self.logger.info(f"Jobs: {broker.counts()}")
+            time.sleep(BROKER_POLL_SECONDS)
+        
+        counts = broker.counts()
+        if counts.get('dead'):
+            self.logger.warning(f"{counts['dead']} jobs failed permanently")
+        return list(broker.iter_results(job['id'] for job in jobs))
+    
+    def run_worker(self, broker, worker_id=None, exit_when_idle=True):
+        """Claim and run jobs until the queue is drained (or forever without exit_when_idle)"""
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        runners = self.target_runners()
+        jobs_run = 0
+        self.logger.info(f"Worker {worker_id} started")
+        try:
+            while True:
+                job = broker.claim(worker_id, JOB_LEASE_SECONDS)
+                if job is None:
+                    if exit_when_idle and broker.finished():
+                        break
+                    time.sleep(BROKER_POLL_SECONDS)
+                    continue
+                self.run_job(broker, job, worker_id, runners[job['platform']])
+                jobs_run += 1
+        finally:
+            if self._facebook_logged_in:
+                self.facebook_scraper.cleanup()
+                self._facebook_logged_in = False
+        self.logger.info(f"Worker {worker_id} finished after {jobs_run} jobs")
+        return jobs_run
+    
+    def run_job(self, broker, job, worker_id, runner):
+        """Scrape a job's targets, streaming each target's leads to the lead store"""
+        self.logger.info(f"Running job {job['id']} ({len(job['targets'])} {job['platform']} targets, "
+                         f"attempt {job.get('attempts', 0) + 1})")
+        with Heartbeat(broker, job['id'], worker_id) as heartbeat:
+            try:
+                for target in job['targets']:
+                    if heartbeat.lost.is_set():
+                        break
+                    with metrics.span('scrape', platform=job['platform']):
+                        leads = runner(target)
+                    broker.add_results(job['id'], worker_id, leads)
+                    metrics.incr('leads_total', len(leads), platform=job['platform'])
+            except Exception as e:
+                self.logger.error(f"Job {job['id']} failed: {str(e)}")
+                metrics.incr('errors_total', platform=job['platform'])
+                broker.fail(job['id'], worker_id, str(e))
+                if job.get('attempts', 0) + 1 < broker.max_attempts:
+                    metrics.incr('retries_total', platform=job['platform'], reason='job_requeued')
+                return False
+        
+        if heartbeat.lost.is_set():
+            # Another worker owns the job now; its results are deduplicated in the store
+            self.logger.warning(f"Lost the lease on job {job['id']}")
+            return False
+        broker.complete(job['id'], worker_id)
+        return True
+    
+    def write_metrics(self):
+        """Write the run's JSON summary and Prometheus text file to METRICS_DIR"""
+        if not metrics.enabled:
+            return
+        summary_path = metrics.write_summary(METRICS_DIR)
+        metrics.write_prometheus(os.path.join(METRICS_DIR, 'scraper.prom'))
+        self.logger.info(f"Run metrics written to {summary_path}")
+    
+    def index_leads(self, leads):
+        """Add the run's leads to the local full-text index (storage/lead_index.py)"""
+        if not leads:
+            return 0
+        with metrics.span('index_leads'):
+            return self.lead_index.add(leads)
+    
+    def export_leads(self, leads, format='xlsx', delta=DELTA_EXPORTS):
+        """Export leads to file; with delta, only those new or changed since the last export"""
         if not leads:
             self.logger.warning("No leads to export")
             return
         
+        plan = None
+        if delta:
+            plan = self.delta_index.plan(f"leads.{format}", leads)
+            leads = plan.records
+            if not leads:
+                self.logger.info(f"No new or changed leads to export as {format}")
+                self.delta_index.commit(plan, None, format)
+                return None
+        
+        with metrics.span('export', format=format):
+            filename = self._export_leads(leads, format)
+        if filename:
+            if plan:
+                self.delta_index.commit(plan, filename, format)
+            metrics.incr('exported_leads_total', len(leads), format=format)
+        return filename
+    
+    def _export_leads(self, leads, format):
+        """Write leads in the given format and return the filename"""
+        # Columnar and JSONL formats stream straight from the lead dicts
+        if format in EXPORT_FORMATS:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'leads_{timestamp}.{format}'
+            export_file(leads, filename, format)
+            self.logger.info(f"Exported {len(leads)} leads to {filename}")
+            return filename
+        
+        import tablib
+        
         # Create dataset
         headers = ['name', 'email', 'phone', 'website', 'profile_url', 'content', 
                   'source_url', 'platform', 'type']
@@ -127,16 +309,48 @@ class ScrapingManager:
         elif format == 'csv':
             with open(filename, 'w', encoding='utf-8') as f:
                 f.write(dataset.export('csv'))
+        else:
+            self.logger.error(f"Unsupported export format: {format}")
+            return None
         
         self.logger.info(f"Exported {len(leads)} leads to {filename}")
         return filename
 
 def main():
-    manager = ScrapingManager()
-    leads = manager.scrape_all()
+    parser = argparse.ArgumentParser(description="Scrape all targets locally or across several machines")
+    parser.add_argument('--mode', choices=['local', 'coordinator', 'worker'], default='local')
+    parser.add_argument('--broker', default=BROKER_URL, help="sqlite:///path/jobs.db or file:///shared/dir")
+    parser.add_argument('--no-wait', action='store_true', help="coordinator: queue jobs and exit")
+    parser.add_argument('--keep-alive', action='store_true', help="worker: keep polling when the queue is empty")
+    parser.add_argument('--cassette', choices=['record', 'replay'],
+                        help="record raw pages/API responses, or re-run extraction from them offline")
+    parser.add_argument('--cassette-dir', default=CASSETTE_DIR)
+    parser.add_argument('--delta', action=argparse.BooleanOptionalAction, default=DELTA_EXPORTS,
+                        help="export only leads that are new or changed since the last export (--no-delta: all)")
+    parser.add_argument('--no-index', dest='index', action='store_false', default=LEAD_INDEX_ENABLED,
+                        help="don't add the run's leads to the local search index")
+    args = parser.parse_args()
+    
+    manager = ScrapingManager(Cassette(args.cassette_dir, args.cassette) if args.cassette else None)
+    if args.mode == 'local':
+        leads = manager.scrape_all()
+    else:
+        broker = open_broker(args.broker)
+        try:
+            if args.mode == 'coordinator':
+                leads = manager.run_coordinator(broker, wait=not args.no_wait)
+            else:
+                manager.run_worker(broker, exit_when_idle=not args.keep_alive)
+                leads = None
+        finally:
+            broker.close()
+    
     if leads:
-        manager.export_leads(leads, 'xlsx')
-        manager.export_leads(leads, 'csv')
+        if args.index:
+            manager.index_leads(leads)
+        manager.export_leads(leads, 'xlsx', delta=args.delta)
+        manager.export_leads(leads, 'csv', delta=args.delta)
+    manager.write_metrics()
 
 if __name__ == "__main__":
     main()
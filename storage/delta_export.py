@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from config import DELTA_INDEX_FILE, DELTA_MANIFEST_DIR
+from storage.lead_export import flatten_lead, row_fingerprint
+
+# What makes two scrapes the same lead when Maps gives no place ID: the
+# business (name + address) or the post/comment (author + where + text)
+IDENTITY_FIELDS = ['platform', 'source', 'name', 'address', 'profile_url', 'source_url',
+                   'video_id', 'content', 'comment']
+
+# Identities per SELECT; SQLite caps the number of bound parameters
+LOOKUP_CHUNK = 500
+
+
+def lead_identity(lead: Dict, row: Dict = None) -> str:
+    """Stable ID of a lead across runs; its contact fields may change, the ID doesn't"""
+    place_id = lead.get('place_id') or (lead.get('raw_data') or {}).get('place_id')
+    if place_id:
+        key = f"place\x1f{place_id}"
+    else:
+        row = row or flatten_lead(lead)
+        key = '\x1f'.join(' '.join(str(row[field] or '').lower().split()) for field in IDENTITY_FIELDS)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class DeltaPlan(NamedTuple):
+    """Leads of one export that are new or changed since the stream's last export"""
+    stream: str
+    records: List[Dict]  # new leads first, then changed ones
+    new: List[str]
+    changed: List[str]
+    unchanged: int
+    fingerprints: Dict[str, str]
+
+
+class DeltaIndex:
+    """Persistent identity -> fingerprint index of exported leads, one series per export stream.
+
+    plan() picks the leads to write; once the caller has written plan.records,
+    commit() records them in the index and writes a numbered manifest. A crash
+    in between means the same leads are exported again, never that they are lost.
+    """
+
+    def __init__(self, path: str = DELTA_INDEX_FILE, manifest_dir: str = DELTA_MANIFEST_DIR):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.manifest_dir = manifest_dir
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS exported (
+                    stream TEXT NOT NULL,
+                    identity TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    exported_at REAL NOT NULL,
+                    PRIMARY KEY (stream, identity)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS exports (
+                    stream TEXT NOT NULL,
+                    sequence INTEGER NOT NULL,
+                    manifest TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (stream, sequence)
+                );
+            """)
+            self._db = db
+        return self._db
+
+    def _known(self, stream: str, identities: List[str]) -> Dict[str, str]:
+        known = {}
+        for start in range(0, len(identities), LOOKUP_CHUNK):
+            chunk = identities[start:start + LOOKUP_CHUNK]
+            rows = self.db.execute(
+                f"SELECT identity, fingerprint FROM exported WHERE stream = ? "
+                f"AND identity IN ({','.join('?' * len(chunk))})",
+                [stream] + chunk
+            )
+            known.update(rows)
+        return known
+
+    def plan(self, stream: str, leads: Iterable[Dict]) -> DeltaPlan:
+        """Split leads into new / changed / unchanged against the stream's index"""
+        latest = {}
+        fingerprints = {}
+        for lead in leads:
+            row = flatten_lead(lead)
+            identity = lead_identity(lead, row)
+            # A lead scraped twice in one run is exported once, as last seen
+            latest[identity] = lead
+            fingerprints[identity] = row_fingerprint(row)
+        known = self._known(stream, list(latest))
+
+        new = [identity for identity in latest if identity not in known]
+        changed = [identity for identity in latest
+                   if identity in known and known[identity] != fingerprints[identity]]
+        return DeltaPlan(
+            stream=stream,
+            records=[latest[identity] for identity in new + changed],
+            new=new,
+            changed=changed,
+            unchanged=len(latest) - len(new) - len(changed),
+            fingerprints={identity: fingerprints[identity] for identity in new + changed}
+        )
+
+    def commit(self, plan: DeltaPlan, filename: Optional[str], format: str = None) -> Dict:
+        """Mark the plan's leads as exported and write its manifest; returns the manifest"""
+        now = time.time()
+        db = self.db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute('SELECT MAX(sequence), manifest FROM exports WHERE stream = ?',
+                             (plan.stream,)).fetchone()
+            sequence = (row[0] or 0) + 1
+            manifest_path = os.path.join(self.manifest_dir, f"{plan.stream}.{sequence:06d}.json")
+            manifest = {
+                'stream': plan.stream,
+                'sequence': sequence,
+                'created_at': datetime.fromtimestamp(now).isoformat(timespec='seconds'),
+                'file': filename,
+                'format': format,
+                'previous': row[1],
+                'counts': {
+                    'new': len(plan.new),
+                    'changed': len(plan.changed),
+                    'unchanged': plan.unchanged,
+                    'written': len(plan.records) if filename else 0
+                },
+                # Lead IDs in the order their records appear in the file
+                'new': plan.new,
+                'changed': plan.changed
+            }
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            tmp = manifest_path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp, manifest_path)
+
+            db.executemany(
+                'INSERT OR REPLACE INTO exported (stream, identity, fingerprint, exported_at) VALUES (?, ?, ?, ?)',
+                [(plan.stream, identity, fingerprint, now) for identity, fingerprint in plan.fingerprints.items()]
+            )
+            db.execute('INSERT INTO exports (stream, sequence, manifest, created_at) VALUES (?, ?, ?, ?)',
+                       (plan.stream, sequence, manifest_path, now))
+        self.logger.info(
+            f"{plan.stream} #{sequence}: {len(plan.new)} new, {len(plan.changed)} changed, "
+            f"{plan.unchanged} unchanged -> {manifest_path}"
+        )
+        return manifest
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,185 @@
+import csv
+import gzip
+import hashlib
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Fixed column layout shared by every exporter. Scrapers produce slightly
+# different dicts (format_lead_data nests the original fields in raw_data),
+# so rows are flattened onto this schema before writing.
+LEAD_FIELDS = [
+    'name', 'email', 'phone', 'phone_e164', 'phone_key', 'website', 'profile_url',
+    'content', 'comment', 'address', 'rating', 'reviews', 'query', 'video_id', 'video_title',
+    'channel', 'source_url', 'platform', 'source', 'type'
+]
+
+# Low-cardinality columns stored as dictionary-encoded strings in Parquet
+DICTIONARY_FIELDS = ['platform', 'source', 'type']
+
+EXPORT_FORMATS = ['parquet', 'jsonl', 'jsonl.gz', 'jsonl.zst']
+
+PARQUET_BATCH_SIZE = 50000
+
+
+def flatten_lead(lead: Dict) -> Dict:
+    """Map a scraped lead onto LEAD_FIELDS, falling back to raw_data"""
+    raw = lead.get('raw_data') or {}
+    row = {}
+    for field in LEAD_FIELDS:
+        value = lead.get(field)
+        if value in (None, ''):
+            value = raw.get(field)
+        row[field] = value
+    return row
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(str(value).replace(',', '')) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def lead_schema():
+    """Arrow schema used for Parquet exports"""
+    import pyarrow as pa
+
+    fields = []
+    for name in LEAD_FIELDS:
+        if name == 'rating':
+            fields.append(pa.field(name, pa.float64()))
+        elif name in ('reviews', 'phone_key'):
+            fields.append(pa.field(name, pa.int64()))
+        elif name in DICTIONARY_FIELDS:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _record_batch(rows: List[Dict], schema):
+    import pyarrow as pa
+
+    columns = []
+    for field in schema:
+        values = [row[field.name] for row in rows]
+        if field.name == 'rating':
+            values = [_to_float(v) for v in values]
+        elif field.name in ('reviews', 'phone_key'):
+            values = [_to_int(v) for v in values]
+        else:
+            values = [str(v) if v not in (None, '') else None for v in values]
+        if pa.types.is_dictionary(field.type):
+            columns.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            columns.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def write_parquet(leads: Iterable[Dict], path: str, compression: str = 'zstd',
+                  batch_size: int = PARQUET_BATCH_SIZE) -> int:
+    """Write leads to a Parquet file in row-group sized batches"""
+    import pyarrow.parquet as pq
+
+    schema = lead_schema()
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema, compression=compression,
+                          use_dictionary=DICTIONARY_FIELDS) as writer:
+        for lead in leads:
+            batch.append(flatten_lead(lead))
+            if len(batch) >= batch_size:
+                writer.write_batch(_record_batch(batch, schema))
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            writer.write_batch(_record_batch(batch, schema))
+            count += len(batch)
+    return count
+
+
+def read_parquet(path: str) -> List[Dict]:
+    """Read a Parquet lead export back into a list of dicts"""
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path).to_pylist()
+
+
+def open_jsonl(path: str, mode: str = 'rt'):
+    """Open a JSONL file, picking gzip/zstd compression from the extension"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8', compresslevel=6)
+    if path.endswith('.zst'):
+        import zstandard
+
+        return zstandard.open(path, mode, encoding='utf-8')
+    return open(path, mode.replace('t', ''), encoding='utf-8')
+
+
+def write_jsonl(leads: Iterable[Dict], path: str) -> int:
+    """Stream leads to a (optionally compressed) JSON Lines file"""
+    count = 0
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+    with open_jsonl(path, 'wt') as f:
+        for lead in leads:
+            f.write(encoder.encode(lead))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Iterate over leads stored in a JSON Lines file"""
+    with open_jsonl(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_leads(path: str) -> Iterator[Dict]:
+    """Iterate over the leads of any export: .json, .jsonl[.gz|.zst], .parquet or .csv"""
+    if path.endswith('.parquet'):
+        yield from read_parquet(path)
+    elif path.endswith(('.jsonl', '.jsonl.gz', '.jsonl.zst')):
+        yield from read_jsonl(path)
+    elif path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+    elif path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    else:
+        raise ValueError(f"Unsupported lead file: {path}")
+
+
+def export_file(leads: Iterable[Dict], path: str, format: str) -> int:
+    """Write leads to path using one of EXPORT_FORMATS"""
+    if format == 'parquet':
+        return write_parquet(leads, path)
+    if format in ('jsonl', 'jsonl.gz', 'jsonl.zst'):
+        return write_jsonl(leads, path)
+    raise ValueError(f"Unsupported export format: {format}")
+
+
+FINGERPRINT_FIELDS = ['name', 'email', 'phone', 'website', 'profile_url', 'content', 'comment', 'source_url']
+
+
+def lead_fingerprint(lead: Dict) -> str:
+    """Short stable hash of a lead's normalized contact fields"""
+    return row_fingerprint(flatten_lead(lead))
+
+
+def row_fingerprint(row: Dict) -> str:
+    """lead_fingerprint of an already flattened lead"""
+    parts = [' '.join(str(row[field] or '').lower().split()) for field in FINGERPRINT_FIELDS]
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
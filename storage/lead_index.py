@@ -0,0 +1,299 @@
+"""Full-text searchable lead store on SQLite FTS5.
+
+    python -m storage.lead_index ingest leads_20240101_120000.jsonl.zst data/leads_youtube_*.json
+    python -m storage.lead_index search roofing --platform facebook --has-phone
+    python -m storage.lead_index stats
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import LEAD_INDEX_FILE
+from storage.lead_export import LEAD_FIELDS, _to_float, _to_int, flatten_lead, read_leads
+from storage.delta_export import lead_identity
+from storage.phone_index import phone_key
+
+# Structured columns; content/comment go into the full-text `text` column
+COLUMNS = [field for field in LEAD_FIELDS if field not in ('content', 'comment')] + ['text']
+NUMERIC_COLUMNS = {'rating': 'REAL', 'reviews': 'INTEGER', 'phone_key': 'INTEGER'}
+TEXT_COLUMNS = [field for field in LEAD_FIELDS if field not in NUMERIC_COLUMNS]
+
+TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS leads_ai AFTER INSERT ON leads BEGIN
+        INSERT INTO leads_fts (rowid, name, text) VALUES (new.id, new.name, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS leads_ad AFTER DELETE ON leads BEGIN
+        INSERT INTO leads_fts (leads_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS leads_au AFTER UPDATE ON leads BEGIN
+        INSERT INTO leads_fts (leads_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO leads_fts (rowid, name, text) VALUES (new.id, new.name, new.text);
+    END;
+"""
+
+# Words (with an optional trailing * for prefix search) in a free-text query
+TERM_PATTERN = re.compile(r'[\w@.+-]+\*?', re.UNICODE)
+
+INGEST_BATCH_SIZE = 10000
+
+
+def fts_query(text: str) -> str:
+    """FTS5 MATCH expression for a free-text query: every word must appear, `roof*` matches prefixes"""
+    terms = []
+    for term in TERM_PATTERN.findall(text):
+        prefix = term.endswith('*')
+        word = term.rstrip('*').replace('"', '')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def lead_row(lead: Dict) -> Dict:
+    """Column values for a lead, plus its ID and a hash of the values"""
+    flat = flatten_lead(lead)
+    row = {field: str(flat[field]) if flat[field] not in (None, '') else None for field in TEXT_COLUMNS}
+    row['text'] = row['content'] or row['comment']
+    # Maps leads carry their origin in `source` only
+    row['platform'] = row['platform'] or row['source']
+    row['rating'] = _to_float(flat['rating'])
+    row['reviews'] = _to_int(flat['reviews'])
+    row['phone_key'] = _to_int(flat['phone_key'])
+    if row['phone_key'] is None and row['phone']:
+        row['phone_key'] = phone_key(row['phone'])
+    row['lead_id'] = lead_identity(lead, flat)
+    row['fingerprint'] = hashlib.blake2b(
+        repr([row[field] for field in COLUMNS]).encode('utf-8'), digest_size=8
+    ).hexdigest()
+    return row
+
+
+class LeadIndex:
+    """Local lead store with an FTS5 index over names and post/comment text.
+
+    add() upserts incrementally (unchanged leads are skipped); bulk_load() is
+    for large initial loads and rebuilds the full-text index once at the end.
+    """
+
+    def __init__(self, path: str = LEAD_INDEX_FILE):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            # Upserts touch random pages of the lead_id index
+            db.execute('PRAGMA cache_size=-65536')
+            columns = ', '.join(f"{field} {NUMERIC_COLUMNS.get(field, 'TEXT')}" for field in COLUMNS)
+            db.executescript(f"""
+                CREATE TABLE IF NOT EXISTS leads (
+                    id INTEGER PRIMARY KEY,
+                    lead_id TEXT NOT NULL UNIQUE,
+                    fingerprint TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    {columns}
+                );
+                CREATE INDEX IF NOT EXISTS leads_platform ON leads (platform COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS leads_phone_key ON leads (phone_key);
+                CREATE INDEX IF NOT EXISTS leads_email ON leads (email);
+                CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5 (
+                    name, text, content='leads', content_rowid='id', tokenize='porter unicode61'
+                );
+            """)
+            db.executescript(TRIGGERS)
+            self._db = db
+        return self._db
+
+    def _upsert(self, leads: Iterable[Dict], batch_size: int = INGEST_BATCH_SIZE) -> int:
+        fields = ['lead_id', 'fingerprint', 'updated_at'] + COLUMNS
+        sql = (
+            f"INSERT INTO leads ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))}) "
+            f"ON CONFLICT (lead_id) DO UPDATE SET "
+            f"{', '.join(f'{field} = excluded.{field}' for field in fields[1:])} "
+            f"WHERE leads.fingerprint != excluded.fingerprint"
+        )
+        db = self.db
+        changed = 0
+        batch = []
+
+        def flush():
+            nonlocal changed
+            with db:
+                db.execute('BEGIN')
+                changed += db.executemany(sql, batch).rowcount
+
+        now = time.time()
+        for lead in leads:
+            row = lead_row(lead)
+            row['updated_at'] = now
+            batch.append([row[field] for field in fields])
+            if len(batch) >= batch_size:
+                flush()
+                batch = []
+        if batch:
+            flush()
+        return changed
+
+    def add(self, leads: Iterable[Dict]) -> int:
+        """Insert new leads and update changed ones; returns how many rows were written"""
+        changed = self._upsert(leads)
+        self.logger.info(f"Indexed {changed} new or changed leads in {self.path}")
+        return changed
+
+    def bulk_load(self, leads: Iterable[Dict]) -> int:
+        """add() for large loads: per-row full-text updates are replaced by one rebuild"""
+        db = self.db
+        db.executescript("DROP TRIGGER IF EXISTS leads_ai; DROP TRIGGER IF EXISTS leads_ad; "
+                         "DROP TRIGGER IF EXISTS leads_au;")
+        try:
+            changed = self._upsert(leads, batch_size=INGEST_BATCH_SIZE * 5)
+        finally:
+            start = time.time()
+            db.execute("INSERT INTO leads_fts (leads_fts) VALUES ('rebuild')")
+            db.executescript(TRIGGERS)
+            self.logger.info(f"Rebuilt full-text index in {time.time() - start:.1f}s")
+        self.logger.info(f"Bulk loaded {changed} new or changed leads into {self.path}")
+        return changed
+
+    def _where(self, platform: str = None, type: str = None, has_phone: bool = None,
+               has_email: bool = None, phone: str = None, query: str = None):
+        clauses, params = [], []
+        if platform:
+            clauses.append('leads.platform = ? COLLATE NOCASE')
+            params.append(platform)
+        if type:
+            clauses.append('leads.type = ? COLLATE NOCASE')
+            params.append(type)
+        if has_phone is not None:
+            clauses.append('leads.phone IS NOT NULL' if has_phone else 'leads.phone IS NULL')
+        if has_email is not None:
+            clauses.append('leads.email IS NOT NULL' if has_email else 'leads.email IS NULL')
+        if phone:
+            clauses.append('leads.phone_key = ?')
+            params.append(phone_key(phone) if not isinstance(phone, int) else phone)
+        if query:
+            clauses.append('leads_fts MATCH ?')
+            params.append(query)
+        return clauses, params
+
+    def search(self, text: str = None, platform: str = None, type: str = None,
+               has_phone: bool = None, has_email: bool = None, phone: str = None,
+               limit: int = 50, offset: int = 0, raw: bool = False, order: str = 'rank') -> List[Dict]:
+        """Leads matching all given filters, best full-text matches first (newest first without text).
+
+        text is a free-text query (all words, `word*` for prefixes); raw=True
+        passes it to FTS5 unchanged (AND/OR/NEAR, column filters). Ranking has
+        to score every match, so for terms in a large share of the index
+        order='recent' (newest matches first, stops at limit) is much faster.
+        """
+        query = (text if raw else fts_query(text)) if text else None
+        if text and not query:
+            # Nothing searchable left (e.g. only punctuation); don't fall back to every lead
+            return []
+        clauses, params = self._where(platform, type, has_phone, has_email, phone, query)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        if query:
+            sql = (f"SELECT leads.*, snippet(leads_fts, 1, '[', ']', '...', 12) AS snippet "
+                   f"FROM leads_fts JOIN leads ON leads.id = leads_fts.rowid {where} "
+                   f"ORDER BY {'leads_fts.rank' if order == 'rank' else 'leads_fts.rowid DESC'} "
+                   f"LIMIT ? OFFSET ?")
+        else:
+            sql = f"SELECT leads.* FROM leads {where} ORDER BY leads.id DESC LIMIT ? OFFSET ?"
+        return [dict(row) for row in self.db.execute(sql, params + [limit, offset])]
+
+    def count(self, text: str = None, platform: str = None, type: str = None,
+              has_phone: bool = None, has_email: bool = None, phone: str = None, raw: bool = False) -> int:
+        query = (text if raw else fts_query(text)) if text else None
+        if text and not query:
+            return 0
+        clauses, params = self._where(platform, type, has_phone, has_email, phone, query)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        source = 'leads_fts JOIN leads ON leads.id = leads_fts.rowid' if query else 'leads'
+        return self.db.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+
+    def stats(self) -> Dict:
+        db = self.db
+        by_platform = db.execute(
+            "SELECT COALESCE(platform, '?') AS origin, COUNT(*) FROM leads GROUP BY origin ORDER BY 2 DESC"
+        ).fetchall()
+        return {
+            'leads': db.execute('SELECT COUNT(*) FROM leads').fetchone()[0],
+            'with_phone': db.execute('SELECT COUNT(*) FROM leads WHERE phone IS NOT NULL').fetchone()[0],
+            'with_email': db.execute('SELECT COUNT(*) FROM leads WHERE email IS NOT NULL').fetchone()[0],
+            'by_platform': {origin: count for origin, count in by_platform},
+            'size_mb': round(os.path.getsize(self.path) / (1024 * 1024), 1) if os.path.exists(self.path) else 0
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=LEAD_INDEX_FILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="index lead exports (.json, .jsonl[.gz|.zst], .parquet, .csv)")
+    ingest.add_argument('paths', nargs='+')
+    ingest.add_argument('--bulk', action='store_true', help="rebuild the full-text index once at the end")
+
+    search = commands.add_parser('search', help="query the index")
+    search.add_argument('text', nargs='*')
+    search.add_argument('--platform')
+    search.add_argument('--type')
+    search.add_argument('--phone', help="leads with this number, in any format")
+    search.add_argument('--has-phone', action='store_true', default=None)
+    search.add_argument('--has-email', action='store_true', default=None)
+    search.add_argument('--raw', action='store_true', help="pass the text to FTS5 unchanged")
+    search.add_argument('--recent', action='store_true', help="newest matches first instead of best")
+    search.add_argument('--limit', type=int, default=20)
+    search.add_argument('--json', action='store_true', help="print one JSON object per lead")
+
+    commands.add_parser('stats', help="lead counts")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    index = LeadIndex(args.db)
+    try:
+        if args.command == 'ingest':
+            leads = (lead for path in args.paths for lead in read_leads(path))
+            (index.bulk_load if args.bulk else index.add)(leads)
+        elif args.command == 'search':
+            filters = dict(platform=args.platform, type=args.type, has_phone=args.has_phone,
+                           has_email=args.has_email, phone=args.phone, raw=args.raw)
+            start = time.perf_counter()
+            text = ' '.join(args.text) or None
+            results = index.search(text, limit=args.limit, order='recent' if args.recent else 'rank', **filters)
+            total = index.count(text, **filters)
+            elapsed = (time.perf_counter() - start) * 1000
+            for lead in results:
+                if args.json:
+                    print(json.dumps(lead, ensure_ascii=False))
+                else:
+                    text = lead.get('snippet') or (lead['text'] or '')[:80]
+                    print(f"{lead['platform'] or '?':<12} {lead['name'] or '':<30.30} "
+                          f"{lead['phone'] or '':<16} {lead['email'] or '':<30.30} {text}")
+            print(f"{len(results)} of {total} leads ({elapsed:.1f} ms)")
+        else:
+            print(json.dumps(index.stats(), indent=2))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import phonenumbers
+
+from config import DEFAULT_PHONE_REGION, PHONE_PARSE_CACHE_SIZE
+
+US_STATES = {
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA',
+    'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM',
+    'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA',
+    'WV', 'WI', 'WY', 'PR'
+}
+CA_PROVINCES = {'AB', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT'}
+
+# Country names as they appear at the end of Maps queries/addresses -> region code
+COUNTRY_NAMES = {
+    'usa': 'US', 'us': 'US', 'united states': 'US', 'canada': 'CA', 'uk': 'GB',
+    'united kingdom': 'GB', 'england': 'GB', 'scotland': 'GB', 'wales': 'GB', 'ireland': 'IE',
+    'australia': 'AU', 'new zealand': 'NZ', 'india': 'IN', 'germany': 'DE', 'deutschland': 'DE',
+    'france': 'FR', 'spain': 'ES', 'españa': 'ES', 'italy': 'IT', 'italia': 'IT',
+    'netherlands': 'NL', 'mexico': 'MX', 'méxico': 'MX', 'brazil': 'BR', 'brasil': 'BR',
+    'south africa': 'ZA', 'philippines': 'PH', 'singapore': 'SG', 'united arab emirates': 'AE', 'uae': 'AE'
+}
+
+# "Houston, TX", "Houston, TX 77002", "Toronto, ON M5V 2T6"
+STATE_PATTERN = re.compile(r'\b([A-Z]{2})(?:\s+[A-Z0-9]{3}\s?[A-Z0-9]{3}|\s+\d{5}(?:-\d{4})?)?\s*$')
+
+# Plain North American numbers - by far the most common shape in our leads -
+# are converted without a full libphonenumber parse
+NANP_PATTERN = re.compile(r'\s*(?:\+?1[\s.-]?)?\(?([2-9]\d{2})\)?[\s.-]?([2-9]\d{2})[\s.-]?(\d{4})\s*')
+NANP_REGIONS = {'US', 'CA', 'PR'}
+
+
+def region_hint(*texts: Optional[str], default: str = DEFAULT_PHONE_REGION) -> str:
+    """Region code for parsing national-format numbers, guessed from a Maps query or address"""
+    for text in texts:
+        if not text:
+            continue
+        tail = str(text).rsplit(',', 1)[-1].strip()
+        country = COUNTRY_NAMES.get(tail.lower().rstrip('.'))
+        if country:
+            return country
+        match = STATE_PATTERN.search(tail)
+        if match:
+            code = match.group(1)
+            if code in US_STATES:
+                return 'US'
+            if code in CA_PROVINCES:
+                return 'CA'
+    return default
+
+
+@lru_cache(maxsize=PHONE_PARSE_CACHE_SIZE)
+def to_e164(raw: str, region: str = DEFAULT_PHONE_REGION) -> Optional[str]:
+    """E.164 form (+17135550142) of a scraped phone string, or None if it can't be a number"""
+    if not raw:
+        return None
+    if region in NANP_REGIONS or raw.lstrip().startswith('+1'):
+        match = NANP_PATTERN.fullmatch(raw)
+        if match:
+            return '+1' + ''.join(match.groups())
+    try:
+        number = phonenumbers.parse(raw, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_possible_number(number):
+        return None
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+
+
+def e164_key(e164: str) -> int:
+    """Integer key of an E.164 number; country codes are prefix-free, so keys never collide"""
+    return int(e164[1:])
+
+
+def key_to_e164(key: int) -> str:
+    return f"+{key}"
+
+
+def phone_key(raw: str, region: str = DEFAULT_PHONE_REGION) -> Optional[int]:
+    """Integer key for a phone string in any format, or None"""
+    e164 = to_e164(raw, region) if raw else None
+    return e164_key(e164) if e164 else None
+
+
+def normalize_lead(lead: Dict, region: Optional[str] = None) -> Dict:
+    """Set phone_e164/phone_key on a lead; the region defaults to a hint from its address/query"""
+    raw_data = lead.get('raw_data') or {}
+    phone = lead.get('phone') or raw_data.get('phone')
+    if not phone:
+        lead['phone_e164'] = lead['phone_key'] = None
+        return lead
+    if region is None:
+        region = region_hint(lead.get('address') or raw_data.get('address'),
+                             lead.get('query') or raw_data.get('query'))
+    e164 = to_e164(str(phone), region)
+    lead['phone_e164'] = e164
+    lead['phone_key'] = e164_key(e164) if e164 else None
+    return lead
+
+
+def normalize_leads(leads: Iterable[Dict], region: Optional[str] = None) -> List[Dict]:
+    return [normalize_lead(lead, region) for lead in leads]
+
+
+class PhoneIndex:
+    """Hash index from integer phone keys to leads, for O(1) lookups and joins.
+
+    region forces the region used for numbers without phone_key; by default it is
+    guessed per lead (see normalize_lead).
+    """
+
+    def __init__(self, leads: Iterable[Dict] = (), region: Optional[str] = None):
+        self.region = region
+        self._index = {}
+        for lead in leads:
+            self.add(lead)
+
+    def _key(self, phone) -> Optional[int]:
+        if isinstance(phone, int):
+            return phone
+        return phone_key(phone, self.region or DEFAULT_PHONE_REGION)
+
+    def add(self, lead: Dict) -> Optional[int]:
+        """Index a lead under its phone_key (computed if missing); returns the key"""
+        key = lead.get('phone_key')
+        if key is None and (lead.get('phone') or (lead.get('raw_data') or {}).get('phone')):
+            key = normalize_lead(lead, self.region)['phone_key']
+        if key is not None:
+            self._index.setdefault(key, []).append(lead)
+        return key
+
+    def get(self, phone) -> List[Dict]:
+        """Leads with this number; phone may be a key or a string in any format"""
+        key = self._key(phone)
+        return self._index.get(key, []) if key is not None else []
+
+    def __contains__(self, phone) -> bool:
+        key = self._key(phone)
+        return key is not None and key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self):
+        return self._index.keys()
+
+    def join(self, leads: Iterable[Dict]) -> Iterator[Tuple[Dict, Dict]]:
+        """(lead, indexed lead) pairs for every lead whose number is in the index"""
+        for lead in leads:
+            key = lead.get('phone_key')
+            if key is None:
+                key = normalize_lead(lead, self.region)['phone_key']
+            for match in self._index.get(key, ()) if key is not None else ():
+                yield lead, match
@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import marshal
+import os
+import re
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# Target key -> worksheet name in scraping_targets.xlsx
+TARGET_SHEETS = {
+    'facebook': 'Facebook',
+    'youtube': 'YouTube',
+    'google_maps': 'GoogleMaps'
+}
+
+YOUTUBE_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/|youtube\.com\/v\/)([^&\n?#]+)'),
+    re.compile(r'youtube\.com\/watch.*[\&\?]v=([^&\n?#]+)'),
+    re.compile(r'youtube\.com\/shorts\/([^&\n?#]+)')
+]
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'si', 'feature', 'ref', '__cft__[0]', '__tn__'}
+
+HOST_ALIASES = {
+    'facebook.com': 'www.facebook.com',
+    'm.facebook.com': 'www.facebook.com',
+    'web.facebook.com': 'www.facebook.com',
+    'youtube.com': 'www.youtube.com',
+    'm.youtube.com': 'www.youtube.com'
+}
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """Extract video ID from various YouTube URL formats"""
+    for pattern in YOUTUBE_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize scheme/host, drop fragments, tracking params and trailing slashes"""
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    host = HOST_ALIASES.get(host, host)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.startswith('utm_') and k not in TRACKING_PARAMS]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace in a Google Maps search query"""
+    return ' '.join(str(query).split())
+
+
+def _unique(values: List[str]) -> List[str]:
+    seen = set()
+    result = []
+    for value in values:
+        key = value.lower()
+        if key not in seen:
+            seen.add(key)
+            result.append(value)
+    return result
+
+
+def normalize_targets(raw: Dict[str, List]) -> Dict[str, List[str]]:
+    """Deduplicate targets, canonicalize URLs and pre-extract YouTube IDs"""
+    facebook = _unique([canonicalize_url(str(url)) for url in raw.get('facebook', [])])
+    google_maps = _unique([normalize_query(q) for q in raw.get('google_maps', []) if normalize_query(q)])
+
+    youtube = []
+    youtube_ids = []
+    seen_ids = set()
+    for url in raw.get('youtube', []):
+        video_id = extract_video_id(str(url))
+        if not video_id:
+            logger.warning(f"Could not extract video ID from URL: {url}")
+            continue
+        if video_id in seen_ids:
+            continue
+        seen_ids.add(video_id)
+        youtube_ids.append(video_id)
+        youtube.append(f"https://www.youtube.com/watch?v={video_id}")
+
+    return {
+        'facebook': facebook,
+        'youtube': youtube,
+        'youtube_ids': youtube_ids,
+        'google_maps': google_maps
+    }
+
+
+def parse_targets_workbook(file_path: str) -> Dict[str, List]:
+    """Read the first column of each target sheet in read-only streaming mode"""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        raw = {key: [] for key in TARGET_SHEETS}
+        for key, sheet_name in TARGET_SHEETS.items():
+            if sheet_name not in wb.sheetnames:
+                continue
+            for row in wb[sheet_name].iter_rows(min_row=2, max_col=1, values_only=True):
+                if row and row[0]:
+                    raw[key].append(row[0])
+        return raw
+    finally:
+        wb.close()
+
+
+def file_digest(file_path: str) -> str:
+    """Content hash used to validate the cache when the mtime changes"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TargetCache:
+    """Compiled, normalized copy of the targets workbook stored next to it"""
+
+    def __init__(self, file_path: str, cache_path: str = None):
+        self.file_path = file_path
+        if cache_path is None:
+            directory, name = os.path.split(os.path.abspath(file_path))
+            cache_path = os.path.join(directory, f".{name}.targets.cache")
+        self.cache_path = cache_path
+
+    def _read_cache(self) -> Optional[Dict]:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return None
+        return data
+
+    def _write_cache(self, data: Dict):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write target cache {self.cache_path}: {str(e)}")
+
+    def load(self) -> Dict[str, List[str]]:
+        """Return normalized targets, parsing the workbook only if it changed"""
+        stat = os.stat(self.file_path)
+        cached = self._read_cache()
+
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return cached['targets']
+
+        digest = file_digest(self.file_path)
+        if cached and cached['digest'] == digest:
+            # Touched but unchanged - refresh the stat fields only
+            cached['mtime_ns'] = stat.st_mtime_ns
+            cached['size'] = stat.st_size
+            self._write_cache(cached)
+            return cached['targets']
+
+        logger.info(f"Parsing targets from {self.file_path}")
+        targets = normalize_targets(parse_targets_workbook(self.file_path))
+        self._write_cache({
+            'version': CACHE_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': digest,
+            'targets': targets
+        })
+        return targets